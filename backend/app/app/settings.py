@@ -262,6 +262,29 @@ FILE_UPLOAD_DIRECTORY_PERMISSIONS = 0o755
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Files only reachable through tenant-scoped views (queued CSV uploads,
+# rejected rows of imports). Must be outside MEDIA_ROOT, since the web
+# server serves MEDIA_ROOT publicly, and shared by backend and worker.
+PRIVATE_FILES_ROOT = os.environ.get("PRIVATE_FILES_ROOT", os.path.join(BASE_DIR, "private"))
+
+# Cache for computed budget reports. Per-process LocMemCache is enough for
+# correctness: report versions are read from Postgres (a fingerprint of
+# the budget's rows plus the generation in core.ReportCacheState), so a
+# write or an invalidation in the job worker or another Daphne process is
+# seen everywhere. Use a shared backend (e.g. Redis) to also share the
+# cached payloads and the hit/miss counters between processes.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "plantex-reports",
+    }
+}
+
+# Seconds a running background job may go without reporting progress
+# (BackgroundJob.updated_at) before the next claim marks it failed, e.g.
+# after its worker was killed. Handlers report at least once per chunk.
+BACKGROUND_JOB_STALE_AFTER = int(os.environ.get("BACKGROUND_JOB_STALE_AFTER", 30 * 60))
+
 # Custom user model
 AUTH_USER_MODEL = "userauths.User"
 
@@ -16,4 +16,5 @@ from django.contrib import admin
 #     search_fields = ('field1',)
 
 # Import textile admin configurations
-from .textile_admin import *
\ No newline at end of file
+from .textile_admin import *
+from .job_admin import *
\ No newline at end of file
@@ -0,0 +1,82 @@
+# backend/app/core/conditional.py
+"""
+Conditional GET support for the core app.
+Responsibility: Compute cheap strong ETags for textile endpoints and answer
+If-None-Match with 304 before any serialization runs.
+"""
+
+import hashlib
+
+from django.db import connection
+from django.db.models import Count, Max
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def etag_matches(request, etag: str) -> bool:
+    """Whether the request's If-None-Match already holds etag (weak comparison, as for GET)"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    if '*' in candidates:
+        return True
+    return any(candidate.removeprefix('W/') == etag.removeprefix('W/') for candidate in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response carrying the current ETag"""
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the given parts and the current tenant schema"""
+    raw = '|'.join([getattr(connection, 'schema_name', 'public')] + [str(part) for part in parts])
+    return quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    ETag / If-None-Match support for ModelViewSet list and retrieve.
+
+    The ETag is one aggregate query over the filtered queryset: row count
+    and latest updated_at, plus the same for every relation named in
+    etag_related (for serializers exposing child counts), combined with
+    the full request path so filters, ordering and page are part of it.
+    """
+
+    # Reverse relations whose rows also change the serialized payload
+    etag_related = ()
+
+    def get_etag(self, queryset) -> str:
+        distinct = bool(self.etag_related)
+        aggregates = {'count': Count('pk', distinct=distinct), 'updated': Max('updated_at')}
+        for relation in self.etag_related:
+            aggregates[f'{relation}_count'] = Count(relation, distinct=True)
+            aggregates[f'{relation}_updated'] = Max(f'{relation}__updated_at')
+        values = queryset.order_by().aggregate(**aggregates)
+        return make_etag(
+            self.request.get_full_path(),
+            *(values[name] for name in sorted(values))
+        )
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_etag(self.filter_queryset(self.get_queryset()))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: kwargs[lookup_url_kwarg]}
+        )
+        etag = self.get_etag(queryset)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response = super().retrieve(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
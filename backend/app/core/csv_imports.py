@@ -0,0 +1,145 @@
+# backend/app/core/csv_imports.py
+"""
+CSV import endpoint for the core app.
+Responsibility: Expose an importer from utils.csv_operations as the
+import_csv action of a ModelViewSet, run in the request or queued as a
+background job, and serve the rejected rows file of finished imports.
+"""
+
+import uuid
+
+from django.db import connection
+from django.http import FileResponse
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.response import Response
+
+from .utils.csv_operations import CSV_IMPORTERS, CSVImportError, open_rejected_rows, store_rejected_rows
+from .utils.jobs import enqueue_job
+from .utils.private_files import private_storage
+
+
+class CSVImportMixin:
+    """
+    POST <resource>/import_csv/ with a multipart 'file' and the optional
+    validate_only, skip_duplicates, continue_on_error and merge flags
+    (merge updates the records rows match instead of skipping them).
+    
+    With async=true the file is stored under PRIVATE_FILES_ROOT and an import_csv
+    background job is queued; the response carries the job id, and
+    jobs/<id>/ reports the processed, imported, skipped and error counts
+    while the import runs.
+    
+    Responses carry at most max_inline_errors messages plus error_summary
+    (counts by error type and field). When rows were rejected, all of them
+    (original columns plus an error column) can be downloaded for 24 hours
+    from <resource>/import-csv/rejected/<rejected_rows_file>/.
+    """
+
+    csv_importer_class = None
+
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def import_csv(self, request):
+        """
+        Import records from CSV file
+        """
+        try:
+            # Get uploaded file
+            if 'file' not in request.FILES:
+                return Response(
+                    {'error': 'No file provided'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            file = request.FILES['file']
+            
+            # Validate file type
+            if not file.name.endswith('.csv'):
+                return Response(
+                    {'error': 'File must be a CSV file'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            # Get import options
+            validate_only = request.data.get('validate_only', 'false').lower() == 'true'
+            skip_duplicates = request.data.get('skip_duplicates', 'true').lower() == 'true'
+            continue_on_error = request.data.get('continue_on_error', 'true').lower() == 'true'
+            merge = request.data.get('merge', 'false').lower() == 'true'
+            
+            if request.data.get('async', 'false').lower() == 'true':
+                return self.queue_csv_import(file, {
+                    'validate_only': validate_only,
+                    'skip_duplicates': skip_duplicates,
+                    'continue_on_error': continue_on_error,
+                    'merge': merge,
+                })
+            
+            # Import CSV, streaming the uploaded file
+            importer = self.csv_importer_class()
+            result = importer.import_csv(
+                file_content=file,
+                validate_only=validate_only,
+                skip_duplicates=skip_duplicates,
+                continue_on_error=continue_on_error,
+                merge=merge
+            )
+            
+            token = store_rejected_rows(importer.rejects, current_schema_name())
+            result['rejected_rows_file'] = token
+            if token:
+                result['rejected_rows_url'] = request.build_absolute_uri(f'{request.path}rejected/{token}/')
+            
+            return Response(result, status=status.HTTP_200_OK)
+            
+        except CSVImportError as e:
+            return Response(
+                {
+                    'error': str(e),
+                    'line_number': getattr(e, 'line_number', None),
+                    'errors': getattr(e, 'errors', [])
+                }, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                {'error': f'Import failed: {str(e)}'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    def queue_csv_import(self, file, options):
+        """
+        Store the upload in private storage and queue a background job that
+        imports it; the job deletes the file when it ends
+        """
+        importer = next(name for name, importer_class in CSV_IMPORTERS.items()
+                        if importer_class is self.csv_importer_class)
+        path = private_storage().save(f'csv_imports/{current_schema_name()}/{uuid.uuid4().hex}.csv', file)
+        job = enqueue_job('import_csv', {'importer': importer, 'path': path, **options})
+        
+        return Response({
+            'success': True,
+            'message': 'Importación CSV en cola.',
+            'job_id': job.pk,
+            'status': job.status,
+            'timestamp': timezone.now().isoformat(),
+        }, status=status.HTTP_202_ACCEPTED)
+
+    def import_csv_rejected(self, request, token=None):
+        """
+        Download the rejected rows of an import of this tenant
+        """
+        rejected = open_rejected_rows(current_schema_name(), token)
+        if rejected is None:
+            return Response(
+                {'error': 'Archivo de filas rechazadas no encontrado o expirado.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return FileResponse(rejected, as_attachment=True, filename='filas_rechazadas.csv',
+                            content_type='text/csv')
+
+
+def current_schema_name():
+    return getattr(connection, 'schema_name', get_public_schema_name())
@@ -0,0 +1,25 @@
+# backend/app/core/job_admin.py
+"""
+Django Admin configuration for background jobs
+Responsibility: Read-only monitoring of queued, running and finished jobs.
+"""
+
+from django.contrib import admin
+from .job_models import BackgroundJob
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'job_type', 'schema_name', 'status', 'percent_complete',
+        'rows_touched', 'created_at', 'finished_at'
+    ]
+    list_filter = ['job_type', 'status', 'schema_name', 'created_at']
+    ordering = ['-created_at']
+    readonly_fields = [
+        'job_type', 'schema_name', 'status', 'params', 'total_steps', 'completed_steps',
+        'rows_touched', 'result', 'error', 'started_at', 'finished_at', 'created_at', 'updated_at'
+    ]
+    
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,103 @@
+# backend/app/core/job_models.py
+"""
+Background Job Models
+Responsibility: Database-backed queue for long-running, tenant-scoped
+operations (cost recalculations, CSV imports) processed by the run_jobs worker.
+"""
+
+from django.db import models
+from django.utils import timezone
+from .models import TimeStampedModel
+
+
+class BackgroundJob(TimeStampedModel):
+    """Queued unit of work executed by the run_jobs worker inside a tenant schema"""
+    JOB_TYPES = [
+        ('recalculate_bom_costs', 'Recalcular costos de plantillas BOM'),
+        ('recalculate_budget_costs', 'Recalcular presupuestos de producción'),
+        ('import_csv', 'Importar archivo CSV'),
+    ]
+
+    STATUS_CHOICES = [
+        ('queued', 'En cola'),
+        ('running', 'En ejecución'),
+        ('completed', 'Completado'),
+        ('failed', 'Fallido'),
+    ]
+
+    job_type = models.CharField(
+        max_length=50,
+        choices=JOB_TYPES,
+        help_text="Tipo de trabajo"
+    )
+    schema_name = models.CharField(
+        max_length=63,
+        help_text="Esquema del tenant en el que se ejecuta el trabajo"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='queued',
+        help_text="Estado del trabajo"
+    )
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Parámetros del trabajo"
+    )
+    total_steps = models.PositiveIntegerField(
+        default=0,
+        help_text="Número total de elementos a procesar"
+    )
+    completed_steps = models.PositiveIntegerField(
+        default=0,
+        help_text="Número de elementos procesados"
+    )
+    rows_touched = models.PositiveIntegerField(
+        default=0,
+        help_text="Filas actualizadas en la base de datos"
+    )
+    result = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Resumen del resultado"
+    )
+    error = models.TextField(blank=True, help_text="Mensaje de error")
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Trabajo en segundo plano"
+        verbose_name_plural = "Trabajos en segundo plano"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='core_job_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.get_job_type_display()} ({self.get_status_display()})"
+
+    @property
+    def percent_complete(self):
+        """Progress as a percentage of total_steps"""
+        if self.status == 'completed':
+            return 100.0
+        if not self.total_steps:
+            return 0.0
+        return round(self.completed_steps * 100 / self.total_steps, 1)
+
+    @property
+    def elapsed_seconds(self):
+        """Seconds spent running so far (or in total once finished)"""
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or timezone.now()
+        return round((end - self.started_at).total_seconds(), 3)
+
+    def report_progress(self, completed_steps, total_steps=None, rows_touched=0):
+        """Persist progress counters without touching the rest of the row"""
+        self.completed_steps = completed_steps
+        if total_steps is not None:
+            self.total_steps = total_steps
+        self.rows_touched += rows_touched
+        self.save(update_fields=['completed_steps', 'total_steps', 'rows_touched', 'updated_at'])
@@ -0,0 +1,139 @@
+# backend/app/core/management/commands/benchmark_reports.py
+"""
+Django management command to benchmark the provider summary report.
+Builds synthetic budgets inside a transaction that is rolled back, then
+times the per-row Python accumulation the report used to do against the
+grouped SQL aggregate it uses now.
+Usage: python manage.py benchmark_reports [--products 10 100 1000] [--repeat 5]
+"""
+
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.textile_models import (
+    BOMItem,
+    BOMTemplate,
+    EndProduct,
+    Input,
+    InputProvider,
+    ProductionBudget,
+    ProductionBudgetItem,
+    Provider,
+    Unit,
+)
+from core.utils.costing import BudgetReportAggregator
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the provider summary report: Python accumulation vs SQL aggregate'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--products',
+            type=int,
+            nargs='+',
+            default=[10, 100, 1000],
+            help='Budget sizes (number of products) to benchmark',
+        )
+        parser.add_argument(
+            '--lines',
+            type=int,
+            default=8,
+            help='BOM lines per product',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per size; the best time is reported',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"products":>9} {"python ms":>11} {"sql ms":>9} {"speedup":>8} {"max diff":>10}')
+
+        for products in options['products']:
+            with transaction.atomic():
+                budget = self._build_budget(products, options['lines'])
+                python_ms, legacy = self._best_time(options['repeat'], lambda: self._python_summary(budget))
+                sql_ms, providers = self._best_time(
+                    options['repeat'], lambda: BudgetReportAggregator().provider_summary(budget)
+                )
+                max_diff = max(
+                    abs(Decimal(f'{legacy[provider.provider_name]:.2f}') - provider.total_cost)
+                    for provider in providers
+                )
+                transaction.set_rollback(True)
+
+            speedup = python_ms / sql_ms if sql_ms else 0
+            self.stdout.write(f'{products:>9} {python_ms:>11.1f} {sql_ms:>9.1f} {speedup:>7.1f}x {max_diff:>10}')
+
+        self.stdout.write(self.style.SUCCESS('Benchmark finished; synthetic data rolled back'))
+
+    def _best_time(self, repeat, run):
+        best, result = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = run()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def _python_summary(self, budget):
+        """The former report loop: prefetch every BOM item and sum floats per provider"""
+        budget_items = ProductionBudgetItem.objects.select_related(
+            'end_product', 'end_product__bom_template'
+        ).prefetch_related(
+            'end_product__bom_template__bom_items__input',
+            'end_product__bom_template__bom_items__input_provider__provider',
+        ).filter(production_budget=budget)
+
+        totals = {}
+        materials = {}
+        for item in budget_items:
+            for bom_item in item.end_product.bom_template.bom_items.all():
+                provider_name = bom_item.input_provider.provider.name
+                totals[provider_name] = totals.get(provider_name, 0) + float(bom_item.line_cost_cop) * item.planned_quantity
+                materials.setdefault(provider_name, set()).add(bom_item.input.name)
+        return totals
+
+    def _build_budget(self, products, lines):
+        rng = random.Random(products)
+        unit = Unit.objects.create(name_en='Bench unit', name_es='Unidad bench', abbreviation=f'b{products}')
+        providers = Provider.objects.bulk_create(Provider(name=f'Bench provider {n}') for n in range(20))
+        inputs = Input.objects.bulk_create(
+            Input(name=f'Bench input {n}', input_type='supply', unit=unit) for n in range(200)
+        )
+        input_providers = InputProvider.objects.bulk_create(
+            InputProvider(
+                input=input_obj,
+                provider=rng.choice(providers),
+                price_per_unit_cop=Decimal(rng.randint(100, 500000)) / 100,
+            )
+            for input_obj in inputs
+        )
+        templates = BOMTemplate.objects.bulk_create(BOMTemplate(name=f'Bench BOM {n}') for n in range(products))
+        bom_items = []
+        for template in templates:
+            for input_provider in rng.sample(input_providers, lines):
+                quantity = Decimal(rng.randint(1, 5000)) / 1000
+                bom_items.append(BOMItem(
+                    bom_template=template,
+                    input_id=input_provider.input_id,
+                    input_provider=input_provider,
+                    quantity=quantity,
+                    line_cost_cop=(input_provider.price_per_unit_cop * quantity).quantize(Decimal('0.01')),
+                ))
+        BOMItem.objects.bulk_create(bom_items, batch_size=1000)
+        end_products = EndProduct.objects.bulk_create(
+            EndProduct(name=f'Bench product {n}', bom_template=template) for n, template in enumerate(templates)
+        )
+        budget = ProductionBudget.objects.create(name=f'Bench budget {products}')
+        ProductionBudgetItem.objects.bulk_create(
+            ProductionBudgetItem(production_budget=budget, end_product=product, planned_quantity=rng.randint(1, 500))
+            for product in end_products
+        )
+        return budget
@@ -132,11 +132,8 @@ class Command(BaseCommand):
                     filter_desc = ', '.join([f'{k}={v}' for k, v in filters.items()])
                     self.stdout.write(f'Applying filters: {filter_desc}')
                 
-                # Export CSV
-                exporter.export_csv(output_file=output_path, **filters)
-                
-                # Get record count for feedback
-                record_count = self.get_record_count(exporter, filters)
+                # Export CSV, writing the file chunk by chunk
+                record_count = exporter.export_csv(output_file=output_path, **filters)
                 
                 self.stdout.write(
                     self.style.SUCCESS(f'Successfully exported {record_count} records to: {output_path}')
@@ -182,11 +179,3 @@ class Command(BaseCommand):
                 filters['has_email'] = True
         
         return filters
-    
-    def get_record_count(self, exporter, filters):
-        """Get the count of records that will be exported"""
-        try:
-            queryset = exporter.get_queryset(**filters)
-            return queryset.count()
-        except:
-            return 'unknown'
\ No newline at end of file
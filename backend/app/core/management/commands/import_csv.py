@@ -7,6 +7,11 @@ import os
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 from core.utils.csv_operations import (
+    BOMItemCSVImporter,
+    BOMTemplateCSVImporter,
+    EndProductCSVImporter,
+    InputCSVImporter,
+    InputProviderCSVImporter,
     ProviderCSVImporter,
     CSVImportError
 )
@@ -20,6 +25,26 @@ class Command(BaseCommand):
             'importer': ProviderCSVImporter,
             'description': 'Import providers from CSV'
         },
+        'inputs': {
+            'importer': InputCSVImporter,
+            'description': 'Import inputs from CSV (unit by abbreviation)'
+        },
+        'input-providers': {
+            'importer': InputProviderCSVImporter,
+            'description': 'Import input prices per provider from CSV'
+        },
+        'bom-templates': {
+            'importer': BOMTemplateCSVImporter,
+            'description': 'Import BOM templates from CSV'
+        },
+        'bom-items': {
+            'importer': BOMItemCSVImporter,
+            'description': 'Import BOM lines from CSV and recalculate the affected costs'
+        },
+        'end-products': {
+            'importer': EndProductCSVImporter,
+            'description': 'Import end products from CSV'
+        },
     }
     
     def add_arguments(self, parser):
@@ -46,7 +71,14 @@ class Command(BaseCommand):
             '--batch-size',
             type=int,
             default=100,
-            help='Number of records to process in each batch (default: 100)'
+            help='Number of records inserted per bulk INSERT (default: 100)'
+        )
+        
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processes used to validate rows in parallel (default: 1, serial)'
         )
         
         parser.add_argument(
@@ -56,6 +88,12 @@ class Command(BaseCommand):
             help='Skip duplicate records instead of failing'
         )
         
+        parser.add_argument(
+            '--merge',
+            action='store_true',
+            help='Update records matching a row on their natural key instead of skipping them'
+        )
+        
         parser.add_argument(
             '--continue-on-error',
             action='store_true', 
@@ -68,13 +106,22 @@ class Command(BaseCommand):
             action='store_true',
             help='Stop import on first error (overrides --continue-on-error)'
         )
+        
+        parser.add_argument(
+            '--rejected-file',
+            type=str,
+            help='Write the rejected rows (original columns plus an error column) to this CSV file'
+        )
     
     def handle(self, *args, **options):
         model = options['model']
         file_path = options['file_path']
         dry_run = options['dry_run']
         batch_size = options['batch_size']
+        workers = options['workers']
         skip_duplicates = options['skip_duplicates']
+        merge = options['merge']
+        rejected_file = options['rejected_file']
         continue_on_error = options['continue_on_error'] and not options['fail_fast']
         
         # Validate file exists
@@ -84,6 +131,9 @@ class Command(BaseCommand):
         if not file_path.endswith('.csv'):
             raise CommandError('File must have .csv extension')
         
+        if workers < 1:
+            raise CommandError('--workers must be at least 1')
+        
         # Get importer class
         model_config = self.SUPPORTED_MODELS[model]
         importer_class = model_config['importer']
@@ -94,26 +144,29 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('Running in DRY-RUN mode - no data will be imported'))
         
         try:
-            # Read file content
-            with open(file_path, 'r', encoding='utf-8') as file:
-                file_content = file.read()
-            
             # Initialize importer
-            importer = importer_class(batch_size=batch_size)
+            importer = importer_class(batch_size=batch_size, workers=workers)
             
-            # Import CSV
-            with transaction.atomic():
+            # Import CSV, streaming the file from disk
+            with open(file_path, 'rb') as file_content, transaction.atomic():
                 result = importer.import_csv(
                     file_content=file_content,
                     validate_only=dry_run,
                     skip_duplicates=skip_duplicates,
-                    continue_on_error=continue_on_error
+                    continue_on_error=continue_on_error,
+                    merge=merge
                 )
                 
                 # If dry_run, rollback the transaction
                 if dry_run:
                     transaction.set_rollback(True)
             
+            if rejected_file and importer.rejects.has_rows:
+                with open(rejected_file, 'wb') as output:
+                    importer.rejects.copy_to(output)
+                self.stdout.write(f'Rejected rows written to {rejected_file}')
+            importer.rejects.close()
+            
             # Display results
             self.display_results(result, dry_run)
             
@@ -145,6 +198,9 @@ class Command(BaseCommand):
         
         # Summary statistics
         self.stdout.write(f'Records processed: {result["imported_count"]}')
+        if result['merge']:
+            self.stdout.write(f'Records updated: {result["updated_count"]}')
+            self.stdout.write(f'Records unchanged: {result["unchanged_count"]}')
         self.stdout.write(f'Records skipped: {result["skipped_count"]}')
         self.stdout.write(f'Errors found: {result["error_count"]}')
         
@@ -153,6 +209,11 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('\nErrors encountered:'))
             for error in result['errors']:
                 self.stdout.write(f'  - {error}')
+            if result['errors_truncated']:
+                self.stdout.write(f'  ... {result["error_count"] - len(result["errors"])} more')
+            self.stdout.write('\nErrors by type and field:')
+            for entry in result['error_summary']:
+                self.stdout.write(f'  {entry["error_type"]:<12} {entry["field"] or "-":<20} {entry["count"]}')
         
         # Final status
         if result['error_count'] == 0:
@@ -6,6 +6,7 @@ Usage: python manage.py recalculate_bom_costs
 
 from django.core.management.base import BaseCommand
 from core.textile_models import BOMTemplate
+from core.utils.costing import BOMCostEngine
 
 
 class Command(BaseCommand):
@@ -26,44 +27,38 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         template_id = options['template_id']
         dry_run = options['dry_run']
+        engine = BOMCostEngine()
         
         if template_id:
             # Recalculate specific BOM template
             try:
                 bom_template = BOMTemplate.objects.get(pk=template_id)
-                old_cost = bom_template.total_cost_cop
                 
                 if not dry_run:
-                    # Recalculate BOM item costs first
-                    for item in bom_template.bom_items.all():
-                        item.recalculate_cost()
-                    
-                    # Then recalculate BOM total
-                    new_cost = bom_template.recalculate_cost()
+                    # Recalculate BOM item costs and BOM total in the database
+                    changes = engine.recalculate(template_ids=[template_id])
+                    change = next(change for change in changes if change.id == template_id)
                     
                     self.stdout.write(
                         self.style.SUCCESS(
                             f'✓ BOM Template "{bom_template.name}" (ID: {template_id})'
                         )
                     )
-                    self.stdout.write(f'  Old cost: ${old_cost:,.2f} COP')
-                    self.stdout.write(f'  New cost: ${new_cost:,.2f} COP')
-                    self.stdout.write(f'  Difference: ${new_cost - old_cost:+,.2f} COP')
+                    self.stdout.write(f'  Old cost: ${change.old_cost:,.2f} COP')
+                    self.stdout.write(f'  New cost: ${change.new_cost:,.2f} COP')
+                    self.stdout.write(f'  Difference: ${change.difference:+,.2f} COP')
                 else:
                     # Calculate what the new cost would be
-                    calculated_cost = sum(
-                        item.input_provider.price_per_unit_cop * item.quantity 
-                        for item in bom_template.bom_items.all()
-                    )
+                    change = engine.preview(template_ids=[template_id])[0]
                     
                     self.stdout.write(
                         self.style.WARNING(
                             f'[DRY RUN] BOM Template "{bom_template.name}" (ID: {template_id})'
                         )
                     )
-                    self.stdout.write(f'  Current cost: ${old_cost:,.2f} COP')
-                    self.stdout.write(f'  Would be: ${calculated_cost:,.2f} COP')
-                    self.stdout.write(f'  Difference: ${calculated_cost - old_cost:+,.2f} COP')
+                    self.stdout.write(f'  Current cost: ${change.old_cost:,.2f} COP')
+                    self.stdout.write(f'  Would be: ${change.new_cost:,.2f} COP')
+                    self.stdout.write(f'  Difference: ${change.difference:+,.2f} COP')
                 
             except BOMTemplate.DoesNotExist:
                 self.stdout.write(
@@ -73,8 +68,7 @@ class Command(BaseCommand):
                 
         else:
             # Recalculate all BOM templates
-            bom_templates = BOMTemplate.objects.all()
-            total_templates = bom_templates.count()
+            total_templates = BOMTemplate.objects.count()
             
             if total_templates == 0:
                 self.stdout.write(
@@ -84,40 +78,22 @@ class Command(BaseCommand):
             
             self.stdout.write(f'Found {total_templates} BOM template(s) to process...')
             
-            updated_count = 0
-            total_cost_change = 0
+            if dry_run:
+                changes = engine.preview()
+            else:
+                changes = engine.recalculate()
             
-            for bom_template in bom_templates:
-                old_cost = bom_template.total_cost_cop
-                
+            updated_count = len(changes)
+            total_cost_change = sum((change.difference for change in changes), 0)
+            
+            for change in changes:
                 if not dry_run:
-                    # Recalculate BOM item costs first
-                    for item in bom_template.bom_items.all():
-                        item.recalculate_cost()
-                    
-                    # Then recalculate BOM total
-                    new_cost = bom_template.recalculate_cost()
-                    
-                    cost_change = new_cost - old_cost
-                    total_cost_change += cost_change
-                    updated_count += 1
-                    
                     self.stdout.write(
-                        f'✓ "{bom_template.name}": ${old_cost:,.2f} → ${new_cost:,.2f} COP ({cost_change:+,.2f})'
+                        f'✓ "{change.name}": ${change.old_cost:,.2f} → ${change.new_cost:,.2f} COP ({change.difference:+,.2f})'
                     )
                 else:
-                    # Calculate what the new cost would be
-                    calculated_cost = sum(
-                        item.input_provider.price_per_unit_cop * item.quantity 
-                        for item in bom_template.bom_items.all()
-                    )
-                    
-                    cost_change = calculated_cost - old_cost
-                    total_cost_change += cost_change
-                    updated_count += 1
-                    
                     self.stdout.write(
-                        f'[DRY RUN] "{bom_template.name}": ${old_cost:,.2f} → ${calculated_cost:,.2f} COP ({cost_change:+,.2f})'
+                        f'[DRY RUN] "{change.name}": ${change.old_cost:,.2f} → ${change.new_cost:,.2f} COP ({change.difference:+,.2f})'
                     )
             
             # Summary
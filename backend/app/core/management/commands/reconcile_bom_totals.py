@@ -0,0 +1,61 @@
+# backend/app/core/management/commands/reconcile_bom_totals.py
+"""
+Django management command to detect and fix drift between BOM template
+totals and the sum of their line costs.
+Usage: python manage.py reconcile_bom_totals [--dry-run]
+"""
+
+from django.core.management.base import BaseCommand
+from core.utils.costing import BOMTotalReconciler
+
+
+class Command(BaseCommand):
+    help = 'Detect and fix BOM template totals that drifted from the sum of their items'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--template-id',
+            type=int,
+            help='Only check a specific BOM template ID',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted templates without fixing them',
+        )
+    
+    def handle(self, *args, **options):
+        template_id = options['template_id']
+        dry_run = options['dry_run']
+        template_ids = [template_id] if template_id else None
+        reconciler = BOMTotalReconciler()
+        
+        if dry_run:
+            drifted = reconciler.find_drift(template_ids)
+        else:
+            drifted = reconciler.reconcile(template_ids)
+        
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('No drift found in BOM template totals'))
+            return
+        
+        prefix = '[DRY RUN] ' if dry_run else '✓ '
+        for change in drifted:
+            self.stdout.write(
+                f'{prefix}"{change.name}": ${change.old_cost:,.2f} → ${change.new_cost:,.2f} COP ({change.difference:+,.2f})'
+            )
+        
+        self.stdout.write('\n' + '='*50)
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(f'DRY RUN SUMMARY - {len(drifted)} drifted templates found, no changes made')
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f'Successfully reconciled {len(drifted)} BOM templates')
+            )
+            propagation = reconciler.propagation
+            self.stdout.write(
+                f'Dependent costs recalculated: {propagation.bom_templates} BOM templates, '
+                f'{propagation.end_products} end products, {propagation.production_budgets} budgets'
+            )
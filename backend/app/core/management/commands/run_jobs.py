@@ -0,0 +1,67 @@
+# backend/app/core/management/commands/run_jobs.py
+"""
+Django management command that processes queued background jobs.
+Usage: python manage.py run_jobs [--once] [--poll-interval 2]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from core.utils.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs (cost recalculations, CSV imports) in their tenant schemas'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process the jobs currently queued and exit instead of polling',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when the queue is empty (default: 2)',
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            help='Exit after processing this many jobs',
+        )
+    
+    def handle(self, *args, **options):
+        once = options['once']
+        poll_interval = options['poll_interval']
+        max_jobs = options['max_jobs']
+        processed = 0
+        
+        self.stdout.write('Waiting for background jobs...')
+        
+        while max_jobs is None or processed < max_jobs:
+            job = claim_next_job()
+            
+            if job is None:
+                if once:
+                    break
+                time.sleep(poll_interval)
+                continue
+            
+            self.stdout.write(f'Running job #{job.pk} ({job.job_type}) in schema "{job.schema_name}"')
+            job = run_job(job)
+            processed += 1
+            
+            if job.status == 'completed':
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'✓ Job #{job.pk} completed in {job.elapsed_seconds}s '
+                        f'({job.rows_touched} rows touched)'
+                    )
+                )
+            else:
+                self.stdout.write(
+                    self.style.ERROR(f'✗ Job #{job.pk} failed: {job.error}')
+                )
+        
+        self.stdout.write(f'Processed {processed} job(s)')
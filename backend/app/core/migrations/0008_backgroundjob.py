@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-17 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_update_input_types'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job_type', models.CharField(choices=[('recalculate_bom_costs', 'Recalcular costos de plantillas BOM'), ('recalculate_budget_costs', 'Recalcular presupuestos de producción')], help_text='Tipo de trabajo', max_length=50)),
+                ('schema_name', models.CharField(help_text='Esquema del tenant en el que se ejecuta el trabajo', max_length=63)),
+                ('status', models.CharField(choices=[('queued', 'En cola'), ('running', 'En ejecución'), ('completed', 'Completado'), ('failed', 'Fallido')], default='queued', help_text='Estado del trabajo', max_length=20)),
+                ('params', models.JSONField(blank=True, default=dict, help_text='Parámetros del trabajo')),
+                ('total_steps', models.PositiveIntegerField(default=0, help_text='Número total de elementos a procesar')),
+                ('completed_steps', models.PositiveIntegerField(default=0, help_text='Número de elementos procesados')),
+                ('rows_touched', models.PositiveIntegerField(default=0, help_text='Filas actualizadas en la base de datos')),
+                ('result', models.JSONField(blank=True, default=dict, help_text='Resumen del resultado')),
+                ('error', models.TextField(blank=True, help_text='Mensaje de error')),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Trabajo en segundo plano',
+                'verbose_name_plural': 'Trabajos en segundo plano',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='backgroundjob',
+            index=models.Index(fields=['status', 'created_at'], name='core_job_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-17 04:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bomitem',
+            name='sub_template',
+            field=models.ForeignKey(blank=True, help_text='Plantilla BOM usada como subensamble', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='parent_items', to='core.bomtemplate'),
+        ),
+        migrations.AlterField(
+            model_name='bomitem',
+            name='input',
+            field=models.ForeignKey(blank=True, help_text='Insumo', null=True, on_delete=django.db.models.deletion.CASCADE, to='core.input'),
+        ),
+        migrations.AlterField(
+            model_name='bomitem',
+            name='input_provider',
+            field=models.ForeignKey(blank=True, help_text='Proveedor seleccionado para este insumo', null=True, on_delete=django.db.models.deletion.CASCADE, to='core.inputprovider'),
+        ),
+        migrations.AddConstraint(
+            model_name='bomitem',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('input__isnull', False), ('input_provider__isnull', False), ('sub_template__isnull', True)), models.Q(('input__isnull', True), ('input_provider__isnull', True), ('sub_template__isnull', False)), _connector='OR'), name='bomitem_input_xor_sub_template'),
+        ),
+        migrations.AddConstraint(
+            model_name='bomitem',
+            constraint=models.UniqueConstraint(condition=models.Q(('sub_template__isnull', False)), fields=('bom_template', 'sub_template'), name='bomitem_unique_sub_template'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2 on 2026-10-17 04:37
+
+import core.textile_models
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def seed_price_history(apps, schema_editor):
+    """Open one history row per existing InputProvider at its current price"""
+    InputProvider = apps.get_model('core', 'InputProvider')
+    InputProviderPrice = apps.get_model('core', 'InputProviderPrice')
+    InputProviderPrice.objects.bulk_create(
+        InputProviderPrice(
+            input_provider_id=input_provider.pk,
+            price_per_unit_cop=input_provider.price_per_unit_cop,
+            effective_from=input_provider.created_at,
+        )
+        for input_provider in InputProvider.objects.all().iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_bomitem_sub_template'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InputProviderPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('price_per_unit_cop', models.DecimalField(decimal_places=2, help_text='Precio por unidad en COP durante el periodo', max_digits=12)),
+                ('effective_from', models.DateTimeField(help_text='Inicio de vigencia del precio')),
+                ('effective_to', models.DateTimeField(blank=True, help_text='Fin de vigencia del precio (vacío si sigue vigente)', null=True)),
+                ('input_provider', models.ForeignKey(help_text='Insumo-Proveedor', on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='core.inputprovider')),
+            ],
+            options={
+                'verbose_name': 'Historial de Precio',
+                'verbose_name_plural': 'Historial de Precios',
+                'ordering': ['input_provider', '-effective_from'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='inputproviderprice',
+            index=models.Index(fields=['input_provider', 'effective_from'], name='core_price_provider_from_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inputproviderprice',
+            index=django.contrib.postgres.indexes.GistIndex(core.textile_models.TsTzRange('effective_from', 'effective_to'), name='core_price_effective_range_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='inputproviderprice',
+            constraint=models.UniqueConstraint(condition=models.Q(('effective_to__isnull', True)), fields=('input_provider',), name='inputproviderprice_one_open_range'),
+        ),
+        migrations.RunPython(seed_price_history, migrations.RunPython.noop),
+    ]
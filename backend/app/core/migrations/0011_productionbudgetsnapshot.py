@@ -0,0 +1,80 @@
+# Generated by Django 4.2 on 2026-10-17 04:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_inputproviderprice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductionBudgetSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('total_budget_cop', models.DecimalField(decimal_places=2, help_text='Presupuesto total al momento de la aprobación en COP', max_digits=15)),
+                ('production_budget', models.OneToOneField(help_text='Presupuesto de producción', on_delete=django.db.models.deletion.CASCADE, related_name='snapshot', to='core.productionbudget')),
+            ],
+            options={
+                'verbose_name': 'Snapshot de Presupuesto',
+                'verbose_name_plural': 'Snapshots de Presupuestos',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductionBudgetSnapshotItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(help_text='Orden dentro del snapshot')),
+                ('end_product_id', models.BigIntegerField(help_text='ID del producto final al aprobar')),
+                ('product_name', models.CharField(help_text='Nombre del producto final', max_length=200)),
+                ('planned_quantity', models.PositiveIntegerField(help_text='Cantidad planificada')),
+                ('unit_cost_cop', models.DecimalField(decimal_places=2, help_text='Costo unitario en COP', max_digits=12)),
+                ('total_cost_cop', models.DecimalField(decimal_places=2, help_text='Costo total de la línea en COP', max_digits=15)),
+                ('bom_cost_cop', models.DecimalField(decimal_places=2, help_text='Costo BOM en COP', max_digits=12)),
+                ('snapshot', models.ForeignKey(help_text='Snapshot del presupuesto', on_delete=django.db.models.deletion.CASCADE, related_name='items', to='core.productionbudgetsnapshot')),
+            ],
+            options={
+                'verbose_name': 'Item de Snapshot',
+                'verbose_name_plural': 'Items de Snapshot',
+                'ordering': ['snapshot', 'position'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductionBudgetSnapshotLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(help_text='Orden dentro del snapshot')),
+                ('depth', models.PositiveSmallIntegerField(default=0, help_text='Nivel de subensamble (0 = BOM del producto)')),
+                ('is_sub_assembly', models.BooleanField(default=False, help_text='La línea es un subensamble')),
+                ('multiplier', models.DecimalField(decimal_places=6, default=1, help_text='Unidades de la línea por unidad de producto', max_digits=15)),
+                ('input_name', models.CharField(help_text='Nombre del insumo o subensamble', max_length=200)),
+                ('input_type', models.CharField(help_text='Tipo de insumo', max_length=50)),
+                ('unit', models.CharField(help_text='Abreviatura de la unidad', max_length=10)),
+                ('provider_name', models.CharField(blank=True, help_text='Nombre del proveedor', max_length=200)),
+                ('quantity', models.DecimalField(decimal_places=3, help_text='Cantidad en la línea BOM', max_digits=10)),
+                ('unit_price_cop', models.DecimalField(decimal_places=2, help_text='Precio unitario en COP', max_digits=12)),
+                ('line_cost_cop', models.DecimalField(decimal_places=2, help_text='Costo de la línea en COP', max_digits=12)),
+                ('item', models.ForeignKey(help_text='Producto del snapshot', on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='core.productionbudgetsnapshotitem')),
+                ('snapshot', models.ForeignKey(help_text='Snapshot del presupuesto', on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='core.productionbudgetsnapshot')),
+            ],
+            options={
+                'verbose_name': 'Línea de Snapshot',
+                'verbose_name_plural': 'Líneas de Snapshot',
+                'ordering': ['snapshot', 'position'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='productionbudgetsnapshotline',
+            index=models.Index(fields=['snapshot', 'position'], name='core_snapline_snapshot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productionbudgetsnapshotitem',
+            index=models.Index(fields=['snapshot', 'position'], name='core_snapitem_snapshot_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-17 04:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_productionbudgetsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productionbudgetsnapshotline',
+            name='input_id',
+            field=models.BigIntegerField(blank=True, help_text='ID del insumo al aprobar', null=True),
+        ),
+        migrations.AddField(
+            model_name='productionbudgetsnapshotline',
+            name='input_provider_id',
+            field=models.BigIntegerField(blank=True, help_text='ID del insumo-proveedor al aprobar', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 05:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_snapshot_line_input_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='job_type',
+            field=models.CharField(choices=[('recalculate_bom_costs', 'Recalcular costos de plantillas BOM'), ('recalculate_budget_costs', 'Recalcular presupuestos de producción'), ('import_csv', 'Importar archivo CSV')], help_text='Tipo de trabajo', max_length=50),
+        ),
+    ]
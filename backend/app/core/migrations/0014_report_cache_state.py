@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-17 05:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_background_job_import_csv'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportCacheState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schema_name', models.CharField(help_text='Esquema del tenant', max_length=63, unique=True)),
+                ('generation', models.PositiveBigIntegerField(default=0, help_text='Generación de la caché de reportes')),
+                ('hits', models.PositiveBigIntegerField(default=0, help_text='Reportes servidos desde la caché')),
+                ('misses', models.PositiveBigIntegerField(default=0, help_text='Reportes calculados')),
+            ],
+            options={
+                'verbose_name': 'Estado de Caché de Reportes',
+                'verbose_name_plural': 'Estados de Caché de Reportes',
+            },
+        ),
+    ]
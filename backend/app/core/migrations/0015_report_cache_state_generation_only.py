@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-17 05:29
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_report_cache_state'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='reportcachestate',
+            name='hits',
+        ),
+        migrations.RemoveField(
+            model_name='reportcachestate',
+            name='misses',
+        ),
+    ]
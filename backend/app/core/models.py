@@ -20,4 +20,5 @@ class TimeStampedModel(models.Model):
 
 
 # Import textile models so Django can detect them
-from .textile_models import *
\ No newline at end of file
+from .textile_models import *
+from .job_models import *
\ No newline at end of file
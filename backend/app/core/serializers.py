@@ -4,6 +4,9 @@ Django REST Framework Serializers for Textile Production Planning System
 Responsibility: API serialization for all textile models with ID-only relationships.
 """
 
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
 from .textile_models import (
     Unit,
@@ -16,6 +19,7 @@ from .textile_models import (
     ProductionBudget,
     ProductionBudgetItem,
 )
+from .job_models import BackgroundJob
 
 
 class UnitSerializer(serializers.ModelSerializer):
@@ -133,18 +137,69 @@ class BOMItemSerializer(serializers.ModelSerializer):
             'bom_template',  # ID only
             'input',  # ID only
             'input_provider',  # ID only
+            'sub_template',  # ID only
             'quantity',
             'line_cost_cop',
             'created_at',
             'updated_at'
         ]
         read_only_fields = ['id', 'line_cost_cop', 'created_at', 'updated_at']
+        extra_kwargs = {
+            'input': {'required': False},
+            'input_provider': {'required': False},
+            'sub_template': {'required': False},
+        }
+        # Uniqueness depends on the item kind and is checked in validate()
+        validators = []
     
     def validate(self, data):
-        """Validate that input is unique within BOM template"""
+        """Validate that input or sub-assembly is unique within BOM template"""
         bom_template = data.get('bom_template')
         input_obj = data.get('input')
         input_provider = data.get('input_provider')
+        sub_template = data.get('sub_template')
+        
+        if self.instance:
+            bom_template = data.get('bom_template', self.instance.bom_template)
+            input_obj = data.get('input', self.instance.input)
+            input_provider = data.get('input_provider', self.instance.input_provider)
+            sub_template = data.get('sub_template', self.instance.sub_template)
+        
+        # An item is either an input with its provider or a sub-assembly
+        if sub_template is not None:
+            if input_obj is not None or input_provider is not None:
+                raise serializers.ValidationError(
+                    "Un item BOM debe ser un insumo o un subensamble, no ambos."
+                )
+            
+            existing = BOMItem.objects.filter(
+                bom_template=bom_template,
+                sub_template=sub_template
+            )
+            if self.instance:
+                existing = existing.exclude(pk=self.instance.pk)
+            if existing.exists():
+                raise serializers.ValidationError(
+                    "Este subensamble ya existe en la plantilla BOM."
+                )
+            
+            # Reject self references and cycles between templates
+            candidate = BOMItem(
+                pk=self.instance.pk if self.instance else None,
+                bom_template=bom_template,
+                sub_template=sub_template,
+            )
+            try:
+                candidate.validate_sub_template()
+            except DjangoValidationError as e:
+                raise serializers.ValidationError(e.message_dict)
+            
+            return data
+        
+        if input_obj is None or input_provider is None:
+            raise serializers.ValidationError(
+                "Debe especificar un insumo con su proveedor o un subensamble."
+            )
         
         # Check that input is unique in BOM
         existing = BOMItem.objects.filter(
@@ -289,4 +344,161 @@ class BulkCostRecalculationResponseSerializer(serializers.Serializer):
     success = serializers.BooleanField()
     message = serializers.CharField()
     updated_count = serializers.IntegerField()
-    timestamp = serializers.DateTimeField()
\ No newline at end of file
+    timestamp = serializers.DateTimeField()
+
+
+class JobEnqueuedResponseSerializer(serializers.Serializer):
+    """Serializer for API responses of operations queued as background jobs"""
+    success = serializers.BooleanField()
+    message = serializers.CharField()
+    job_id = serializers.IntegerField()
+    status = serializers.CharField()
+    timestamp = serializers.DateTimeField()
+
+
+class BackgroundJobSerializer(serializers.ModelSerializer):
+    """Serializer for BackgroundJob status polling"""
+    percent_complete = serializers.FloatField(read_only=True)
+    elapsed_seconds = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = BackgroundJob
+        fields = [
+            'id',
+            'job_type',
+            'status',
+            'percent_complete',
+            'completed_steps',
+            'total_steps',
+            'rows_touched',
+            'elapsed_seconds',
+            'result',
+            'error',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
+
+class PriceScenarioSerializer(serializers.Serializer):
+    """Serializer for what-if price scenario requests (percent changes)"""
+    input_types = serializers.DictField(
+        child=serializers.DecimalField(max_digits=7, decimal_places=2, min_value=Decimal('-100')),
+        required=False,
+        default=dict
+    )
+    providers = serializers.DictField(
+        child=serializers.DecimalField(max_digits=7, decimal_places=2, min_value=Decimal('-100')),
+        required=False,
+        default=dict
+    )
+    input_providers = serializers.DictField(
+        child=serializers.DecimalField(max_digits=7, decimal_places=2, min_value=Decimal('-100')),
+        required=False,
+        default=dict
+    )
+    as_of = serializers.DateTimeField(
+        input_formats=['iso-8601', '%Y-%m-%d'],
+        required=False,
+        allow_null=True,
+        default=None
+    )
+    
+    def validate_input_types(self, value):
+        valid_types = {choice for choice, _ in Input.INPUT_TYPES}
+        unknown = sorted(set(value) - valid_types)
+        if unknown:
+            raise serializers.ValidationError(
+                f"Tipos de insumo no válidos: {', '.join(unknown)}."
+            )
+        return value
+    
+    def _validate_ids(self, value):
+        try:
+            return {int(key): percent for key, percent in value.items()}
+        except ValueError:
+            raise serializers.ValidationError("Las claves deben ser IDs numéricos.")
+    
+    def validate_providers(self, value):
+        return self._validate_ids(value)
+    
+    def validate_input_providers(self, value):
+        return self._validate_ids(value)
+
+
+class PriceUncertaintySerializer(serializers.Serializer):
+    """Price uncertainty of one input type, in percent of the current price"""
+    distribution = serializers.ChoiceField(choices=['uniform', 'triangular', 'normal'], default='uniform')
+    min_percent = serializers.DecimalField(max_digits=7, decimal_places=2, min_value=Decimal('-100'), default=0)
+    max_percent = serializers.DecimalField(max_digits=7, decimal_places=2, min_value=Decimal('-100'), default=0)
+    mode_percent = serializers.DecimalField(max_digits=7, decimal_places=2, min_value=Decimal('-100'), default=0)
+    std_percent = serializers.DecimalField(max_digits=7, decimal_places=2, min_value=Decimal('0'), default=0)
+    
+    def validate(self, data):
+        if data['min_percent'] > data['max_percent']:
+            raise serializers.ValidationError("min_percent no puede ser mayor que max_percent.")
+        if data['distribution'] == 'triangular' and not (
+            data['min_percent'] <= data['mode_percent'] <= data['max_percent']
+        ):
+            raise serializers.ValidationError("mode_percent debe estar entre min_percent y max_percent.")
+        return data
+
+
+class BudgetRiskRequestSerializer(serializers.Serializer):
+    """Serializer for Monte Carlo cost risk requests"""
+    uncertainty = serializers.DictField(child=PriceUncertaintySerializer())
+    samples = serializers.IntegerField(min_value=100, max_value=100000, default=10000)
+    seed = serializers.IntegerField(min_value=0, required=False, allow_null=True, default=None)
+    as_of = serializers.DateTimeField(
+        input_formats=['iso-8601', '%Y-%m-%d'],
+        required=False,
+        allow_null=True,
+        default=None
+    )
+    
+    def validate_uncertainty(self, value):
+        valid_types = {choice for choice, _ in Input.INPUT_TYPES}
+        unknown = sorted(set(value) - valid_types)
+        if unknown:
+            raise serializers.ValidationError(
+                f"Tipos de insumo no válidos: {', '.join(unknown)}."
+            )
+        return value
+
+
+class SourcingOptimizationSerializer(serializers.Serializer):
+    """Serializer for provider re-sourcing preview and apply requests"""
+    preferred_tolerance_percent = serializers.DecimalField(
+        max_digits=7,
+        decimal_places=2,
+        min_value=Decimal('0'),
+        required=False,
+        allow_null=True,
+        default=None
+    )
+    template_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_null=True,
+        default=None
+    )
+
+
+class AsOfQuerySerializer(serializers.Serializer):
+    """Optional as_of moment (ISO datetime, or a date meaning its start) for historical costing"""
+    as_of = serializers.DateTimeField(
+        input_formats=['iso-8601', '%Y-%m-%d'],
+        required=False,
+        allow_null=True,
+        default=None
+    )
+
+
+class CostPreviewQuerySerializer(AsOfQuerySerializer):
+    """Query parameters of the BOM template cost preview"""
+    template_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_null=True,
+        default=None
+    )
@@ -0,0 +1,73 @@
+# backend/app/core/signals.py
+"""
+Signal handlers for the core app.
+Responsibility: Keep derived textile costs in sync with their source rows.
+"""
+
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from .textile_models import InputProvider, ProductionBudget
+from .utils.costing import (
+    FROZEN_STATUSES,
+    BudgetSnapshotBuilder,
+    PriceChangePropagator,
+    record_price_history,
+)
+
+
+@receiver(pre_save, sender=InputProvider)
+def remember_previous_price(sender, instance, raw=False, **kwargs):
+    """Store the persisted price so post_save can tell whether it changed"""
+    instance._previous_price = None
+    if instance.pk and not raw:
+        instance._previous_price = (
+            InputProvider.objects.filter(pk=instance.pk)
+            .values_list('price_per_unit_cop', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=InputProvider)
+def propagate_price_change(sender, instance, created, raw=False, **kwargs):
+    """Record the new price and recompute dependent BOM, product and budget costs"""
+    if raw:
+        return
+
+    if created:
+        record_price_history([instance.pk])
+        return
+
+    previous_price = getattr(instance, '_previous_price', None)
+    if previous_price is None or previous_price == instance.price_per_unit_cop:
+        return
+
+    record_price_history([instance.pk])
+    PriceChangePropagator().propagate([instance.pk])
+
+
+@receiver(pre_save, sender=ProductionBudget)
+def remember_previous_status(sender, instance, raw=False, **kwargs):
+    """Store the persisted status so post_save can detect approval"""
+    instance._previous_status = None
+    if instance.pk and not raw:
+        instance._previous_status = (
+            ProductionBudget.objects.filter(pk=instance.pk)
+            .values_list('status', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=ProductionBudget)
+def snapshot_on_approval(sender, instance, created, raw=False, **kwargs):
+    """Freeze the costed budget when it is approved; drop it when back to draft"""
+    if raw:
+        return
+
+    previous_status = getattr(instance, '_previous_status', None)
+    was_frozen = previous_status in FROZEN_STATUSES
+    if instance.status in FROZEN_STATUSES and not was_frozen:
+        BudgetSnapshotBuilder().freeze(instance)
+    elif instance.status not in FROZEN_STATUSES and was_frozen:
+        BudgetSnapshotBuilder().discard(instance)
+
@@ -0,0 +1,127 @@
+"""
+Test delta maintenance of BOM template totals
+"""
+
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.textile_models import (
+    BOMItem,
+    BOMTemplate,
+    EndProduct,
+    Input,
+    InputProvider,
+    Provider,
+    Unit,
+)
+from core.utils.costing import BOMTotalReconciler
+from core.views import BOMItemViewSet
+
+
+class BOMItemDeltaTests(TestCase):
+    """Test BOMItemViewSet keeps template totals with delta updates."""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user(
+            email="planner@example.com", password="testpass123"
+        )
+        unit = Unit.objects.create(name_en="Meters", name_es="Metros", abbreviation="m")
+        provider = Provider.objects.create(name="Textiles ABC")
+        self.fabric = Input.objects.create(name="Drill", input_type="fabric", unit=unit)
+        self.fabric_price = InputProvider.objects.create(
+            input=self.fabric, provider=provider, price_per_unit_cop=Decimal("10000.00")
+        )
+        self.template = BOMTemplate.objects.create(name="Camisa")
+
+    def _call(self, actions, method, data=None, pk=None):
+        request = getattr(self.factory, method)("/", data, format="json")
+        force_authenticate(request, user=self.user)
+        view = BOMItemViewSet.as_view(actions)
+        return view(request, pk=pk) if pk else view(request)
+
+    def test_create_update_delete_keep_total(self):
+        """Test each write applies its line cost difference to the BOM total"""
+        response = self._call({"post": "create"}, "post", {
+            "bom_template": self.template.pk,
+            "input": self.fabric.pk,
+            "input_provider": self.fabric_price.pk,
+            "quantity": "1.500",
+        })
+        self.assertEqual(response.status_code, 201)
+        self.template.refresh_from_db()
+        self.assertEqual(self.template.total_cost_cop, Decimal("15000.00"))
+
+        item_id = response.data["id"]
+        response = self._call({"patch": "partial_update"}, "patch", {"quantity": "2.000"}, pk=item_id)
+        self.assertEqual(response.status_code, 200)
+        self.template.refresh_from_db()
+        self.assertEqual(self.template.total_cost_cop, Decimal("20000.00"))
+
+        response = self._call({"delete": "destroy"}, "delete", pk=item_id)
+        self.assertEqual(response.status_code, 204)
+        self.template.refresh_from_db()
+        self.assertEqual(self.template.total_cost_cop, Decimal("0.00"))
+
+
+class BOMTotalReconcilerTests(TestCase):
+    """Test drift detection and repair."""
+
+    def setUp(self):
+        unit = Unit.objects.create(name_en="Meters", name_es="Metros", abbreviation="m")
+        provider = Provider.objects.create(name="Textiles ABC")
+        fabric = Input.objects.create(name="Drill", input_type="fabric", unit=unit)
+        price = InputProvider.objects.create(
+            input=fabric, provider=provider, price_per_unit_cop=Decimal("10000.00")
+        )
+        self.drifted = BOMTemplate.objects.create(name="Camisa", total_cost_cop=Decimal("1.00"))
+        self.in_sync = BOMTemplate.objects.create(name="Vacía")
+        BOMItem.objects.create(
+            bom_template=self.drifted, input=fabric, input_provider=price,
+            quantity=Decimal("1.000"), line_cost_cop=Decimal("10000.00"),
+        )
+
+    def test_find_drift(self):
+        """Test only templates out of sync are reported"""
+        drifted = BOMTotalReconciler().find_drift()
+
+        self.assertEqual([change.id for change in drifted], [self.drifted.pk])
+        self.assertEqual(drifted[0].new_cost, Decimal("10000.00"))
+
+    def test_reconcile_command_fixes_drift(self):
+        """Test the command resets drifted totals"""
+        out = StringIO()
+
+        call_command("reconcile_bom_totals", stdout=out)
+
+        self.drifted.refresh_from_db()
+        self.assertEqual(self.drifted.total_cost_cop, Decimal("10000.00"))
+        self.assertIn("Successfully reconciled 1 BOM templates", out.getvalue())
+        self.assertEqual(BOMTotalReconciler().find_drift(), [])
+
+    def test_reconcile_propagates_to_dependents(self):
+        """Test repaired totals reach parent sub-assembly lines and end products"""
+        parent = BOMTemplate.objects.create(name="Conjunto")
+        line = BOMItem.objects.create(bom_template=parent, sub_template=self.drifted, quantity=Decimal("2.000"))
+        product = EndProduct.objects.create(name="Conjunto", bom_template=parent)
+        # The state a write path bypassing the deltas leaves behind
+        BOMItem.objects.filter(pk=line.pk).update(line_cost_cop=Decimal("2.00"))
+        BOMTemplate.objects.filter(pk=parent.pk).update(total_cost_cop=Decimal("2.00"))
+        EndProduct.objects.filter(pk=product.pk).update(total_cost_cop=Decimal("2.00"))
+
+        reconciler = BOMTotalReconciler()
+        drifted = reconciler.reconcile()
+
+        self.assertEqual([change.id for change in drifted], [self.drifted.pk])
+        line.refresh_from_db()
+        parent.refresh_from_db()
+        product.refresh_from_db()
+        self.assertEqual(line.line_cost_cop, Decimal("20000.00"))
+        self.assertEqual(parent.total_cost_cop, Decimal("20000.00"))
+        self.assertEqual(product.total_cost_cop, Decimal("20000.00"))
+        self.assertEqual(reconciler.propagation.end_products, 1)
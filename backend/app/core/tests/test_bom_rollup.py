@@ -0,0 +1,124 @@
+"""
+Test multi-level BOM cost roll-up
+"""
+
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from core.textile_models import (
+    BOMItem,
+    BOMTemplate,
+    Input,
+    InputProvider,
+    Provider,
+    Unit,
+)
+from core.utils.costing import BOMCostEngine, PriceChangePropagator
+
+
+class BOMRollupTests(TestCase):
+    """Test sub-assemblies are costed before the templates that use them."""
+
+    def setUp(self):
+        unit = Unit.objects.create(name_en="Meters", name_es="Metros", abbreviation="m")
+        provider = Provider.objects.create(name="Textiles ABC")
+        fabric = Input.objects.create(name="Drill", input_type="fabric", unit=unit)
+        self.fabric_price = InputProvider.objects.create(
+            input=fabric, provider=provider, price_per_unit_cop=Decimal("10000.00")
+        )
+        self.pocket = BOMTemplate.objects.create(name="Bolsillo")
+        self.shirt = BOMTemplate.objects.create(name="Camisa")
+        self.set = BOMTemplate.objects.create(name="Conjunto")
+        BOMItem.objects.create(
+            bom_template=self.pocket,
+            input=fabric,
+            input_provider=self.fabric_price,
+            quantity=Decimal("0.100"),
+        )
+        BOMItem.objects.create(
+            bom_template=self.shirt,
+            input=fabric,
+            input_provider=self.fabric_price,
+            quantity=Decimal("1.500"),
+        )
+        self.pocket_item = BOMItem.objects.create(
+            bom_template=self.shirt,
+            sub_template=self.pocket,
+            quantity=Decimal("2.000"),
+        )
+        BOMItem.objects.create(
+            bom_template=self.set,
+            sub_template=self.shirt,
+            quantity=Decimal("2.000"),
+        )
+
+    def test_recalculate_rolls_up_sub_assemblies(self):
+        """Test totals are computed children first through every level"""
+        BOMCostEngine().recalculate()
+
+        self.pocket.refresh_from_db()
+        self.shirt.refresh_from_db()
+        self.set.refresh_from_db()
+        self.pocket_item.refresh_from_db()
+        self.assertEqual(self.pocket.total_cost_cop, Decimal("1000.00"))
+        self.assertEqual(self.pocket_item.line_cost_cop, Decimal("2000.00"))
+        self.assertEqual(self.shirt.total_cost_cop, Decimal("17000.00"))
+        self.assertEqual(self.set.total_cost_cop, Decimal("34000.00"))
+
+    def test_recalculate_subset_includes_parents(self):
+        """Test recalculating a sub-assembly also updates the templates using it"""
+        changes = BOMCostEngine().recalculate(template_ids=[self.pocket.pk])
+
+        self.assertEqual({change.name for change in changes}, {"Bolsillo", "Camisa", "Conjunto"})
+
+    def test_preview_costs_sub_assemblies_from_prices(self):
+        """Test preview rolls up current prices without writing"""
+        changes = BOMCostEngine().preview(template_ids=[self.set.pk])
+
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0].new_cost, Decimal("34000.00"))
+        self.set.refresh_from_db()
+        self.assertEqual(self.set.total_cost_cop, Decimal("0.00"))
+
+    def test_recalculate_matches_preview(self):
+        """Test recalculating a template refreshes its sub-assemblies like the dry run"""
+        engine = BOMCostEngine()
+        engine.recalculate()
+        # A price change that nothing propagated yet
+        InputProvider.objects.filter(pk=self.fabric_price.pk).update(price_per_unit_cop=Decimal("12000.00"))
+
+        preview = engine.preview(template_ids=[self.shirt.pk])[0]
+        changes = engine.recalculate(template_ids=[self.shirt.pk])
+
+        change = next(change for change in changes if change.id == self.shirt.pk)
+        self.assertEqual(change.new_cost, preview.new_cost)
+        self.assertEqual(change.new_cost, Decimal("20400.00"))
+        self.assertEqual({change.name for change in changes}, {"Bolsillo", "Camisa", "Conjunto"})
+
+    def test_price_change_reaches_parent_templates(self):
+        """Test a provider price change propagates through sub-assemblies"""
+        BOMCostEngine().recalculate()
+        self.fabric_price.price_per_unit_cop = Decimal("20000.00")
+        self.fabric_price.save()
+
+        PriceChangePropagator().propagate([self.fabric_price.pk])
+
+        self.set.refresh_from_db()
+        self.assertEqual(self.set.total_cost_cop, Decimal("68000.00"))
+
+    def test_cycle_is_rejected(self):
+        """Test a sub-assembly that would close a cycle cannot be saved"""
+        with self.assertRaises(ValidationError):
+            BOMItem.objects.create(
+                bom_template=self.pocket,
+                sub_template=self.set,
+                quantity=Decimal("1.000"),
+            )
+        with self.assertRaises(ValidationError):
+            BOMItem.objects.create(
+                bom_template=self.pocket,
+                sub_template=self.pocket,
+                quantity=Decimal("1.000"),
+            )
@@ -0,0 +1,129 @@
+"""
+Test Monte Carlo cost risk analysis of production budgets
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.textile_models import (
+    BOMItem,
+    BOMTemplate,
+    EndProduct,
+    Input,
+    InputProvider,
+    ProductionBudget,
+    ProductionBudgetItem,
+    Provider,
+    Unit,
+)
+from core.utils.costing import BudgetRiskAnalyzer, PriceUncertainty
+from core.views import ProductionBudgetViewSet
+
+
+class BudgetRiskAnalyzerTests(TestCase):
+    """Test percentiles and variance contributors of a budget total."""
+
+    def setUp(self):
+        unit = Unit.objects.create(name_en="Meters", name_es="Metros", abbreviation="m")
+        provider = Provider.objects.create(name="Textiles ABC")
+        fabric = Input.objects.create(name="Drill", input_type="fabric", unit=unit)
+        thread = Input.objects.create(name="Hilo", input_type="supply", unit=unit)
+        fabric_price = InputProvider.objects.create(
+            input=fabric, provider=provider, price_per_unit_cop=Decimal("10000.00")
+        )
+        thread_price = InputProvider.objects.create(
+            input=thread, provider=provider, price_per_unit_cop=Decimal("100.00")
+        )
+        self.budget = ProductionBudget.objects.create(name="Temporada", status="approved")
+
+        templates = BOMTemplate.objects.bulk_create(
+            BOMTemplate(name=f"Plantilla {index:03d}") for index in range(300)
+        )
+        BOMItem.objects.bulk_create(
+            BOMItem(bom_template=template, input=fabric, input_provider=fabric_price, quantity=Decimal("1.000"))
+            for template in templates
+        )
+        BOMItem.objects.bulk_create(
+            BOMItem(bom_template=template, input=thread, input_provider=thread_price, quantity=Decimal("2.000"))
+            for template in templates
+        )
+        products = EndProduct.objects.bulk_create(
+            EndProduct(name=f"Producto {index:03d}", bom_template=template)
+            for index, template in enumerate(templates)
+        )
+        ProductionBudgetItem.objects.bulk_create(
+            ProductionBudgetItem(production_budget=self.budget, end_product=product, planned_quantity=10)
+            for product in products
+        )
+
+    def test_percentiles_and_contributors(self):
+        """Test percentiles are ordered and the uncertain input drives the variance"""
+        result = BudgetRiskAnalyzer().analyze(
+            self.budget.pk,
+            {"fabric": PriceUncertainty(distribution="uniform", min_percent=Decimal("0"), max_percent=Decimal("20"))},
+            samples=5000,
+            seed=7,
+        )
+
+        self.assertEqual(result.current_cost, Decimal("30600000.00"))
+        self.assertGreater(result.percentiles["p50"], result.current_cost)
+        self.assertLessEqual(result.percentiles["p50"], result.percentiles["p90"])
+        self.assertLessEqual(result.percentiles["p90"], result.percentiles["p99"])
+        self.assertLessEqual(result.percentiles["p99"], Decimal("36600000.00"))
+        self.assertEqual(len(result.contributors), 1)
+        self.assertEqual(result.contributors[0].input_name, "Drill")
+        self.assertEqual(result.contributors[0].variance_share, Decimal("100.00"))
+        self.assertLess(result.elapsed_ms, 1000)
+
+    def test_only_the_budget_structure_is_read(self):
+        """Test sub-assemblies count and products outside the budget are ignored"""
+        unit = Unit.objects.get()
+        button = Input.objects.create(name="Botón", input_type="supply", unit=unit)
+        button_price = InputProvider.objects.create(
+            input=button, provider=Provider.objects.get(), price_per_unit_cop=Decimal("50.00")
+        )
+        placket = BOMTemplate.objects.create(name="Tapeta")
+        BOMItem.objects.create(
+            bom_template=placket, input=button, input_provider=button_price, quantity=Decimal("4.000")
+        )
+        BOMItem.objects.create(
+            bom_template=BOMTemplate.objects.get(name="Plantilla 000"), sub_template=placket, quantity=Decimal("2.000")
+        )
+        other_bom = BOMTemplate.objects.create(name="Otra")
+        BOMItem.objects.create(
+            bom_template=other_bom, input=button, input_provider=button_price, quantity=Decimal("9.000")
+        )
+        EndProduct.objects.create(name="Fuera del presupuesto", bom_template=other_bom)
+
+        rows = BudgetRiskAnalyzer().load_quantities(self.budget.pk)
+
+        quantities = {row[3]: row[5] for row in rows}
+        # 300 products x 10 units, and 10 units x 2 plackets x 4 buttons
+        self.assertEqual(quantities, {"Drill": Decimal("3000"), "Hilo": Decimal("6000"), "Botón": Decimal("80")})
+
+    def test_cost_risk_endpoint(self):
+        """Test the endpoint validates the distribution and returns percentiles"""
+        factory = APIRequestFactory()
+        user = get_user_model().objects.create_user(email="planner@example.com", password="testpass123")
+        view = ProductionBudgetViewSet.as_view({"post": "cost_risk_analysis"})
+
+        request = factory.post("/", {
+            "uncertainty": {"supply": {"distribution": "normal", "std_percent": "10"}},
+            "samples": 1000,
+            "seed": 1,
+        }, format="json")
+        force_authenticate(request, user=user)
+        response = view(request, pk=self.budget.pk)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data["percentiles"]), {"p50", "p90", "p99"})
+        self.assertEqual(response.data["top_variance_contributors"][0]["input_name"], "Hilo")
+
+        request = factory.post("/", {
+            "uncertainty": {"fabric": {"min_percent": "10", "max_percent": "5"}},
+        }, format="json")
+        force_authenticate(request, user=user)
+        self.assertEqual(view(request, pk=self.budget.pk).status_code, 400)
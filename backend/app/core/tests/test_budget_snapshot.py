@@ -0,0 +1,99 @@
+"""
+Test immutable production budget snapshots
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.textile_models import (
+    BOMItem,
+    BOMTemplate,
+    EndProduct,
+    Input,
+    InputProvider,
+    ProductionBudget,
+    ProductionBudgetItem,
+    ProductionBudgetSnapshot,
+    Provider,
+    Unit,
+)
+from core.utils.costing import BOMCostEngine, PriceChangePropagator
+from core.views import ProductionBudgetViewSet
+
+
+class BudgetSnapshotTests(TestCase):
+    """Test approval freezes the costed explosion and reports read it."""
+
+    def setUp(self):
+        unit = Unit.objects.create(name_en="Meters", name_es="Metros", abbreviation="m")
+        provider = Provider.objects.create(name="Textiles ABC")
+        fabric = Input.objects.create(name="Drill", input_type="fabric", unit=unit)
+        self.fabric_price = InputProvider.objects.create(
+            input=fabric, provider=provider, price_per_unit_cop=Decimal("10000.00")
+        )
+        pocket = BOMTemplate.objects.create(name="Bolsillo")
+        shirt_bom = BOMTemplate.objects.create(name="Camisa")
+        BOMItem.objects.create(
+            bom_template=pocket, input=fabric, input_provider=self.fabric_price, quantity=Decimal("0.100")
+        )
+        BOMItem.objects.create(
+            bom_template=shirt_bom, input=fabric, input_provider=self.fabric_price, quantity=Decimal("1.500")
+        )
+        BOMItem.objects.create(bom_template=shirt_bom, sub_template=pocket, quantity=Decimal("2.000"))
+        BOMCostEngine().recalculate()
+        shirt_bom.refresh_from_db()
+        product = EndProduct.objects.create(name="Camisa", bom_template=shirt_bom)
+        product.recalculate_cost()
+        self.budget = ProductionBudget.objects.create(name="Temporada")
+        item = ProductionBudgetItem.objects.create(production_budget=self.budget, end_product=product, planned_quantity=10)
+        item.recalculate_cost()
+        self.budget.recalculate_budget()
+
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user(email="planner@example.com", password="testpass123")
+
+    def _report(self, action):
+        request = self.factory.get("/")
+        force_authenticate(request, user=self.user)
+        return ProductionBudgetViewSet.as_view({"get": action})(request, pk=self.budget.pk)
+
+    def test_approval_freezes_snapshot(self):
+        """Test approving writes items and exploded lines; draft discards them"""
+        self.budget.status = "approved"
+        self.budget.save()
+
+        snapshot = self.budget.snapshot
+        self.assertEqual(snapshot.total_budget_cop, Decimal("170000.00"))
+        self.assertEqual(snapshot.items.count(), 1)
+        self.assertEqual(
+            list(snapshot.lines.values_list("input_name", "depth", "multiplier")),
+            [("Drill", 0, Decimal("1")), ("Bolsillo", 0, Decimal("1")), ("Drill", 1, Decimal("2"))],
+        )
+
+        self.budget.status = "draft"
+        self.budget.save()
+        self.assertFalse(ProductionBudgetSnapshot.objects.exists())
+
+    def test_reports_read_snapshot_after_price_change(self):
+        """Test approved reports stay stable while live costs move"""
+        self.budget.status = "approved"
+        self.budget.save()
+        self.fabric_price.price_per_unit_cop = Decimal("20000.00")
+        self.fabric_price.save()
+        PriceChangePropagator().propagate([self.fabric_price.pk])
+
+        breakdown = self._report("cost_breakdown_report").data
+        self.assertEqual(breakdown["budget"]["total_budget_cop"], "170000.00")
+        self.assertIn("snapshot_at", breakdown["budget"])
+
+        providers = self._report("provider_summary_report").data
+        self.assertEqual(providers["providers"][0]["total_cost"], "170000.00")
+
+        detailed = self._report("detailed_line_items_report").data
+        self.assertEqual(
+            [line["input_name"] for line in detailed["products"][0]["bom_items"]], ["Drill", "Bolsillo"]
+        )
+        self.assertEqual(detailed["products"][0]["totals"]["bom_total"], "170000.00")
@@ -0,0 +1,166 @@
+"""
+Test CSV import of the textile catalog
+"""
+
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.textile_models import (
+    BOMItem,
+    BOMTemplate,
+    EndProduct,
+    Input,
+    InputProvider,
+    InputProviderPrice,
+    Provider,
+    Unit,
+)
+from core.utils.csv_operations import (
+    BOMItemCSVImporter,
+    BOMTemplateCSVImporter,
+    EndProductCSVImporter,
+    InputCSVImporter,
+    InputProviderCSVImporter,
+    ProviderCSVImporter,
+)
+from core.utils.csv_operations.exceptions import CSVValidationError
+from core.utils.csv_operations.importers import parse_decimal
+
+
+class CatalogCSVImportTests(TestCase):
+    """Test the catalog importers resolve names and recalculate costs once"""
+
+    def setUp(self):
+        Unit.objects.create(name_en='Meters', name_es='Metros', abbreviation='m')
+        Unit.objects.create(name_en='Units', name_es='Unidades', abbreviation='un')
+
+    def import_catalog(self, bom_items):
+        results = {}
+        for importer, content in [
+            (ProviderCSVImporter(), "nombre\nTextiles Andinos\nBotones SAS\n"),
+            (InputCSVImporter(), "nombre,tipo,unidad\nDril,Telas,M\nBotón,supply,un\n"),
+            (InputProviderCSVImporter(),
+             "insumo,proveedor,precio,preferido\n"
+             "dril,Textiles Andinos,\"12.500,50\",si\n"
+             "Botón,botones sas,300,\n"),
+            (BOMTemplateCSVImporter(), "nombre\nBolsillo\nCamisa\n"),
+            (BOMItemCSVImporter(), bom_items),
+            (EndProductCSVImporter(), "producto,plantilla\nCamisa clásica,Camisa\n"),
+        ]:
+            results[importer.model_class] = importer.import_csv(content)
+        return results
+
+    def test_full_catalog_import_costs_products(self):
+        """Test the chain from providers to end products ends with current costs"""
+        results = self.import_catalog(
+            "plantilla,insumo,proveedor,subensamble,cantidad\n"
+            "Bolsillo,Dril,,,0.2\n"
+            "Camisa,Dril,Textiles Andinos,,1.5\n"
+            "Camisa,Botón,,,8\n"
+            "Camisa,,,Bolsillo,2\n"
+        )
+
+        self.assertTrue(all(result['error_count'] == 0 for result in results.values()), results)
+        pocket = BOMTemplate.objects.get(name='Bolsillo')
+        shirt = BOMTemplate.objects.get(name='Camisa')
+        self.assertEqual(pocket.total_cost_cop, Decimal('2500.10'))
+        # 1.5 m of fabric + 8 buttons + 2 pockets
+        self.assertEqual(shirt.total_cost_cop, Decimal('18750.75') + Decimal('2400.00') + Decimal('5000.20'))
+        product = EndProduct.objects.get(name='Camisa clásica')
+        self.assertEqual(product.total_cost_cop, shirt.total_cost_cop)
+        self.assertEqual(InputProviderPrice.objects.count(), 2)
+        self.assertTrue(InputProvider.objects.get(input__name='Dril').is_preferred)
+
+    def test_bom_item_rows_resolve_names_without_per_row_queries(self):
+        """Test the query count does not grow with the number of BOM lines"""
+        self.import_catalog("plantilla,insumo,cantidad\n")
+        for n in range(30):
+            BOMTemplate.objects.create(name=f'Variante {n}')
+        content = "plantilla,insumo,cantidad\n" + "".join(f"Variante {n},Dril,1\n" for n in range(30))
+
+        with CaptureQueriesContext(connection) as queries:
+            result = BOMItemCSVImporter(batch_size=100).import_csv(content)
+
+        self.assertEqual(result['imported_count'], 30)
+        self.assertLess(len(queries), 30)
+        self.assertEqual(
+            BOMTemplate.objects.get(name='Variante 7').total_cost_cop, Decimal('12500.50')
+        )
+
+    def test_invalid_references_are_reported_per_line(self):
+        """Test unknown, ambiguous and circular references are rejected"""
+        Provider.objects.bulk_create([Provider(name='Tintes'), Provider(name='TINTES')])
+        results = self.import_catalog(
+            "plantilla,insumo,proveedor,subensamble,cantidad\n"
+            "Camisa,,,Bolsillo,1\n"
+            "Bolsillo,,,Camisa,1\n"
+            "Camisa,Hilo,,,1\n"
+            "Camisa,Dril,Tintes,,1\n"
+        )
+
+        errors = results[BOMItem]['errors']
+        self.assertEqual(len(errors), 3)
+        self.assertTrue(errors[0].startswith('Line 3:') and 'circular' in errors[0])
+        self.assertTrue(errors[1].startswith('Line 4:') and "'Hilo' not found" in errors[1])
+        self.assertTrue(errors[2].startswith('Line 5:') and 'ambiguous' in errors[2])
+        self.assertEqual(BOMItem.objects.count(), 1)
+        self.assertEqual(Input.objects.count(), 2)
+
+    def test_merge_reprices_and_propagates_once(self):
+        """Test merged price changes record history and reach BOM and product costs"""
+        self.import_catalog("plantilla,insumo,cantidad\nCamisa,Dril,2\n")
+
+        result = InputProviderCSVImporter().import_csv(
+            "insumo,proveedor,precio\nDril,Textiles Andinos,13000\nBotón,Botones SAS,300\n", merge=True
+        )
+
+        self.assertEqual((result['updated_count'], result['unchanged_count']), (1, 1))
+        self.assertEqual(BOMTemplate.objects.get(name='Camisa').total_cost_cop, Decimal('26000.00'))
+        self.assertEqual(EndProduct.objects.get(name='Camisa clásica').total_cost_cop, Decimal('26000.00'))
+        self.assertEqual(InputProviderPrice.objects.filter(input_provider__input__name='Dril').count(), 2)
+
+    def test_merge_keeps_preferred_flag_on_empty_cell(self):
+        """Test a blank preferred cell leaves is_preferred unchanged on merge"""
+        self.import_catalog("plantilla,insumo,cantidad\nCamisa,Dril,2\n")
+
+        result = InputProviderCSVImporter().import_csv(
+            "insumo,proveedor,precio,preferido\nDril,Textiles Andinos,13000,\n", merge=True
+        )
+
+        self.assertEqual(result['updated_count'], 1)
+        dril = InputProvider.objects.get(input__name='Dril')
+        self.assertTrue(dril.is_preferred)
+        self.assertEqual(dril.price_per_unit_cop, Decimal('13000.00'))
+
+    def test_parse_decimal_reads_thousands_separators(self):
+        """Test COP prices with thousands separators are not read as decimals"""
+        for value, expected in [
+            ("13.500", "13500.00"), ("12,000", "12000.00"), ("1.234", "1234.00"),
+            ("1.234.567", "1234567.00"), ("12.500,50", "12500.50"), ("$1,234.50", "1234.50"),
+            ("1234,5", "1234.50"), ("0,5", "0.50"),
+        ]:
+            with self.subTest(value=value):
+                self.assertEqual(
+                    parse_decimal(value, 'price', 2, max_digits=12, decimal_places=2, minimum=Decimal('0.01')),
+                    Decimal(expected),
+                )
+
+    def test_parse_decimal_keeps_quantity_decimals(self):
+        """Test a three-digit group is a decimal part for 3-decimal quantities"""
+        for value, expected in [
+            ("1.250", "1.250"), ("1,250", "1.250"), ("13.500", "13.500"), ("1.234,5", "1234.500"),
+        ]:
+            with self.subTest(value=value):
+                self.assertEqual(
+                    parse_decimal(value, 'quantity', 2, max_digits=10, decimal_places=3, minimum=Decimal('0.001')),
+                    Decimal(expected),
+                )
+
+    def test_parse_decimal_rejects_extra_decimals(self):
+        """Test values are rejected instead of rounded to the field's decimal places"""
+        for value in ["12.3456", "0.125", "1.23.4"]:
+            with self.subTest(value=value), self.assertRaises(CSVValidationError):
+                parse_decimal(value, 'price', 2, max_digits=12, decimal_places=2, minimum=Decimal('0.01'))
@@ -0,0 +1,69 @@
+"""
+Test ETag and If-None-Match handling on textile endpoints
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.textile_models import ProductionBudget, Provider
+from core.views import ProductionBudgetViewSet, ProviderViewSet
+
+
+class ConditionalGetTests(TestCase):
+    """Test unchanged payloads are answered with 304."""
+
+    def setUp(self):
+        cache.clear()
+        self.provider = Provider.objects.create(name="Textiles ABC")
+        Provider.objects.create(name="Textiles XYZ")
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user(email="planner@example.com", password="testpass123")
+
+    def _get(self, view, path="/", etag=None, **kwargs):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        request = self.factory.get(path, **headers)
+        force_authenticate(request, user=self.user)
+        return view(request, **kwargs)
+
+    def test_list_returns_304_until_a_row_changes(self):
+        """Test list ETags follow row writes and query parameters"""
+        provider_list = ProviderViewSet.as_view({"get": "list"})
+        first = self._get(provider_list)
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(2):
+            # Tenant search_path and the aggregate; the page is never serialized
+            cached = self._get(provider_list, etag=first["ETag"])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached["ETag"], first["ETag"])
+
+        self.assertEqual(self._get(provider_list, path="/?page_size=1", etag=first["ETag"]).status_code, 200)
+
+        self.provider.notes = "Nuevo contacto"
+        self.provider.save()
+        changed = self._get(provider_list, etag=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+
+    def test_retrieve_returns_304(self):
+        """Test detail ETags and weak If-None-Match comparison"""
+        provider_detail = ProviderViewSet.as_view({"get": "retrieve"})
+        first = self._get(provider_detail, pk=self.provider.pk)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self._get(provider_detail, etag=f'W/{first["ETag"]}', pk=self.provider.pk).status_code, 304)
+
+    def test_report_returns_304_before_building(self):
+        """Test budget reports reuse the report version as ETag"""
+        budget = ProductionBudget.objects.create(name="Temporada")
+        report = ProductionBudgetViewSet.as_view({"get": "cost_breakdown_report"})
+        first = self._get(report, pk=budget.pk)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self._get(report, etag=first["ETag"], pk=budget.pk).status_code, 304)
+
+        budget.total_budget_cop = Decimal("1.00")
+        budget.save()
+        self.assertEqual(self._get(report, etag=first["ETag"], pk=budget.pk).status_code, 200)
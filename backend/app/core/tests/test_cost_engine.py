@@ -0,0 +1,89 @@
+"""
+Test the set-based BOM costing engine
+"""
+
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.textile_models import (
+    BOMItem,
+    BOMTemplate,
+    Input,
+    InputProvider,
+    Provider,
+    Unit,
+)
+from core.utils.costing import BOMCostEngine
+
+
+class BOMCostEngineTests(TestCase):
+    """Test BOMCostEngine recalculation and preview."""
+
+    def setUp(self):
+        unit = Unit.objects.create(name_en="Meters", name_es="Metros", abbreviation="m")
+        provider = Provider.objects.create(name="Textiles ABC")
+        fabric = Input.objects.create(name="Drill", input_type="fabric", unit=unit)
+        thread = Input.objects.create(name="Hilo", input_type="supply", unit=unit)
+        self.fabric_price = InputProvider.objects.create(
+            input=fabric, provider=provider, price_per_unit_cop=Decimal("10000.00")
+        )
+        self.thread_price = InputProvider.objects.create(
+            input=thread, provider=provider, price_per_unit_cop=Decimal("150.00")
+        )
+        self.shirt = BOMTemplate.objects.create(name="Camisa")
+        self.empty = BOMTemplate.objects.create(name="Vacía", total_cost_cop=Decimal("99.00"))
+        self.fabric_item = BOMItem.objects.create(
+            bom_template=self.shirt,
+            input=fabric,
+            input_provider=self.fabric_price,
+            quantity=Decimal("1.500"),
+        )
+        BOMItem.objects.create(
+            bom_template=self.shirt,
+            input=thread,
+            input_provider=self.thread_price,
+            quantity=Decimal("0.333"),
+        )
+
+    def test_recalculate_all_templates(self):
+        """Test line costs and totals are recomputed for every template"""
+        changes = BOMCostEngine().recalculate()
+
+        self.assertEqual([change.name for change in changes], ["Camisa", "Vacía"])
+        self.shirt.refresh_from_db()
+        self.empty.refresh_from_db()
+        self.fabric_item.refresh_from_db()
+        self.assertEqual(self.fabric_item.line_cost_cop, Decimal("15000.00"))
+        self.assertEqual(self.shirt.total_cost_cop, Decimal("15049.95"))
+        self.assertEqual(self.empty.total_cost_cop, Decimal("0.00"))
+        self.assertEqual(changes[0].old_cost, Decimal("0.00"))
+        self.assertEqual(changes[0].difference, Decimal("15049.95"))
+        self.assertEqual(changes[1].difference, Decimal("-99.00"))
+
+    def test_recalculate_subset_leaves_other_templates(self):
+        """Test only the selected templates are touched"""
+        changes = BOMCostEngine().recalculate(template_ids=[self.shirt.pk])
+
+        self.assertEqual(len(changes), 1)
+        self.empty.refresh_from_db()
+        self.assertEqual(self.empty.total_cost_cop, Decimal("99.00"))
+
+    def test_preview_does_not_write(self):
+        """Test preview reports new totals without saving them"""
+        changes = BOMCostEngine().preview(template_ids=[self.shirt.pk])
+
+        self.assertEqual(changes[0].new_cost, Decimal("15049.95"))
+        self.shirt.refresh_from_db()
+        self.assertEqual(self.shirt.total_cost_cop, Decimal("0.00"))
+
+    def test_recalculate_bom_costs_command(self):
+        """Test the management command reports the per-template difference"""
+        out = StringIO()
+
+        call_command("recalculate_bom_costs", stdout=out)
+
+        self.assertIn('"Camisa": $0.00 → $15,049.95 COP (+15,049.95)', out.getvalue())
+        self.assertIn("Successfully updated 2 BOM templates", out.getvalue())
@@ -0,0 +1,104 @@
+"""
+Test incremental cost propagation on InputProvider price changes
+"""
+
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.textile_models import (
+    BOMItem,
+    BOMTemplate,
+    EndProduct,
+    Input,
+    InputProvider,
+    ProductionBudget,
+    ProductionBudgetItem,
+    Provider,
+    Unit,
+)
+
+
+class PriceChangePropagationTests(TestCase):
+    """Test that a price change reaches every dependent cost."""
+
+    def setUp(self):
+        unit = Unit.objects.create(name_en="Meters", name_es="Metros", abbreviation="m")
+        provider = Provider.objects.create(name="Textiles ABC")
+        fabric = Input.objects.create(name="Drill", input_type="fabric", unit=unit)
+        button = Input.objects.create(name="Botón", input_type="supply", unit=unit)
+        self.fabric_price = InputProvider.objects.create(
+            input=fabric, provider=provider, price_per_unit_cop=Decimal("10000.00")
+        )
+        button_price = InputProvider.objects.create(
+            input=button, provider=provider, price_per_unit_cop=Decimal("200.00")
+        )
+
+        self.shirt_bom = BOMTemplate.objects.create(name="Camisa")
+        self.other_bom = BOMTemplate.objects.create(name="Bolsa")
+        BOMItem.objects.create(
+            bom_template=self.shirt_bom, input=fabric, input_provider=self.fabric_price,
+            quantity=Decimal("2.000"), line_cost_cop=Decimal("20000.00"),
+        )
+        BOMItem.objects.create(
+            bom_template=self.shirt_bom, input=button, input_provider=button_price,
+            quantity=Decimal("5.000"), line_cost_cop=Decimal("1000.00"),
+        )
+        BOMItem.objects.create(
+            bom_template=self.other_bom, input=button, input_provider=button_price,
+            quantity=Decimal("1.000"), line_cost_cop=Decimal("200.00"),
+        )
+        self.shirt_bom.recalculate_cost()
+        self.other_bom.recalculate_cost()
+
+        self.shirt = EndProduct.objects.create(name="Camisa Oxford", bom_template=self.shirt_bom)
+        self.bag = EndProduct.objects.create(name="Bolsa Tela", bom_template=self.other_bom)
+        self.shirt.recalculate_cost()
+        self.bag.recalculate_cost()
+
+        self.budget = ProductionBudget.objects.create(name="Temporada")
+        self.other_budget = ProductionBudget.objects.create(name="Solo bolsas")
+        ProductionBudgetItem.objects.create(
+            production_budget=self.budget, end_product=self.shirt, planned_quantity=10
+        ).recalculate_cost()
+        ProductionBudgetItem.objects.create(
+            production_budget=self.other_budget, end_product=self.bag, planned_quantity=3
+        ).recalculate_cost()
+        self.budget.recalculate_budget()
+        self.other_budget.recalculate_budget()
+
+    def test_price_change_updates_dependent_costs(self):
+        """Test BOM, product, budget item and budget totals follow the new price"""
+        self.fabric_price.price_per_unit_cop = Decimal("12000.00")
+        self.fabric_price.save()
+
+        self.shirt_bom.refresh_from_db()
+        self.shirt.refresh_from_db()
+        self.budget.refresh_from_db()
+        budget_item = self.budget.budget_items.get()
+        self.assertEqual(self.shirt_bom.total_cost_cop, Decimal("25000.00"))
+        self.assertEqual(self.shirt.total_cost_cop, Decimal("25000.00"))
+        self.assertEqual(budget_item.unit_cost_cop, Decimal("25000.00"))
+        self.assertEqual(budget_item.total_cost_cop, Decimal("250000.00"))
+        self.assertEqual(self.budget.total_budget_cop, Decimal("250000.00"))
+
+    def test_price_change_leaves_unrelated_rows(self):
+        """Test rows that do not use the provider are not touched"""
+        other_updated_at = self.other_budget.updated_at
+
+        self.fabric_price.price_per_unit_cop = Decimal("12000.00")
+        self.fabric_price.save()
+
+        self.other_budget.refresh_from_db()
+        self.assertEqual(self.other_budget.updated_at, other_updated_at)
+        self.assertEqual(self.other_budget.total_budget_cop, Decimal("600.00"))
+
+    def test_unchanged_price_does_not_propagate(self):
+        """Test saving other fields leaves the cost chain alone"""
+        updated_at = self.budget.updated_at
+
+        self.fabric_price.notes = "Precio negociado"
+        self.fabric_price.save()
+
+        self.budget.refresh_from_db()
+        self.assertEqual(self.budget.updated_at, updated_at)
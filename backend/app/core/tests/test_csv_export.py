@@ -0,0 +1,82 @@
+"""
+Test streaming CSV export of providers
+"""
+
+import csv
+import io
+import os
+import tempfile
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.test import AsyncRequestFactory, TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.textile_models import Provider
+from core.utils.csv_operations import ProviderCSVExporter
+from core.views import ProviderViewSet
+
+
+class ProviderCSVExportTests(TestCase):
+    """Test the exporter streams chunked rows from values_list."""
+
+    def setUp(self):
+        Provider.objects.bulk_create(
+            Provider(name=f"Proveedor {n:03d}", email=f"p{n}@example.com") for n in range(25)
+        )
+
+    def test_stream_is_chunked(self):
+        """Test rows are yielded in chunks and match the in-memory export"""
+        exporter = ProviderCSVExporter()
+        exporter.rows_per_chunk = 10
+        chunks = list(exporter.stream_csv(name_contains="Proveedor"))
+
+        self.assertEqual(len(chunks), 3)
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+        self.assertEqual(rows[0][:3], ["ID", "Nombre", "Email"])
+        self.assertEqual(len(rows), 26)
+        self.assertEqual(rows[1][1:3], ["Proveedor 000", "p0@example.com"])
+        self.assertEqual(exporter.exported_count, 25)
+        self.assertEqual(ProviderCSVExporter().export_csv(name_contains="Proveedor"), b"".join(chunks).decode("utf-8"))
+
+    def test_view_streams_response(self):
+        """Test ProviderViewSet.export_csv returns a streaming response"""
+        request = APIRequestFactory().get("/")
+        force_authenticate(request, user=get_user_model().objects.create_user(email="a@example.com", password="x"))
+        response = ProviderViewSet.as_view({"get": "export_csv"})(request)
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(b"".join(response.streaming_content).count(b"\n"), 26)
+
+    def test_view_streams_async_under_asgi(self):
+        """Test under ASGI export_csv sends chunks as they are produced"""
+        request = AsyncRequestFactory().get("/")
+        force_authenticate(request, user=get_user_model().objects.create_user(email="a@example.com", password="x"))
+        original_rows_per_chunk = ProviderCSVExporter.rows_per_chunk
+        ProviderCSVExporter.rows_per_chunk = 10
+        try:
+            response = ProviderViewSet.as_view({"get": "export_csv"})(request)
+
+            async def consume():
+                return [chunk async for chunk in response]
+
+            chunks = async_to_sync(consume)()
+        finally:
+            ProviderCSVExporter.rows_per_chunk = original_rows_per_chunk
+
+        self.assertTrue(response.is_async)
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(b"".join(chunks).count(b"\n"), 26)
+
+    def test_command_writes_file_incrementally(self):
+        """Test the export_csv command writes the file and reports the row count"""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "proveedores.csv")
+            stdout = io.StringIO()
+            call_command("export_csv", "providers", output=output, stdout=stdout)
+
+            with open(output, encoding="utf-8") as f:
+                self.assertEqual(len(f.readlines()), 26)
+        self.assertIn("Successfully exported 25 records", stdout.getvalue())
@@ -0,0 +1,214 @@
+"""
+Test bulk persistence of CSV imports
+"""
+
+import csv
+import io
+import os
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.textile_models import Provider
+from core.utils.csv_operations import CSVImportError, ProviderCSVImporter
+from core.utils.private_files import private_storage
+from core.views import ProviderViewSet
+
+
+def provider_csv(rows):
+    return "nombre,email\n" + "".join(f"{name},{email}\n" for name, email in rows)
+
+
+class ProviderCSVImportTests(TestCase):
+    """Test batches are bulk inserted and fall back to row by row on failure."""
+
+    def test_batches_use_one_insert(self):
+        """Test each batch is persisted with a single INSERT"""
+        content = provider_csv((f"Proveedor {n}", f"p{n}@example.com") for n in range(25))
+        with CaptureQueriesContext(connection) as queries:
+            result = ProviderCSVImporter(batch_size=10).import_csv(content, skip_duplicates=False)
+
+        inserts = [query for query in queries.captured_queries if query["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(result["imported_count"], 25)
+        self.assertEqual(Provider.objects.count(), 25)
+
+    def test_failed_batch_reports_offending_line(self):
+        """Test a database error in a batch only rejects that row"""
+        too_long_email = f"{'a' * 64}@{'b' * 63}.{'c' * 63}.{'d' * 63}.com"
+        content = provider_csv([
+            ("Uno", "uno@example.com"),
+            ("Dos", "dos@example.com"),
+            ("Tres", too_long_email),
+            ("Cuatro", "cuatro@example.com"),
+        ])
+        with self.assertLogs("core.utils.csv_operations.base", "WARNING") as logs:
+            result = ProviderCSVImporter(batch_size=10).import_csv(content)
+
+        self.assertIn("lines 2-5 failed", logs.output[0])
+        self.assertEqual(result["imported_count"], 3)
+        self.assertEqual(result["error_count"], 1)
+        self.assertTrue(result["errors"][0].startswith("Line 4:"))
+        self.assertEqual(
+            sorted(Provider.objects.values_list("name", flat=True)), ["Cuatro", "Dos", "Uno"]
+        )
+
+    def test_duplicates_use_preloaded_index(self):
+        """Test existing and in-file duplicates are skipped without per-row queries"""
+        Provider.objects.create(name="Textiles Andinos")
+        content = provider_csv([
+            ("TEXTILES ANDINOS", "a@example.com"),
+            ("Hilos del Sur", "b@example.com"),
+            ("hilos del sur", "c@example.com"),
+        ] + [(f"Proveedor {n}", f"p{n}@example.com") for n in range(20)])
+
+        with CaptureQueriesContext(connection) as queries:
+            result = ProviderCSVImporter(batch_size=100).import_csv(content)
+
+        # The index is read once, through a server-side cursor (DECLARE ... SELECT)
+        reads = [query for query in queries.captured_queries if " FROM " in query["sql"]]
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(result["imported_count"], 21)
+        self.assertEqual(result["skipped_count"], 2)
+        self.assertEqual(Provider.objects.filter(name__iexact="hilos del sur").count(), 1)
+
+    def test_streams_binary_file_in_small_chunks(self):
+        """Test rows are decoded incrementally across chunk boundaries"""
+        content = "\ufeffnombre;notas\r\nTejeduría Ñandú;\"Línea uno\nLínea dos\"\r\n"
+        content += "".join(f"Proveedor {n};ñ\r\n" for n in range(50))
+        importer = ProviderCSVImporter()
+        importer.read_chunk_size = 7
+
+        result = importer.import_csv(io.BytesIO(content.encode("utf-8")))
+
+        self.assertEqual(result["error_count"], 0)
+        self.assertEqual(result["imported_count"], 51)
+        provider = Provider.objects.get(name="Tejeduría Ñandú")
+        self.assertEqual(provider.notes, "Línea uno\nLínea dos")
+
+    def test_parallel_validation_matches_serial(self):
+        """Test the process pool keeps line numbers and order of errors"""
+        rows = [(f"Proveedor {n}", f"p{n}@example.com" if n % 4 else f"p{n}@") for n in range(30)]
+        rows.insert(10, ("Proveedor 1", "repetido@example.com"))
+        content = provider_csv(rows)
+
+        serial = ProviderCSVImporter().import_csv(content, validate_only=True)
+        importer = ProviderCSVImporter(workers=2)
+        importer.parallel_chunk_size = 4
+        parallel = importer.import_csv(content, validate_only=True)
+
+        self.assertEqual(parallel, serial)
+        self.assertEqual(parallel["skipped_count"], 1)
+        self.assertTrue(parallel["errors"][0].startswith("Line 2:"))
+
+    def test_merge_updates_changed_providers_in_bulk(self):
+        """Test merge mode diffs matched providers and writes one bulk UPDATE"""
+        Provider.objects.create(name="Textiles Andinos", email="old@andinos.com", phone_number="111")
+        Provider.objects.create(name="Hilos del Sur", email="ventas@hilos.com")
+        content = (
+            "nombre,email,telefono\n"
+            "textiles andinos,nuevo@andinos.com,\n"
+            "Hilos del Sur,ventas@hilos.com,\n"
+            "Botones SAS,info@botones.com,300\n"
+            "TEXTILES ANDINOS,otro@andinos.com,\n"
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            result = ProviderCSVImporter().import_csv(content, merge=True)
+
+        updates = [query for query in queries.captured_queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            {key: result[key] for key in ("imported_count", "updated_count", "unchanged_count", "skipped_count")},
+            {"imported_count": 1, "updated_count": 1, "unchanged_count": 1, "skipped_count": 1},
+        )
+        andinos = Provider.objects.get(name__iexact="textiles andinos")
+        self.assertEqual(andinos.email, "nuevo@andinos.com")
+        # Empty cells keep the current value
+        self.assertEqual(andinos.phone_number, "111")
+
+    def test_headers_are_resolved_once_up_front(self):
+        """Test unknown columns are reported and ambiguous ones reject the file"""
+        result = ProviderCSVImporter().import_csv(" Nombre ,Correo,Ciudad\nUno,uno@example.com,Bogotá\n")
+
+        self.assertEqual(result["imported_count"], 1)
+        self.assertEqual(result["unknown_columns"], ["Ciudad"])
+        self.assertEqual(Provider.objects.get().email, "uno@example.com")
+
+        with self.assertRaisesMessage(CSVImportError, "'nombre' and 'empresa' both map to name"):
+            ProviderCSVImporter().import_csv("nombre,empresa\nDos,Dos SAS\n")
+        self.assertEqual(Provider.objects.count(), 1)
+
+    def test_errors_are_capped_and_summarized(self):
+        """Test only the first errors are inline and every rejected row is spooled"""
+        too_long_email = f"{'a' * 64}@{'b' * 63}.{'c' * 63}.{'d' * 63}.com"
+        content = "nombre,email,notas\n" + "".join(f",p{n}@example.com,sin nombre\n" for n in range(4))
+        content += f"Largo,{too_long_email}\nValido,valido@example.com\n"
+        importer = ProviderCSVImporter()
+        importer.max_inline_errors = 2
+        result = importer.import_csv(content)
+
+        self.assertEqual(result["imported_count"], 1)
+        self.assertEqual(result["error_count"], 5)
+        self.assertEqual(result["errors"], ["Line 2: Provider name is required", "Line 3: Provider name is required"])
+        self.assertTrue(result["errors_truncated"])
+        self.assertEqual(result["error_summary"], [
+            {"error_type": "validation", "field": "name", "count": 4},
+            {"error_type": "database", "field": None, "count": 1},
+        ])
+
+        output = io.BytesIO()
+        importer.rejects.copy_to(output)
+        importer.rejects.close()
+        rows = list(csv.reader(io.StringIO(output.getvalue().decode("utf-8"))))
+        self.assertEqual(rows[0], ["nombre", "email", "notas", "error"])
+        self.assertEqual(rows[1], ["", "p0@example.com", "sin nombre", "Provider name is required"])
+        self.assertEqual(rows[5][:2], ["Largo", too_long_email])
+        self.assertEqual(len(rows), 6)
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp(), PRIVATE_FILES_ROOT=tempfile.mkdtemp())
+    def test_rejected_rows_file_can_be_downloaded(self):
+        """Test the rejected rows file is private, downloadable and expires"""
+        user = get_user_model().objects.create_user(email="importer@example.com", password="testpass123")
+        content = "nombre,correo\nUno,uno@example.com\n,sin-nombre@example.com\n"
+        request = APIRequestFactory().post("/api/textile/providers/import-csv/", {
+            "file": SimpleUploadedFile("proveedores.csv", content.encode("utf-8"), content_type="text/csv"),
+        }, format="multipart")
+        force_authenticate(request, user=user)
+        response = ProviderViewSet.as_view({"post": "import_csv"})(request)
+
+        self.assertEqual(response.status_code, 200)
+        token = response.data["rejected_rows_file"]
+        self.assertTrue(response.data["rejected_rows_url"].endswith(f"/providers/import-csv/rejected/{token}/"))
+        path = f"csv_imports/public/rejected/{token}.csv"
+        self.assertTrue(private_storage().exists(path))
+        self.assertFalse(default_storage.exists(path))
+
+        download = ProviderViewSet.as_view({"get": "import_csv_rejected"})
+        request = APIRequestFactory().get(f"/api/textile/providers/import-csv/rejected/{token}/")
+        force_authenticate(request, user=user)
+        response = download(request, token=token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            b"".join(response.streaming_content).decode("utf-8").splitlines(),
+            ["nombre,correo,error", ",sin-nombre@example.com,Provider name is required"],
+        )
+        response.file_to_stream.close()
+
+        request = APIRequestFactory().get("/api/textile/providers/import-csv/rejected/../")
+        force_authenticate(request, user=user)
+        self.assertEqual(download(request, token="..").status_code, 404)
+
+        expired = time.time() - 25 * 3600
+        os.utime(private_storage().path(path), (expired, expired))
+        request = APIRequestFactory().get(f"/api/textile/providers/import-csv/rejected/{token}/")
+        force_authenticate(request, user=user)
+        self.assertEqual(download(request, token=token).status_code, 404)
+        self.assertFalse(private_storage().exists(path))
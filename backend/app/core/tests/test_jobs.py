@@ -0,0 +1,159 @@
+"""
+Test the background job queue and run_jobs worker
+"""
+
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.job_models import BackgroundJob
+from core.textile_models import (
+    BOMItem,
+    BOMTemplate,
+    Input,
+    InputProvider,
+    Provider,
+    Unit,
+)
+from core.utils.jobs import claim_next_job, enqueue_job, run_job
+from core.utils.private_files import private_storage
+from core.views import ProviderViewSet
+
+
+class BackgroundJobTests(TestCase):
+    """Test enqueueing, claiming and running jobs."""
+
+    def setUp(self):
+        unit = Unit.objects.create(name_en="Meters", name_es="Metros", abbreviation="m")
+        provider = Provider.objects.create(name="Textiles ABC")
+        fabric = Input.objects.create(name="Drill", input_type="fabric", unit=unit)
+        price = InputProvider.objects.create(
+            input=fabric, provider=provider, price_per_unit_cop=Decimal("10000.00")
+        )
+        self.template = BOMTemplate.objects.create(name="Camisa")
+        BOMItem.objects.create(
+            bom_template=self.template, input=fabric, input_provider=price, quantity=Decimal("2.000")
+        )
+
+    def test_enqueue_uses_current_schema(self):
+        """Test jobs are queued for the schema of the current connection"""
+        job = enqueue_job("recalculate_bom_costs")
+
+        self.assertEqual(job.status, "queued")
+        self.assertEqual(job.schema_name, "public")
+
+    def test_enqueue_unknown_job_type(self):
+        """Test an unknown job type is rejected"""
+        with self.assertRaises(ValueError):
+            enqueue_job("does_not_exist")
+
+    def test_run_bom_recalculation_job(self):
+        """Test the worker runs the job and records progress"""
+        enqueue_job("recalculate_bom_costs")
+
+        job = run_job(claim_next_job())
+
+        self.assertEqual(job.status, "completed")
+        self.assertEqual(job.percent_complete, 100.0)
+        self.assertEqual(job.total_steps, 1)
+        self.assertEqual(job.rows_touched, 2)
+        self.assertEqual(job.result["updated_count"], 1)
+        self.template.refresh_from_db()
+        self.assertEqual(self.template.total_cost_cop, Decimal("20000.00"))
+
+    def test_claim_returns_none_when_empty(self):
+        """Test claiming from an empty queue"""
+        self.assertIsNone(claim_next_job())
+
+    def test_failed_job_records_error(self):
+        """Test handler errors mark the job as failed"""
+        enqueue_job("recalculate_bom_costs", {"template_ids": ["not-a-number"]})
+
+        job = run_job(claim_next_job())
+
+        self.assertEqual(job.status, "failed")
+        self.assertTrue(job.error)
+
+    def test_run_jobs_command_once(self):
+        """Test the worker command drains the queue and exits"""
+        enqueue_job("recalculate_budget_costs")
+        out = StringIO()
+
+        call_command("run_jobs", "--once", stdout=out)
+
+        self.assertIn("Processed 1 job(s)", out.getvalue())
+        self.assertFalse(BackgroundJob.objects.filter(status="queued").exists())
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp(), PRIVATE_FILES_ROOT=tempfile.mkdtemp())
+    def test_async_csv_import_reports_row_counters(self):
+        """Test an async upload is queued, imported by the worker and cleaned up"""
+        content = "nombre,correo\nTextiles ABC,abc@example.com\nHilos SA,no-es-correo\n"
+        content += "".join(f"Proveedor {n},p{n}@example.com\n" for n in range(5))
+        request = APIRequestFactory().post("/api/providers/import_csv/", {
+            "file": SimpleUploadedFile("proveedores.csv", content.encode("utf-8"), content_type="text/csv"),
+            "async": "true",
+        }, format="multipart")
+        force_authenticate(request, user=get_user_model().objects.create_user(
+            email="importer@example.com", password="testpass123"
+        ))
+
+        response = ProviderViewSet.as_view({"post": "import_csv"})(request)
+
+        self.assertEqual(response.status_code, 202)
+        job = BackgroundJob.objects.get(pk=response.data["job_id"])
+        self.assertEqual(job.job_type, "import_csv")
+        self.assertTrue(private_storage().exists(job.params["path"]))
+        self.assertFalse(default_storage.exists(job.params["path"]))
+
+        job = run_job(claim_next_job())
+
+        self.assertEqual(job.status, "completed")
+        self.assertEqual(job.total_steps, 7)
+        self.assertEqual(job.percent_complete, 100.0)
+        self.assertEqual(
+            {key: job.result[key] for key in ("processed_count", "imported_count", "skipped_count", "error_count")},
+            {"processed_count": 7, "imported_count": 5, "skipped_count": 1, "error_count": 1},
+        )
+        self.assertFalse(private_storage().exists(job.params["path"]))
+        self.assertEqual(Provider.objects.count(), 6)
+
+    @override_settings(PRIVATE_FILES_ROOT=tempfile.mkdtemp())
+    def test_failed_csv_import_deletes_upload(self):
+        """Test the stored upload is removed when the import job fails"""
+        path = private_storage().save("csv_imports/public/upload.csv", ContentFile(b"nombre\nUno\n"))
+        enqueue_job("import_csv", {"importer": "desconocido", "path": path})
+
+        job = run_job(claim_next_job())
+
+        self.assertEqual(job.status, "failed")
+        self.assertFalse(private_storage().exists(path))
+
+    @override_settings(PRIVATE_FILES_ROOT=tempfile.mkdtemp(), BACKGROUND_JOB_STALE_AFTER=600)
+    def test_claim_fails_stale_running_jobs(self):
+        """Test a running job that stopped reporting progress is failed and cleaned up"""
+        path = private_storage().save("csv_imports/public/upload.csv", ContentFile(b"nombre\nUno\n"))
+        stale = enqueue_job("import_csv", {"importer": "providers", "path": path})
+        active = enqueue_job("recalculate_bom_costs")
+        BackgroundJob.objects.filter(pk__in=[stale.pk, active.pk]).update(status="running")
+        BackgroundJob.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - timedelta(minutes=11))
+        queued = enqueue_job("recalculate_budget_costs")
+
+        self.assertEqual(claim_next_job().pk, queued.pk)
+
+        stale.refresh_from_db()
+        active.refresh_from_db()
+        self.assertEqual(stale.status, "failed")
+        self.assertIsNotNone(stale.finished_at)
+        self.assertIn("dejó de reportar progreso", stale.error)
+        self.assertFalse(private_storage().exists(path))
+        self.assertEqual(active.status, "running")
@@ -0,0 +1,125 @@
+"""
+Test the material requirements explosion and provider summary of production budgets
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.textile_models import (
+    BOMItem,
+    BOMTemplate,
+    EndProduct,
+    Input,
+    InputProvider,
+    ProductionBudget,
+    ProductionBudgetItem,
+    Provider,
+    Unit,
+)
+from core.utils.costing import BOMCostEngine, MaterialRequirementsPlanner, ReportCache
+from core.views import ProductionBudgetViewSet
+
+
+class MaterialRequirementsTests(TestCase):
+    """Test per-input and per-provider totals through sub-assemblies."""
+
+    def setUp(self):
+        cache.clear()
+        meters = Unit.objects.create(name_en="Meters", name_es="Metros", abbreviation="m")
+        units = Unit.objects.create(name_en="Units", name_es="Unidades", abbreviation="un")
+        abc = Provider.objects.create(name="Textiles ABC")
+        xyz = Provider.objects.create(name="Textiles XYZ")
+        fabric = Input.objects.create(name="Drill", input_type="fabric", unit=meters)
+        button = Input.objects.create(name="Botón", input_type="supply", unit=units)
+        fabric_abc = InputProvider.objects.create(input=fabric, provider=abc, price_per_unit_cop=Decimal("10000.00"))
+        fabric_xyz = InputProvider.objects.create(input=fabric, provider=xyz, price_per_unit_cop=Decimal("12000.00"))
+        self.button_price = InputProvider.objects.create(
+            input=button, provider=abc, price_per_unit_cop=Decimal("200.00")
+        )
+
+        pocket = BOMTemplate.objects.create(name="Bolsillo")
+        shirt_bom = BOMTemplate.objects.create(name="Camisa")
+        BOMItem.objects.create(bom_template=pocket, input=fabric, input_provider=fabric_xyz, quantity=Decimal("0.100"))
+        BOMItem.objects.create(bom_template=pocket, input=button, input_provider=self.button_price, quantity=Decimal("1.000"))
+        BOMItem.objects.create(bom_template=shirt_bom, input=fabric, input_provider=fabric_abc, quantity=Decimal("1.500"))
+        BOMItem.objects.create(bom_template=shirt_bom, sub_template=pocket, quantity=Decimal("2.000"))
+        BOMCostEngine().recalculate()
+        shirt_bom.refresh_from_db()
+        product = EndProduct.objects.create(name="Camisa", bom_template=shirt_bom)
+        product.recalculate_cost()
+        self.budget = ProductionBudget.objects.create(name="Temporada")
+        item = ProductionBudgetItem.objects.create(production_budget=self.budget, end_product=product, planned_quantity=10)
+        item.recalculate_cost()
+        self.budget.recalculate_budget()
+        self.budget.refresh_from_db()
+
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user(email="planner@example.com", password="testpass123")
+
+    def _summary(self, result):
+        return [
+            (requirement.input_name, requirement.quantity, requirement.cost,
+             [(provider.provider_name, provider.quantity, provider.cost) for provider in requirement.providers])
+            for requirement in result.inputs
+        ]
+
+    def test_explosion_totals_per_input_and_provider(self):
+        """Test sub-assembly quantities multiply through and split by provider"""
+        result = MaterialRequirementsPlanner().requirements(self.budget)
+
+        self.assertFalse(result.from_snapshot)
+        self.assertEqual(self._summary(result), [
+            ("Botón", Decimal("20.000"), Decimal("4000.00"), [("Textiles ABC", Decimal("20.000"), Decimal("4000.00"))]),
+            ("Drill", Decimal("17.000"), Decimal("174000.00"), [
+                ("Textiles ABC", Decimal("15.000"), Decimal("150000.00")),
+                ("Textiles XYZ", Decimal("2.000"), Decimal("24000.00")),
+            ]),
+        ])
+        self.assertEqual(result.total_cost, self.budget.total_budget_cop)
+
+    def test_cache_follows_budget_version(self):
+        """Test repeated calls hit the cache until the data behind them changes"""
+        planner = MaterialRequirementsPlanner()
+        first = planner.requirements(self.budget)
+        self.assertEqual(planner.requirements(self.budget).version, first.version)
+        self.assertEqual(ReportCache.stats()["hits"], 1)
+
+        self.button_price.price_per_unit_cop = Decimal("300.00")
+        self.button_price.save()
+        changed = planner.requirements(self.budget)
+        self.assertNotEqual(changed.version, first.version)
+        self.assertEqual(changed.inputs[0].cost, Decimal("6000.00"))
+
+    def test_frozen_budget_reads_snapshot(self):
+        """Test approved budgets are exploded from their snapshot"""
+        self.budget.status = "approved"
+        self.budget.save()
+        self.button_price.price_per_unit_cop = Decimal("300.00")
+        self.button_price.save()
+
+        request = self.factory.get("/")
+        force_authenticate(request, user=self.user)
+        response = ProductionBudgetViewSet.as_view({"get": "material_requirements"})(request, pk=self.budget.pk)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["from_snapshot"])
+        self.assertEqual(response.data["total_cost_cop"], "178000.00")
+        self.assertEqual(response.data["inputs"][0]["input_name"], "Botón")
+        self.assertEqual(response.data["inputs"][0]["cost_cop"], "4000.00")
+        self.assertEqual(len(response.data["inputs"][1]["providers"]), 2)
+
+    def test_provider_summary_report_is_exact(self):
+        """Test the provider summary aggregates through sub-assemblies with Decimal totals"""
+        request = self.factory.get("/")
+        force_authenticate(request, user=self.user)
+        response = ProductionBudgetViewSet.as_view({"get": "provider_summary_report"})(request, pk=self.budget.pk)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["providers"], [
+            {"provider_name": "Textiles ABC", "total_cost": "154000.00", "percentage": 86.5, "materials": ["Botón", "Drill"]},
+            {"provider_name": "Textiles XYZ", "total_cost": "24000.00", "percentage": 13.5, "materials": ["Drill"]},
+        ])
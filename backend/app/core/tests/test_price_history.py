@@ -0,0 +1,92 @@
+"""
+Test InputProvider price history and as-of costing
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.textile_models import (
+    BOMItem,
+    BOMTemplate,
+    EndProduct,
+    Input,
+    InputProvider,
+    InputProviderPrice,
+    ProductionBudget,
+    ProductionBudgetItem,
+    Provider,
+    Unit,
+)
+from core.utils.costing import BOMCostEngine
+from core.views import ProductionBudgetViewSet
+
+
+class PriceHistoryTests(TestCase):
+    """Test price changes append ranges and costs can be evaluated historically."""
+
+    def setUp(self):
+        unit = Unit.objects.create(name_en="Meters", name_es="Metros", abbreviation="m")
+        provider = Provider.objects.create(name="Textiles ABC")
+        fabric = Input.objects.create(name="Drill", input_type="fabric", unit=unit)
+        self.fabric_price = InputProvider.objects.create(
+            input=fabric, provider=provider, price_per_unit_cop=Decimal("10000.00")
+        )
+        self.template = BOMTemplate.objects.create(name="Camisa")
+        BOMItem.objects.create(
+            bom_template=self.template, input=fabric, input_provider=self.fabric_price, quantity=Decimal("1.500")
+        )
+        BOMCostEngine().recalculate()
+        self.product = EndProduct.objects.create(name="Camisa", bom_template=self.template)
+        self.budget = ProductionBudget.objects.create(name="Temporada")
+        ProductionBudgetItem.objects.create(production_budget=self.budget, end_product=self.product, planned_quantity=10)
+
+        # Backdate the first range so "last quarter" has a price
+        self.last_quarter = timezone.now() - timedelta(days=90)
+        InputProviderPrice.objects.filter(input_provider=self.fabric_price).update(
+            effective_from=self.last_quarter - timedelta(days=1)
+        )
+        self.fabric_price.price_per_unit_cop = Decimal("12000.00")
+        self.fabric_price.save()
+
+    def test_price_change_appends_range(self):
+        """Test the old range is closed and a new open one starts"""
+        history = list(self.fabric_price.price_history.order_by("effective_from"))
+
+        self.assertEqual([row.price_per_unit_cop for row in history], [Decimal("10000.00"), Decimal("12000.00")])
+        self.assertEqual(history[0].effective_to, history[1].effective_from)
+        self.assertIsNone(history[1].effective_to)
+
+        # Saving without a price change does not add a range
+        self.fabric_price.notes = "Sin cambio"
+        self.fabric_price.save()
+        self.assertEqual(self.fabric_price.price_history.count(), 2)
+
+    def test_preview_as_of(self):
+        """Test template totals use the prices in effect at as_of"""
+        engine = BOMCostEngine()
+
+        self.assertEqual(engine.preview(as_of=self.last_quarter)[0].new_cost, Decimal("15000.00"))
+        self.assertEqual(engine.preview()[0].new_cost, Decimal("18000.00"))
+
+    def test_report_as_of(self):
+        """Test reports accept ?as_of= and recompute costs historically"""
+        factory = APIRequestFactory()
+        user = get_user_model().objects.create_user(email="planner@example.com", password="testpass123")
+        view = ProductionBudgetViewSet.as_view({"get": "cost_breakdown_report"})
+
+        request = factory.get("/", {"as_of": self.last_quarter.isoformat()})
+        force_authenticate(request, user=user)
+        response = view(request, pk=self.budget.pk)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["budget"]["total_budget_cop"], "150000.00")
+        self.assertEqual(response.data["items"][0]["unit_cost_cop"], "15000.00")
+
+        request = factory.get("/", {"as_of": "not-a-date"})
+        force_authenticate(request, user=user)
+        self.assertEqual(view(request, pk=self.budget.pk).status_code, 400)
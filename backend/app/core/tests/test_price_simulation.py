@@ -0,0 +1,124 @@
+"""
+Test what-if price scenario simulation
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.textile_models import (
+    BOMItem,
+    BOMTemplate,
+    EndProduct,
+    Input,
+    InputProvider,
+    ProductionBudget,
+    ProductionBudgetItem,
+    Provider,
+    Unit,
+)
+from core.utils.costing import PriceScenario, PriceScenarioSimulator
+from core.views import PriceScenarioViewSet
+
+
+class PriceScenarioSimulatorTests(TestCase):
+    """Test scenario factors reach products and open budgets without writes."""
+
+    def setUp(self):
+        unit = Unit.objects.create(name_en="Meters", name_es="Metros", abbreviation="m")
+        self.weaver = Provider.objects.create(name="Textiles ABC")
+        sewing = Provider.objects.create(name="Confecciones XYZ")
+        fabric = Input.objects.create(name="Drill", input_type="fabric", unit=unit)
+        assembly = Input.objects.create(name="Costura", input_type="confection", unit=unit)
+        fabric_price = InputProvider.objects.create(
+            input=fabric, provider=self.weaver, price_per_unit_cop=Decimal("10000.00")
+        )
+        self.sewing_price = InputProvider.objects.create(
+            input=assembly, provider=sewing, price_per_unit_cop=Decimal("5000.00")
+        )
+        pocket = BOMTemplate.objects.create(name="Bolsillo")
+        shirt_bom = BOMTemplate.objects.create(name="Camisa")
+        BOMItem.objects.create(
+            bom_template=pocket, input=fabric, input_provider=fabric_price, quantity=Decimal("0.100")
+        )
+        BOMItem.objects.create(
+            bom_template=shirt_bom, input=fabric, input_provider=fabric_price, quantity=Decimal("1.500")
+        )
+        BOMItem.objects.create(
+            bom_template=shirt_bom, input=assembly, input_provider=self.sewing_price, quantity=Decimal("1.000")
+        )
+        BOMItem.objects.create(bom_template=shirt_bom, sub_template=pocket, quantity=Decimal("2.000"))
+        self.shirt = EndProduct.objects.create(name="Camisa", bom_template=shirt_bom)
+        self.budget = ProductionBudget.objects.create(name="Temporada")
+        ProductionBudgetItem.objects.create(
+            production_budget=self.budget, end_product=self.shirt, planned_quantity=10
+        )
+        closed = ProductionBudget.objects.create(name="Cerrado", status="completed")
+        ProductionBudgetItem.objects.create(production_budget=closed, end_product=self.shirt, planned_quantity=5)
+
+    def test_scenario_by_type_and_provider(self):
+        """Test rules by input type and provider compound through sub-assemblies"""
+        result = PriceScenarioSimulator().run(PriceScenario(
+            input_types={"fabric": Decimal("12")},
+            providers={self.sewing_price.provider_id: Decimal("5")},
+        ))
+
+        product = result.end_products[0]
+        self.assertEqual(product.current_cost, Decimal("22000.00"))
+        self.assertEqual(product.simulated_cost, Decimal("24290.00"))
+        self.assertEqual(product.percent_change, Decimal("10.41"))
+        self.assertEqual([budget.name for budget in result.production_budgets], ["Temporada"])
+        self.assertEqual(result.production_budgets[0].difference, Decimal("22900.00"))
+
+    def test_simulation_does_not_write(self):
+        """Test the structure is reusable across scenarios and nothing is saved"""
+        simulator = PriceScenarioSimulator()
+        simulator.load()
+        result = simulator.run(PriceScenario(input_providers={self.sewing_price.pk: Decimal("-10")}))
+
+        self.assertEqual(result.end_products[0].difference, Decimal("-500.00"))
+        self.sewing_price.refresh_from_db()
+        self.shirt.refresh_from_db()
+        self.assertEqual(self.sewing_price.price_per_unit_cop, Decimal("5000.00"))
+        self.assertEqual(self.shirt.total_cost_cop, Decimal("0.00"))
+
+    def test_load_only_reads_reachable_templates(self):
+        """Test a budget load skips products and templates it does not use"""
+        unit = Unit.objects.get()
+        lining = Input.objects.create(name="Forro", input_type="fabric", unit=unit)
+        lining_price = InputProvider.objects.create(
+            input=lining, provider=self.weaver, price_per_unit_cop=Decimal("3000.00")
+        )
+        jacket_bom = BOMTemplate.objects.create(name="Chaqueta")
+        BOMItem.objects.create(
+            bom_template=jacket_bom, input=lining, input_provider=lining_price, quantity=Decimal("2.000")
+        )
+        EndProduct.objects.create(name="Chaqueta", bom_template=jacket_bom)
+
+        structure = PriceScenarioSimulator().load(budget_ids=[self.budget.pk])
+
+        self.assertEqual(structure.product_ids.tolist(), [self.shirt.pk])
+        self.assertNotIn(lining_price.pk, structure.input_provider_ids.tolist())
+        # 1.5 m of fabric plus 2 pockets of 0.1 m, and one seam, per shirt
+        quantities = dict(zip(structure.input_provider_ids.tolist(), structure.budget_quantities(0)))
+        self.assertAlmostEqual(quantities[self.sewing_price.pk], 10.0)
+        self.assertAlmostEqual(sum(quantities.values()), 27.0)
+
+    def test_simulate_endpoint(self):
+        """Test the endpoint validates the scenario and returns deltas"""
+        factory = APIRequestFactory()
+        user = get_user_model().objects.create_user(email="planner@example.com", password="testpass123")
+        view = PriceScenarioViewSet.as_view({"post": "simulate"})
+
+        request = factory.post("/", {"input_types": {"fabric": "12"}}, format="json")
+        force_authenticate(request, user=user)
+        response = view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["end_products"][0]["difference_cop"], "2040.00")
+
+        request = factory.post("/", {"input_types": {"leather": "12"}}, format="json")
+        force_authenticate(request, user=user)
+        self.assertEqual(view(request).status_code, 400)
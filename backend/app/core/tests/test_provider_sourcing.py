@@ -0,0 +1,94 @@
+"""
+Test batch cheapest-provider re-sourcing of BOM items
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.textile_models import (
+    BOMItem,
+    BOMTemplate,
+    EndProduct,
+    Input,
+    InputProvider,
+    ProductionBudget,
+    ProductionBudgetItem,
+    Provider,
+    Unit,
+)
+from core.utils.costing import BOMCostEngine, ProviderSourcingOptimizer
+from core.views import BOMTemplateViewSet
+
+
+class ProviderSourcingOptimizerTests(TestCase):
+    """Test preview savings and bulk re-pointing of BOM items."""
+
+    def setUp(self):
+        unit = Unit.objects.create(name_en="Meters", name_es="Metros", abbreviation="m")
+        fabric = Input.objects.create(name="Drill", input_type="fabric", unit=unit)
+        self.current = InputProvider.objects.create(
+            input=fabric, provider=Provider.objects.create(name="Actual"),
+            price_per_unit_cop=Decimal("10000.00"),
+        )
+        self.preferred = InputProvider.objects.create(
+            input=fabric, provider=Provider.objects.create(name="Preferido"),
+            price_per_unit_cop=Decimal("9500.00"), is_preferred=True,
+        )
+        self.cheapest = InputProvider.objects.create(
+            input=fabric, provider=Provider.objects.create(name="Económico"),
+            price_per_unit_cop=Decimal("9000.00"),
+        )
+        self.pocket = BOMTemplate.objects.create(name="Bolsillo")
+        self.shirt = BOMTemplate.objects.create(name="Camisa")
+        self.item = BOMItem.objects.create(
+            bom_template=self.pocket, input=fabric, input_provider=self.current, quantity=Decimal("1.000")
+        )
+        BOMItem.objects.create(bom_template=self.shirt, sub_template=self.pocket, quantity=Decimal("2.000"))
+        BOMCostEngine().recalculate()
+        self.product = EndProduct.objects.create(name="Camisa", bom_template=self.shirt)
+        self.budget = ProductionBudget.objects.create(name="Temporada")
+        ProductionBudgetItem.objects.create(production_budget=self.budget, end_product=self.product, planned_quantity=10)
+
+    def test_preview_savings_per_template_and_budget(self):
+        """Test savings roll up through sub-assemblies into budgets without writing"""
+        plan = ProviderSourcingOptimizer().preview()
+
+        self.assertEqual(len(plan.lines), 1)
+        self.assertEqual(plan.lines[0].new_input_provider_id, self.cheapest.pk)
+        self.assertEqual(
+            {template.name: template.savings for template in plan.templates},
+            {"Bolsillo": Decimal("1000.00"), "Camisa": Decimal("2000.00")},
+        )
+        self.assertEqual(plan.production_budgets[0].savings, Decimal("20000.00"))
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.input_provider_id, self.current.pk)
+
+    def test_preferred_within_tolerance(self):
+        """Test a preferred provider wins when within the tolerance of the cheapest"""
+        plan = ProviderSourcingOptimizer().preview(preferred_tolerance_percent=Decimal("6"))
+        self.assertEqual(plan.lines[0].new_input_provider_id, self.preferred.pk)
+
+        plan = ProviderSourcingOptimizer().preview(preferred_tolerance_percent=Decimal("5"))
+        self.assertEqual(plan.lines[0].new_input_provider_id, self.cheapest.pk)
+
+    def test_apply_endpoint_repoints_and_recomputes(self):
+        """Test apply moves items in bulk and recomputes dependent costs"""
+        factory = APIRequestFactory()
+        user = get_user_model().objects.create_user(email="planner@example.com", password="testpass123")
+        request = factory.post("/", {}, format="json")
+        force_authenticate(request, user=user)
+
+        response = BOMTemplateViewSet.as_view({"post": "apply_sourcing"})(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["bom_items"], 1)
+        self.item.refresh_from_db()
+        self.shirt.refresh_from_db()
+        self.budget.refresh_from_db()
+        self.assertEqual(self.item.input_provider_id, self.cheapest.pk)
+        self.assertEqual(self.shirt.total_cost_cop, Decimal("18000.00"))
+        self.assertEqual(self.budget.total_budget_cop, Decimal("180000.00"))
+        self.assertEqual(ProviderSourcingOptimizer().preview().lines, [])
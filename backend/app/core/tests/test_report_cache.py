@@ -0,0 +1,131 @@
+"""
+Test the versioned budget report cache
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.textile_models import (
+    BOMItem,
+    BOMTemplate,
+    EndProduct,
+    Input,
+    InputProvider,
+    ProductionBudget,
+    ProductionBudgetItem,
+    Provider,
+    ReportCacheState,
+    Unit,
+)
+from core.utils.costing import BOMCostEngine, ReportCache
+from core.views import ProductionBudgetViewSet, report_cache_stats
+
+
+class ReportCacheTests(TestCase):
+    """Test reports are served from cache until a dependency changes."""
+
+    def setUp(self):
+        cache.clear()
+        unit = Unit.objects.create(name_en="Meters", name_es="Metros", abbreviation="m")
+        provider = Provider.objects.create(name="Textiles ABC")
+        fabric = Input.objects.create(name="Drill", input_type="fabric", unit=unit)
+        self.fabric_price = InputProvider.objects.create(
+            input=fabric, provider=provider, price_per_unit_cop=Decimal("10000.00")
+        )
+        shirt_bom = BOMTemplate.objects.create(name="Camisa")
+        BOMItem.objects.create(
+            bom_template=shirt_bom, input=fabric, input_provider=self.fabric_price, quantity=Decimal("1.500")
+        )
+        BOMCostEngine().recalculate()
+        shirt_bom.refresh_from_db()
+        product = EndProduct.objects.create(name="Camisa", bom_template=shirt_bom)
+        product.recalculate_cost()
+        self.budget = ProductionBudget.objects.create(name="Temporada")
+        self.item = ProductionBudgetItem.objects.create(
+            production_budget=self.budget, end_product=product, planned_quantity=10
+        )
+        self.item.recalculate_cost()
+        self.budget.recalculate_budget()
+
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user(email="planner@example.com", password="testpass123")
+
+    def _get(self, view, **kwargs):
+        request = self.factory.get("/")
+        force_authenticate(request, user=self.user)
+        return view(request, **kwargs)
+
+    def _report(self, action):
+        return self._get(ProductionBudgetViewSet.as_view({"get": action}), pk=self.budget.pk)
+
+    def test_repeated_report_is_a_hit(self):
+        """Test the second GET is served from cache and counted"""
+        first = self._report("cost_breakdown_report").data
+        second = self._report("cost_breakdown_report").data
+        self._report("provider_summary_report")
+
+        self.assertEqual(first, second)
+        self.assertEqual(ReportCache.stats()["hits"], 1)
+        self.assertEqual(ReportCache.stats()["misses"], 2)
+        stats = self._get(report_cache_stats).data
+        self.assertEqual(stats["hit_ratio"], round(1 / 3, 4))
+
+    def test_dependency_write_changes_version(self):
+        """Test a price change and a planned quantity change both invalidate reports"""
+        self._report("cost_breakdown_report")
+
+        self.fabric_price.price_per_unit_cop = Decimal("12000.00")
+        self.fabric_price.save()
+        report = self._report("cost_breakdown_report").data
+        self.assertEqual(report["items"][0]["unit_cost_cop"], "18000.00")
+
+        self.item.planned_quantity = 20
+        self.item.save()
+        report = self._report("cost_breakdown_report").data
+        self.assertEqual(report["items"][0]["planned_quantity"], 20)
+        self.assertEqual(ReportCache.stats()["hits"], 0)
+
+    def test_writes_only_change_dependent_versions(self):
+        """Test a write changes the budget's fingerprint without bumping the tenant generation"""
+        other = ProductionBudget.objects.create(name="Otra temporada")
+        version, other_version = ReportCache().version(self.budget), ReportCache().version(other)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BOMItem.objects.get().save()
+
+        self.assertNotEqual(ReportCache().version(self.budget), version)
+        self.assertEqual(ReportCache().version(other), other_version)
+        self.assertEqual(ReportCache.stats()["generation"], 0)
+
+    def test_reads_do_not_write_the_database(self):
+        """Test building and serving a report only reads its version from Postgres"""
+        with CaptureQueriesContext(connection) as queries:
+            built = ReportCache().get_or_build(self.budget, "summary", dict)
+            cached = ReportCache().get_or_build(self.budget, "summary", dict)
+
+        self.assertEqual((built.hit, cached.hit), (False, True))
+        statements = [query["sql"].split()[0].upper() for query in queries]
+        self.assertFalse({"INSERT", "UPDATE", "DELETE"} & set(statements))
+        self.assertEqual(ReportCache.stats()["hits"], 1)
+
+    def test_generation_is_shared_through_the_database(self):
+        """Test an invalidation made by another process changes the version seen here"""
+        ReportCache.invalidate()
+        version = ReportCache().version(self.budget)
+        self._report("cost_breakdown_report")
+
+        # What another process's invalidation leaves behind, without touching this process's cache
+        ReportCacheState.objects.update(generation=F("generation") + 1)
+
+        self.assertNotEqual(ReportCache().version(self.budget), version)
+        self._report("cost_breakdown_report")
+        self.assertEqual(ReportCache.stats()["hits"], 0)
+        self.assertEqual(ReportCache.stats()["misses"], 2)
+        self.assertEqual(ReportCache.stats()["generation"], 2)
@@ -0,0 +1,128 @@
+"""
+Test streaming CSV export of production budget reports
+"""
+
+import csv
+import gzip
+import io
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.test import AsyncRequestFactory, TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.textile_models import (
+    BOMItem,
+    BOMTemplate,
+    EndProduct,
+    Input,
+    InputProvider,
+    ProductionBudget,
+    ProductionBudgetItem,
+    Provider,
+    Unit,
+)
+from core.utils.costing import BOMCostEngine
+from core.utils.csv_operations import BudgetReportCSVExporter
+from core.views import ProductionBudgetViewSet
+
+
+class ReportExportTests(TestCase):
+    """Test export_report streams real CSV for every report type."""
+
+    def setUp(self):
+        unit = Unit.objects.create(name_en="Meters", name_es="Metros", abbreviation="m")
+        provider = Provider.objects.create(name="Textiles ABC")
+        fabric = Input.objects.create(name="Drill", input_type="fabric", unit=unit)
+        self.fabric_price = InputProvider.objects.create(
+            input=fabric, provider=provider, price_per_unit_cop=Decimal("10000.00")
+        )
+        pocket = BOMTemplate.objects.create(name="Bolsillo")
+        shirt_bom = BOMTemplate.objects.create(name="Camisa")
+        BOMItem.objects.create(
+            bom_template=pocket, input=fabric, input_provider=self.fabric_price, quantity=Decimal("0.100")
+        )
+        BOMItem.objects.create(
+            bom_template=shirt_bom, input=fabric, input_provider=self.fabric_price, quantity=Decimal("1.500")
+        )
+        BOMItem.objects.create(bom_template=shirt_bom, sub_template=pocket, quantity=Decimal("2.000"))
+        BOMCostEngine().recalculate()
+        shirt_bom.refresh_from_db()
+        product = EndProduct.objects.create(name="Camisa", bom_template=shirt_bom)
+        product.recalculate_cost()
+        self.budget = ProductionBudget.objects.create(name="Temporada")
+        item = ProductionBudgetItem.objects.create(production_budget=self.budget, end_product=product, planned_quantity=10)
+        item.recalculate_cost()
+        self.budget.recalculate_budget()
+
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user(email="planner@example.com", password="testpass123")
+
+    def _export(self, **params):
+        request = self.factory.get("/", params)
+        force_authenticate(request, user=self.user)
+        return ProductionBudgetViewSet.as_view({"get": "export_report"})(request, pk=self.budget.pk)
+
+    def _rows(self, response, compressed=False):
+        content = b"".join(response.streaming_content)
+        if compressed:
+            content = gzip.decompress(content)
+        return list(csv.reader(io.StringIO(content.decode("utf-8"))))
+
+    def test_detailed_line_items_csv(self):
+        """Test the detailed export streams one row per BOM line with exact totals"""
+        response = self._export(type="detailed_line_items")
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = self._rows(response)
+        self.assertEqual(rows[0][:3], ["Presupuesto", "Producto", "Componente"])
+        self.assertEqual(rows[1], [
+            "Temporada", "Camisa", "Drill", "Textiles ABC", "1.500", "m", "10000.00", "15000.00", "10", "150000.00",
+        ])
+        self.assertEqual(rows[2][2:4], ["Bolsillo", ""])
+        self.assertEqual(rows[2][-1], "20000.00")
+
+    def test_gzip_and_frozen_budget(self):
+        """Test gzip output and that approved budgets export their snapshot"""
+        self.budget.status = "approved"
+        self.budget.save()
+        self.fabric_price.price_per_unit_cop = Decimal("20000.00")
+        self.fabric_price.save()
+
+        response = self._export(type="provider_summary", compression="gzip")
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn(".csv.gz", response["Content-Disposition"])
+        self.assertEqual(self._rows(response, compressed=True)[1], [
+            "Temporada", "Textiles ABC", "170000.00", "100.0", "Drill",
+        ])
+
+        rows = self._rows(self._export(type="cost_breakdown"))
+        self.assertEqual(rows[1], ["Temporada", "Camisa", "10", "17000.00", "17000.00", "170000.00"])
+
+    def test_invalid_report_type(self):
+        """Test unknown report types are rejected before streaming"""
+        self.assertEqual(self._export(type="desglose_costos").status_code, 400)
+
+    def test_asgi_export_streams_chunk_by_chunk(self):
+        """Test under ASGI the response is an async iterator fetching one chunk at a time"""
+        expected = self._rows(self._export(type="detailed_line_items"))
+        request = AsyncRequestFactory().get("/", {"type": "detailed_line_items"})
+        force_authenticate(request, user=self.user)
+        original_chunk_rows = BudgetReportCSVExporter.CHUNK_ROWS
+        BudgetReportCSVExporter.CHUNK_ROWS = 1
+        try:
+            response = ProductionBudgetViewSet.as_view({"get": "export_report"})(request, pk=self.budget.pk)
+
+            async def consume():
+                return [chunk async for chunk in response]
+
+            chunks = async_to_sync(consume)()
+        finally:
+            BudgetReportCSVExporter.CHUNK_ROWS = original_chunk_rows
+
+        self.assertTrue(response.is_async)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8")))), expected)
@@ -10,12 +10,15 @@ from .textile_models import (
     Provider,
     Input,
     InputProvider,
+    InputProviderPrice,
     BOMTemplate,
     BOMItem,
     EndProduct,
     ProductionBudget,
     ProductionBudgetItem,
 )
+from .utils.costing import FROZEN_STATUSES, BudgetSnapshotBuilder
+from .utils.jobs import enqueue_job
 
 
 @admin.register(Unit)
@@ -61,6 +64,18 @@ class InputAdmin(admin.ModelAdmin):
     )
 
 
+class InputProviderPriceInline(admin.TabularInline):
+    """Read-only price history; rows are appended by the price change signal"""
+    model = InputProviderPrice
+    extra = 0
+    fields = ['price_per_unit_cop', 'effective_from', 'effective_to']
+    readonly_fields = fields
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(InputProvider)
 class InputProviderAdmin(admin.ModelAdmin):
     list_display = ['input', 'provider', 'price_per_unit_cop', 'is_preferred', 'created_at']
@@ -76,6 +91,7 @@ class InputProviderAdmin(admin.ModelAdmin):
             'fields': ('price_per_unit_cop', 'is_preferred')
         }),
     )
+    inlines = [InputProviderPriceInline]
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('input', 'provider', 'input__unit')
@@ -83,12 +99,15 @@ class InputProviderAdmin(admin.ModelAdmin):
 
 class BOMItemInline(admin.TabularInline):
     model = BOMItem
+    fk_name = 'bom_template'
     extra = 1
-    fields = ['input', 'input_provider', 'quantity', 'line_cost_cop']
+    fields = ['input', 'input_provider', 'sub_template', 'quantity', 'line_cost_cop']
     readonly_fields = ['line_cost_cop']
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('input', 'input_provider', 'input_provider__provider')
+        return super().get_queryset(request).select_related(
+            'input', 'input_provider', 'input_provider__provider', 'sub_template'
+        )
 
 
 @admin.register(BOMTemplate)
@@ -118,23 +137,20 @@ class BOMTemplateAdmin(admin.ModelAdmin):
     
     def recalculate_costs(self, request, queryset):
         """Admin action to recalculate BOM costs"""
-        updated = 0
-        for bom in queryset:
-            # Recalculate BOM item costs first
-            for item in bom.bom_items.all():
-                item.recalculate_cost()
-            # Then recalculate BOM total
-            bom.recalculate_cost()
-            updated += 1
+        template_ids = list(queryset.values_list('pk', flat=True))
+        job = enqueue_job('recalculate_bom_costs', {'template_ids': template_ids})
         
-        self.message_user(request, f'{updated} plantillas BOM actualizadas.')
+        self.message_user(
+            request,
+            f'Recálculo de {len(template_ids)} plantillas BOM en cola (trabajo #{job.pk}).'
+        )
     
     recalculate_costs.short_description = 'Recalcular costos de plantillas seleccionadas'
 
 
 @admin.register(BOMItem)
 class BOMItemAdmin(admin.ModelAdmin):
-    list_display = ['bom_template', 'input', 'input_provider', 'quantity', 'line_cost_cop', 'created_at']
+    list_display = ['bom_template', 'input', 'input_provider', 'sub_template', 'quantity', 'line_cost_cop', 'created_at']
     list_filter = ['bom_template', 'input__input_type', 'created_at']
     search_fields = ['bom_template__name', 'input__name', 'input_provider__provider__name']
     ordering = ['bom_template__name', 'input__name']
@@ -147,6 +163,9 @@ class BOMItemAdmin(admin.ModelAdmin):
         ('Insumo y Proveedor', {
             'fields': ('input', 'input_provider')
         }),
+        ('Subensamble', {
+            'fields': ('sub_template',)
+        }),
         ('Cantidad y Costo', {
             'fields': ('quantity', 'line_cost_cop')
         }),
@@ -154,7 +173,7 @@ class BOMItemAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related(
-            'bom_template', 'input', 'input_provider', 'input_provider__provider'
+            'bom_template', 'input', 'input_provider', 'input_provider__provider', 'sub_template'
         )
 
 
@@ -239,27 +258,36 @@ class ProductionBudgetAdmin(admin.ModelAdmin):
     
     def recalculate_budgets(self, request, queryset):
         """Admin action to recalculate budget totals"""
-        updated = 0
-        for budget in queryset:
-            # Recalculate budget item costs first
-            for item in budget.budget_items.all():
-                item.recalculate_cost()
-            # Then recalculate budget total
-            budget.recalculate_budget()
-            updated += 1
+        budget_ids = list(queryset.values_list('pk', flat=True))
+        job = enqueue_job('recalculate_budget_costs', {'budget_ids': budget_ids})
+        
+        self.message_user(
+            request,
+            f'Recálculo de {len(budget_ids)} presupuestos en cola (trabajo #{job.pk}).'
+        )
+    
+    def _update_status(self, queryset, new_status):
+        """Bulk status change that still freezes budgets leaving draft"""
+        newly_frozen = list(queryset.exclude(status__in=FROZEN_STATUSES))
+        updated = queryset.update(status=new_status)
         
-        self.message_user(request, f'{updated} presupuestos actualizados.')
+        # queryset.update() skips the post_save snapshot signal
+        builder = BudgetSnapshotBuilder()
+        for budget in newly_frozen:
+            budget.status = new_status
+            builder.freeze(budget)
+        return updated
     
     def mark_as_approved(self, request, queryset):
-        updated = queryset.update(status='approved')
+        updated = self._update_status(queryset, 'approved')
         self.message_user(request, f'{updated} presupuestos marcados como aprobados.')
     
     def mark_as_in_progress(self, request, queryset):
-        updated = queryset.update(status='in_progress')
+        updated = self._update_status(queryset, 'in_progress')
         self.message_user(request, f'{updated} presupuestos marcados como en progreso.')
     
     def mark_as_completed(self, request, queryset):
-        updated = queryset.update(status='completed')
+        updated = self._update_status(queryset, 'completed')
         self.message_user(request, f'{updated} presupuestos marcados como completados.')
     
     recalculate_budgets.short_description = 'Recalcular presupuestos seleccionados'
@@ -5,9 +5,12 @@ Responsibility: Core models for textile production management including
 units, providers, inputs, BOMs, products, and production budgets.
 """
 
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.contrib.postgres.indexes import GistIndex
 from django.db import models
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 from .models import TimeStampedModel
 
 
@@ -117,6 +120,53 @@ class InputProvider(TimeStampedModel):
         return f"{self.input.name} - {self.provider.name}: ${self.price_per_unit_cop:,.2f}"
 
 
+class TsTzRange(models.Func):
+    """tstzrange(lower, upper) with a half-open [lower, upper) range"""
+    function = 'TSTZRANGE'
+    output_field = DateTimeRangeField()
+
+
+class InputProviderPrice(TimeStampedModel):
+    """Append-only history of InputProvider prices with effective ranges"""
+    input_provider = models.ForeignKey(
+        InputProvider,
+        on_delete=models.CASCADE,
+        related_name='price_history',
+        help_text="Insumo-Proveedor"
+    )
+    price_per_unit_cop = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        help_text="Precio por unidad en COP durante el periodo"
+    )
+    effective_from = models.DateTimeField(help_text="Inicio de vigencia del precio")
+    effective_to = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Fin de vigencia del precio (vacío si sigue vigente)"
+    )
+    
+    class Meta:
+        verbose_name = "Historial de Precio"
+        verbose_name_plural = "Historial de Precios"
+        ordering = ['input_provider', '-effective_from']
+        indexes = [
+            models.Index(fields=['input_provider', 'effective_from'], name='core_price_provider_from_idx'),
+            # Range index for "price in effect at" lookups
+            GistIndex(TsTzRange('effective_from', 'effective_to'), name='core_price_effective_range_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['input_provider'],
+                condition=models.Q(effective_to__isnull=True),
+                name='inputproviderprice_one_open_range',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.input_provider_id}: ${self.price_per_unit_cop:,.2f} desde {self.effective_from:%Y-%m-%d}"
+
+
 class BOMTemplate(TimeStampedModel):
     """Reusable Bill of Materials templates"""
     name = models.CharField(max_length=200, help_text="Nombre de la plantilla BOM")
@@ -151,7 +201,11 @@ class BOMTemplate(TimeStampedModel):
 
 
 class BOMItem(TimeStampedModel):
-    """Individual items within a BOM template"""
+    """
+    Individual items within a BOM template.
+    An item is either a raw input bought from a provider, or a sub-assembly
+    that reuses another BOM template (e.g. a lined pocket or a printed panel).
+    """
     bom_template = models.ForeignKey(
         BOMTemplate, 
         on_delete=models.CASCADE,
@@ -161,13 +215,25 @@ class BOMItem(TimeStampedModel):
     input = models.ForeignKey(
         Input, 
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         help_text="Insumo"
     )
     input_provider = models.ForeignKey(
         InputProvider, 
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         help_text="Proveedor seleccionado para este insumo"
     )
+    sub_template = models.ForeignKey(
+        BOMTemplate,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='parent_items',
+        help_text="Plantilla BOM usada como subensamble"
+    )
     quantity = models.DecimalField(
         max_digits=10, 
         decimal_places=3,
@@ -186,13 +252,92 @@ class BOMItem(TimeStampedModel):
         verbose_name = "Item BOM"
         verbose_name_plural = "Items BOM"
         ordering = ['bom_template__name', 'input__name']
+        constraints = [
+            models.CheckConstraint(
+                check=(
+                    models.Q(input__isnull=False, input_provider__isnull=False, sub_template__isnull=True)
+                    | models.Q(input__isnull=True, input_provider__isnull=True, sub_template__isnull=False)
+                ),
+                name='bomitem_input_xor_sub_template',
+            ),
+            models.UniqueConstraint(
+                fields=['bom_template', 'sub_template'],
+                condition=models.Q(sub_template__isnull=False),
+                name='bomitem_unique_sub_template',
+            ),
+        ]
     
     def __str__(self):
-        return f"{self.bom_template.name} - {self.input.name} ({self.quantity})"
+        return f"{self.bom_template.name} - {self.component_name} ({self.quantity})"
+    
+    @property
+    def is_sub_assembly(self):
+        return self.sub_template_id is not None
+    
+    @property
+    def component_name(self):
+        """Name of the input or sub-assembly this line consumes"""
+        if self.is_sub_assembly:
+            return self.sub_template.name
+        return self.input.name
+    
+    def clean(self):
+        super().clean()
+        self.validate_sub_template()
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'sub_template' in update_fields:
+            self.validate_sub_template()
+        super().save(*args, **kwargs)
+    
+    def validate_sub_template(self):
+        """Reject sub-assemblies that would make the BOM graph cyclic"""
+        if not self.sub_template_id:
+            return
+        
+        if self.sub_template_id == self.bom_template_id:
+            raise ValidationError(
+                {'sub_template': "Una plantilla BOM no puede contenerse a sí misma."}
+            )
+        
+        # Walk down from the sub-assembly; reaching this BOM means a cycle
+        edges = BOMItem.objects.filter(sub_template__isnull=False)
+        if self.pk:
+            edges = edges.exclude(pk=self.pk)
+        children = {}
+        for parent_id, child_id in edges.values_list('bom_template_id', 'sub_template_id'):
+            children.setdefault(parent_id, []).append(child_id)
+        
+        pending = [self.sub_template_id]
+        visited = set()
+        while pending:
+            template_id = pending.pop()
+            if template_id == self.bom_template_id:
+                raise ValidationError(
+                    {'sub_template': "El subensamble crearía una referencia circular entre plantillas BOM."}
+                )
+            if template_id in visited:
+                continue
+            visited.add(template_id)
+            pending.extend(children.get(template_id, []))
     
     def calculate_line_cost(self):
         """Calculate cost for this BOM line item"""
-        return self.input_provider.price_per_unit_cop * self.quantity
+        return self.compute_line_cost(
+            self.quantity,
+            input_provider=self.input_provider,
+            sub_template=self.sub_template,
+        )
+    
+    @staticmethod
+    def compute_line_cost(quantity, input_provider=None, sub_template=None):
+        """Line cost rounded to cents the same way the SQL costing engine rounds"""
+        if sub_template is not None:
+            unit_cost = sub_template.total_cost_cop
+        else:
+            unit_cost = input_provider.price_per_unit_cop
+        return (unit_cost * quantity).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
     
     def recalculate_cost(self):
         """Calculate and save line cost to database"""
@@ -351,4 +496,120 @@ class ProductionBudgetItem(TimeStampedModel):
         self.unit_cost_cop = self.calculate_unit_cost()
         self.total_cost_cop = self.calculate_total_cost()
         self.save(update_fields=['unit_cost_cop', 'total_cost_cop', 'updated_at'])
-        return self.total_cost_cop
\ No newline at end of file
+        return self.total_cost_cop
+
+class ProductionBudgetSnapshot(TimeStampedModel):
+    """Immutable costed explosion of a production budget, frozen on approval"""
+    production_budget = models.OneToOneField(
+        ProductionBudget,
+        on_delete=models.CASCADE,
+        related_name='snapshot',
+        help_text="Presupuesto de producción"
+    )
+    total_budget_cop = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        help_text="Presupuesto total al momento de la aprobación en COP"
+    )
+    
+    class Meta:
+        verbose_name = "Snapshot de Presupuesto"
+        verbose_name_plural = "Snapshots de Presupuestos"
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.production_budget.name} @ {self.created_at:%Y-%m-%d %H:%M}"
+
+
+class ProductionBudgetSnapshotItem(models.Model):
+    """Frozen product line of a budget snapshot"""
+    snapshot = models.ForeignKey(
+        ProductionBudgetSnapshot,
+        on_delete=models.CASCADE,
+        related_name='items',
+        help_text="Snapshot del presupuesto"
+    )
+    position = models.PositiveIntegerField(help_text="Orden dentro del snapshot")
+    end_product_id = models.BigIntegerField(help_text="ID del producto final al aprobar")
+    product_name = models.CharField(max_length=200, help_text="Nombre del producto final")
+    planned_quantity = models.PositiveIntegerField(help_text="Cantidad planificada")
+    unit_cost_cop = models.DecimalField(max_digits=12, decimal_places=2, help_text="Costo unitario en COP")
+    total_cost_cop = models.DecimalField(max_digits=15, decimal_places=2, help_text="Costo total de la línea en COP")
+    bom_cost_cop = models.DecimalField(max_digits=12, decimal_places=2, help_text="Costo BOM en COP")
+    
+    class Meta:
+        verbose_name = "Item de Snapshot"
+        verbose_name_plural = "Items de Snapshot"
+        ordering = ['snapshot', 'position']
+        indexes = [
+            models.Index(fields=['snapshot', 'position'], name='core_snapitem_snapshot_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_name} x{self.planned_quantity}"
+
+
+class ProductionBudgetSnapshotLine(models.Model):
+    """
+    Frozen BOM line of a snapshot item. depth 0 lines are the product's own
+    BOM lines; sub-assemblies are followed by their exploded lines at
+    depth + 1, with multiplier holding the quantity per product unit.
+    """
+    snapshot = models.ForeignKey(
+        ProductionBudgetSnapshot,
+        on_delete=models.CASCADE,
+        related_name='lines',
+        help_text="Snapshot del presupuesto"
+    )
+    item = models.ForeignKey(
+        ProductionBudgetSnapshotItem,
+        on_delete=models.CASCADE,
+        related_name='lines',
+        help_text="Producto del snapshot"
+    )
+    position = models.PositiveIntegerField(help_text="Orden dentro del snapshot")
+    depth = models.PositiveSmallIntegerField(default=0, help_text="Nivel de subensamble (0 = BOM del producto)")
+    is_sub_assembly = models.BooleanField(default=False, help_text="La línea es un subensamble")
+    multiplier = models.DecimalField(
+        max_digits=15,
+        decimal_places=6,
+        default=1,
+        help_text="Unidades de la línea por unidad de producto"
+    )
+    input_id = models.BigIntegerField(null=True, blank=True, help_text="ID del insumo al aprobar")
+    input_provider_id = models.BigIntegerField(null=True, blank=True, help_text="ID del insumo-proveedor al aprobar")
+    input_name = models.CharField(max_length=200, help_text="Nombre del insumo o subensamble")
+    input_type = models.CharField(max_length=50, help_text="Tipo de insumo")
+    unit = models.CharField(max_length=10, help_text="Abreviatura de la unidad")
+    provider_name = models.CharField(max_length=200, blank=True, help_text="Nombre del proveedor")
+    quantity = models.DecimalField(max_digits=10, decimal_places=3, help_text="Cantidad en la línea BOM")
+    unit_price_cop = models.DecimalField(max_digits=12, decimal_places=2, help_text="Precio unitario en COP")
+    line_cost_cop = models.DecimalField(max_digits=12, decimal_places=2, help_text="Costo de la línea en COP")
+    
+    class Meta:
+        verbose_name = "Línea de Snapshot"
+        verbose_name_plural = "Líneas de Snapshot"
+        ordering = ['snapshot', 'position']
+        indexes = [
+            models.Index(fields=['snapshot', 'position'], name='core_snapline_snapshot_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.input_name} x{self.quantity}"
+
+
+class ReportCacheState(models.Model):
+    """
+    Report cache generation of one tenant, bumped by ReportCache.invalidate.
+    Kept in Postgres so every web process and the job worker see the same
+    generation, whatever cache backend holds the report payloads.
+    """
+    schema_name = models.CharField(max_length=63, unique=True, help_text="Esquema del tenant")
+    generation = models.PositiveBigIntegerField(default=0, help_text="Generación de la caché de reportes")
+    
+    class Meta:
+        verbose_name = "Estado de Caché de Reportes"
+        verbose_name_plural = "Estados de Caché de Reportes"
+    
+    def __str__(self):
+        return f"{self.schema_name} (generación {self.generation})"
@@ -18,36 +18,52 @@ textile_urlpatterns = [
     
     # Provider CSV operations
     path('providers/import-csv/', views.ProviderViewSet.as_view({'post': 'import_csv'}), name='provider-import-csv'),
+    path('providers/import-csv/rejected/<str:token>/', views.ProviderViewSet.as_view({'get': 'import_csv_rejected'}), name='provider-import-csv-rejected'),
     path('providers/export-csv/', views.ProviderViewSet.as_view({'get': 'export_csv'}), name='provider-export-csv'),
     path('providers/csv-template/', views.ProviderViewSet.as_view({'get': 'csv_template'}), name='provider-csv-template'),
     
     # Inputs
     path('inputs/', views.InputViewSet.as_view({'get': 'list', 'post': 'create'}), name='input-list'),
     path('inputs/<int:pk>/', views.InputViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='input-detail'),
+    path('inputs/import-csv/', views.InputViewSet.as_view({'post': 'import_csv'}), name='input-import-csv'),
+    path('inputs/import-csv/rejected/<str:token>/', views.InputViewSet.as_view({'get': 'import_csv_rejected'}), name='input-import-csv-rejected'),
     
     # Input-Provider relationships
     path('input-providers/', views.InputProviderViewSet.as_view({'get': 'list', 'post': 'create'}), name='input-provider-list'),
     path('input-providers/<int:pk>/', views.InputProviderViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='input-provider-detail'),
+    path('input-providers/import-csv/', views.InputProviderViewSet.as_view({'post': 'import_csv'}), name='input-provider-import-csv'),
+    path('input-providers/import-csv/rejected/<str:token>/', views.InputProviderViewSet.as_view({'get': 'import_csv_rejected'}), name='input-provider-import-csv-rejected'),
     
     # BOM Templates
     path('bom-templates/', views.BOMTemplateViewSet.as_view({'get': 'list', 'post': 'create'}), name='bom-template-list'),
     path('bom-templates/<int:pk>/', views.BOMTemplateViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='bom-template-detail'),
+    path('bom-templates/import-csv/', views.BOMTemplateViewSet.as_view({'post': 'import_csv'}), name='bom-template-import-csv'),
+    path('bom-templates/import-csv/rejected/<str:token>/', views.BOMTemplateViewSet.as_view({'get': 'import_csv_rejected'}), name='bom-template-import-csv-rejected'),
     path('bom-templates/<int:pk>/recalculate-cost/', views.BOMTemplateViewSet.as_view({'post': 'recalculate_cost'}), name='bom-template-recalculate-cost'),
     path('bom-templates/recalculate-all-costs/', views.BOMTemplateViewSet.as_view({'post': 'recalculate_all_costs'}), name='bom-template-recalculate-all-costs'),
+    path('bom-templates/cost-preview/', views.BOMTemplateViewSet.as_view({'get': 'cost_preview'}), name='bom-template-cost-preview'),
+    path('bom-templates/sourcing-optimization/', views.BOMTemplateViewSet.as_view({'get': 'sourcing_preview'}), name='bom-template-sourcing-preview'),
+    path('bom-templates/sourcing-optimization/apply/', views.BOMTemplateViewSet.as_view({'post': 'apply_sourcing'}), name='bom-template-apply-sourcing'),
     
     # BOM Items
     path('bom-items/', views.BOMItemViewSet.as_view({'get': 'list', 'post': 'create'}), name='bom-item-list'),
     path('bom-items/<int:pk>/', views.BOMItemViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='bom-item-detail'),
+    path('bom-items/import-csv/', views.BOMItemViewSet.as_view({'post': 'import_csv'}), name='bom-item-import-csv'),
+    path('bom-items/import-csv/rejected/<str:token>/', views.BOMItemViewSet.as_view({'get': 'import_csv_rejected'}), name='bom-item-import-csv-rejected'),
     
     # End Products
     path('end-products/', views.EndProductViewSet.as_view({'get': 'list', 'post': 'create'}), name='end-product-list'),
     path('end-products/<int:pk>/', views.EndProductViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='end-product-detail'),
+    path('end-products/import-csv/', views.EndProductViewSet.as_view({'post': 'import_csv'}), name='end-product-import-csv'),
+    path('end-products/import-csv/rejected/<str:token>/', views.EndProductViewSet.as_view({'get': 'import_csv_rejected'}), name='end-product-import-csv-rejected'),
     
     
     # Production Budgets
     path('production-budgets/', views.ProductionBudgetViewSet.as_view({'get': 'list', 'post': 'create'}), name='production-budget-list'),
     path('production-budgets/<int:pk>/', views.ProductionBudgetViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='production-budget-detail'),
     path('production-budgets/<int:pk>/recalculate-cost/', views.ProductionBudgetViewSet.as_view({'post': 'recalculate_cost'}), name='production-budget-recalculate-cost'),
+    path('production-budgets/<int:pk>/cost-risk-analysis/', views.ProductionBudgetViewSet.as_view({'post': 'cost_risk_analysis'}), name='production-budget-cost-risk-analysis'),
+    path('production-budgets/<int:pk>/material-requirements/', views.ProductionBudgetViewSet.as_view({'get': 'material_requirements'}), name='production-budget-material-requirements'),
     path('production-budgets/recalculate-all-costs/', views.ProductionBudgetViewSet.as_view({'post': 'recalculate_all_costs'}), name='production-budget-recalculate-all-costs'),
     
     # Production Budget Reports
@@ -55,10 +71,17 @@ textile_urlpatterns = [
     path('production-budgets/<int:pk>/provider-summary-report/', views.ProductionBudgetViewSet.as_view({'get': 'provider_summary_report'}), name='production-budget-provider-summary-report'),
     path('production-budgets/<int:pk>/detailed-line-items-report/', views.ProductionBudgetViewSet.as_view({'get': 'detailed_line_items_report'}), name='production-budget-detailed-line-items-report'),
     path('production-budgets/<int:pk>/export-report/', views.ProductionBudgetViewSet.as_view({'get': 'export_report'}), name='production-budget-export-report'),
+    path('reports/cache-stats/', views.report_cache_stats, name='report-cache-stats'),
     
     # Production Budget Items
     path('production-budget-items/', views.ProductionBudgetItemViewSet.as_view({'get': 'list', 'post': 'create'}), name='production-budget-item-list'),
     path('production-budget-items/<int:pk>/', views.ProductionBudgetItemViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='production-budget-item-detail'),
+    
+    # What-if price simulation
+    path('simulations/price-scenario/', views.PriceScenarioViewSet.as_view({'post': 'simulate'}), name='price-scenario-simulate'),
+    
+    # Background jobs
+    path('jobs/<int:pk>/', views.BackgroundJobViewSet.as_view({'get': 'retrieve'}), name='job-detail'),
 ]
 
 urlpatterns = [
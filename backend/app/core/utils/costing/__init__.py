@@ -0,0 +1,55 @@
+# backend/app/core/utils/costing/__init__.py
+"""
+Costing Operations Module
+Responsibility: Set-based cost recalculation for textile BOMs, products and budgets
+"""
+
+from .engine import BOMCostEngine, TemplateCostChange
+from .deltas import BOMTotalReconciler, apply_template_cost_delta
+from .history import record_price_history
+from .exceptions import BOMCycleError, CostingError
+from .rollup import BOMRollup
+from .propagation import PriceChangePropagator, PropagationResult
+from .simulation import CostImpact, PriceScenario, PriceScenarioSimulator, ScenarioResult
+from .sourcing import LineReSourcing, ProviderSourcingOptimizer, SourcingPlan, SourcingResult, SourcingSavings
+from .snapshot import FROZEN_STATUSES, BudgetSnapshotBuilder
+from .mrp import InputRequirement, MaterialRequirements, MaterialRequirementsPlanner, ProviderRequirement
+from .report_cache import CachedReport, ReportCache
+from .reports import BudgetReportAggregator, ProviderCost
+from .risk import BudgetRiskAnalyzer, BudgetRiskResult, PriceUncertainty, VarianceContributor
+
+__all__ = [
+    'BOMCostEngine',
+    'TemplateCostChange',
+    'PriceChangePropagator',
+    'PropagationResult',
+    'BOMTotalReconciler',
+    'apply_template_cost_delta',
+    'record_price_history',
+    'BOMCycleError',
+    'BOMRollup',
+    'CostingError',
+    'CostImpact',
+    'PriceScenario',
+    'PriceScenarioSimulator',
+    'ScenarioResult',
+    'BudgetRiskAnalyzer',
+    'BudgetRiskResult',
+    'PriceUncertainty',
+    'VarianceContributor',
+    'LineReSourcing',
+    'ProviderSourcingOptimizer',
+    'SourcingPlan',
+    'SourcingResult',
+    'SourcingSavings',
+    'FROZEN_STATUSES',
+    'BudgetSnapshotBuilder',
+    'InputRequirement',
+    'MaterialRequirements',
+    'MaterialRequirementsPlanner',
+    'ProviderRequirement',
+    'BudgetReportAggregator',
+    'ProviderCost',
+    'CachedReport',
+    'ReportCache',
+]
@@ -0,0 +1,90 @@
+# backend/app/core/utils/costing/deltas.py
+"""
+Delta maintenance of BOM template totals
+Responsibility: Keep BOMTemplate.total_cost_cop up to date in O(1) per
+BOM item edit, and detect/repair any drift against the sum of its lines.
+"""
+
+from decimal import Decimal
+from typing import Iterable, List, Optional
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ...textile_models import BOMItem, BOMTemplate
+from .engine import BOMCostEngine, TemplateCostChange
+from .propagation import PriceChangePropagator, PropagationResult
+
+
+def apply_template_cost_delta(template_id: int, delta: Decimal) -> None:
+    """
+    Atomically add delta to a template total with a single
+    UPDATE ... SET total_cost_cop = total_cost_cop + delta, then roll the
+    change up to any template that uses it as a sub-assembly.
+    """
+    if not delta:
+        return
+    now = timezone.now()
+    BOMTemplate.objects.filter(pk=template_id).update(
+        total_cost_cop=F('total_cost_cop') + delta,
+        updated_at=now,
+    )
+
+    # Templates that use this one as a sub-assembly must follow
+    parent_ids = list(
+        BOMItem.objects.filter(sub_template_id=template_id)
+        .values_list('bom_template_id', flat=True)
+    )
+    if parent_ids:
+        with connection.cursor() as cursor:
+            BOMCostEngine().rollup.roll_up(cursor, now, parent_ids)
+
+
+class BOMTotalReconciler:
+    """
+    Compare stored template totals with the sum of their stored line costs.
+
+    Delta updates never re-read the items, so any write path that bypasses
+    them (admin inlines, raw SQL, cascades) can leave a total out of sync.
+    """
+
+    def __init__(self, engine: BOMCostEngine = None):
+        self.engine = engine or BOMCostEngine()
+        self.propagation = PropagationResult()
+
+    def find_drift(self, template_ids: Optional[Iterable[int]] = None) -> List[TemplateCostChange]:
+        """Return templates whose stored total differs from the sum of their lines"""
+        template_ids = self.engine._normalize_ids(template_ids)
+        params = [template_ids] if template_ids is not None else []
+
+        sql = f"""
+            SELECT bt.id, bt.name, bt.total_cost_cop,
+                   COALESCE(SUM(bi.line_cost_cop), 0) AS line_total
+            FROM {self.engine.bom_template_table} AS bt
+            LEFT JOIN {self.engine.bom_item_table} AS bi ON bi.bom_template_id = bt.id
+            {self.engine._template_filter('bt.id', template_ids)}
+            GROUP BY bt.id, bt.name, bt.total_cost_cop
+            HAVING bt.total_cost_cop <> COALESCE(SUM(bi.line_cost_cop), 0)
+            ORDER BY bt.name, bt.id
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [TemplateCostChange(*row) for row in cursor.fetchall()]
+
+    def reconcile(self, template_ids: Optional[Iterable[int]] = None) -> List[TemplateCostChange]:
+        """
+        Reset drifted totals to the sum of their lines and, in the same
+        transaction, recompute what depends on them: parent sub-assembly
+        lines and templates, end products and budgets (counts in
+        self.propagation). Returns the fixed templates.
+        """
+        with transaction.atomic():
+            drifted = self.find_drift(template_ids)
+            if drifted:
+                drifted_ids = [change.id for change in drifted]
+                with connection.cursor() as cursor:
+                    self.engine.update_template_totals(cursor, timezone.now(), drifted_ids)
+                self.propagation = PriceChangePropagator(self.engine).propagate_template_totals(drifted_ids)
+        return drifted
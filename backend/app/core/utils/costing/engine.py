@@ -0,0 +1,351 @@
+# backend/app/core/utils/costing/engine.py
+"""
+Set-based BOM costing engine
+Responsibility: Recompute BOMItem.line_cost_cop and BOMTemplate.total_cost_cop
+for a whole tenant (or a subset of templates) with a handful of
+UPDATE ... FROM statements instead of one save() per row.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ...textile_models import (
+    BOMItem,
+    BOMTemplate,
+    EndProduct,
+    Input,
+    InputProvider,
+    InputProviderPrice,
+    ProductionBudget,
+    ProductionBudgetItem,
+)
+from .rollup import BOMRollup
+
+
+@dataclass
+class TemplateCostChange:
+    """Old and new total cost of a single BOM template"""
+    id: int
+    name: str
+    old_cost: Decimal
+    new_cost: Decimal
+
+    @property
+    def difference(self) -> Decimal:
+        return self.new_cost - self.old_cost
+
+
+@dataclass
+class HistoricalCosts:
+    """Template totals, line costs and unit prices evaluated as of a moment"""
+    as_of: datetime
+    template_totals: Dict[int, Decimal] = field(default_factory=dict)
+    line_costs: Dict[int, Decimal] = field(default_factory=dict)
+    unit_prices: Dict[int, Decimal] = field(default_factory=dict)
+
+    def line_cost(self, bom_item) -> Decimal:
+        return self.line_costs.get(bom_item.pk, Decimal('0'))
+
+    def unit_price(self, bom_item) -> Decimal:
+        if bom_item.is_sub_assembly:
+            return self.template_total(bom_item.sub_template_id)
+        return self.unit_prices.get(bom_item.pk, Decimal('0'))
+
+    def template_total(self, template_id: int) -> Decimal:
+        return self.template_totals.get(template_id, Decimal('0'))
+
+
+class BOMCostEngine:
+    """
+    Recalculate BOM costs directly in the database.
+
+    All statements run against the connection's current schema, so the
+    engine is tenant-aware as long as it is used inside a tenant context.
+    The update_* stage methods take an open cursor so callers can chain
+    them inside a single transaction.
+    """
+
+    def __init__(self):
+        self.bom_item_table = BOMItem._meta.db_table
+        self.bom_template_table = BOMTemplate._meta.db_table
+        self.input_table = Input._meta.db_table
+        self.input_provider_table = InputProvider._meta.db_table
+        self.price_history_table = InputProviderPrice._meta.db_table
+        self.end_product_table = EndProduct._meta.db_table
+        self.budget_table = ProductionBudget._meta.db_table
+        self.budget_item_table = ProductionBudgetItem._meta.db_table
+        self.rollup = BOMRollup(self)
+
+    @staticmethod
+    def _normalize_ids(ids: Optional[Iterable[int]]) -> Optional[List[int]]:
+        if ids is None:
+            return None
+        return [int(pk) for pk in ids]
+
+    def _template_filter(self, column: str, template_ids: Optional[List[int]]) -> str:
+        if template_ids is None:
+            return ''
+        return f'WHERE {column} = ANY(%s)'
+
+    def price_as_of_join(self, alias: str, input_provider_column: str) -> str:
+        """
+        LEFT JOIN of the price history row in effect at a moment, taken as
+        the next query parameter. The range containment matches the GiST
+        index on the history's effective range.
+        """
+        return f"""
+            LEFT JOIN {self.price_history_table} AS {alias}
+              ON {alias}.input_provider_id = {input_provider_column}
+             AND tstzrange({alias}.effective_from, {alias}.effective_to) @> %s::timestamptz
+        """
+
+    def budget_templates_cte(self) -> str:
+        """
+        Recursive CTE body listing (template_id, factor) for every template a
+        production budget (the next query parameter) uses, directly or as a
+        sub-assembly; factor is how many units of the template the budget
+        needs. Use as ``WITH RECURSIVE budget_templates AS (...)``.
+        """
+        return f"""
+            SELECT ep.bom_template_id AS template_id,
+                   pbi.planned_quantity::numeric AS factor
+            FROM {self.budget_item_table} AS pbi
+            JOIN {self.end_product_table} AS ep ON ep.id = pbi.end_product_id
+            WHERE pbi.production_budget_id = %s
+          UNION ALL
+            SELECT bi.sub_template_id, bt.factor * bi.quantity
+            FROM budget_templates AS bt
+            JOIN {self.bom_item_table} AS bi ON bi.bom_template_id = bt.template_id
+            WHERE bi.sub_template_id IS NOT NULL
+        """
+
+    def preview(self, template_ids: Optional[Iterable[int]] = None,
+                as_of: Optional[datetime] = None) -> List[TemplateCostChange]:
+        """
+        Compute what each template total would be from current provider prices
+        (or the prices in effect at as_of) without writing anything.
+        Sub-assemblies are costed from prices too, matching what
+        recalculate() writes for the same template_ids.
+        """
+        template_ids = self._normalize_ids(template_ids)
+
+        with connection.cursor() as cursor:
+            children = self.rollup.load_graph(cursor)
+            targets = None
+            if template_ids is not None:
+                targets = self.rollup.with_descendants(children, template_ids)
+            totals, _ = self.rollup.compute_costs(cursor, children, targets, from_prices=True, as_of=as_of)
+
+        return [
+            TemplateCostChange(template_id, name, old_cost, new_cost)
+            for template_id, (name, old_cost, new_cost) in totals.items()
+            if template_ids is None or template_id in template_ids
+        ]
+
+    def costs_as_of(self, as_of: datetime, template_ids: Optional[Iterable[int]] = None) -> HistoricalCosts:
+        """
+        Evaluate template totals, line costs and unit prices with the prices
+        in effect at as_of. The current BOM structure is used; nothing is written.
+        """
+        template_ids = self._normalize_ids(template_ids)
+        costs = HistoricalCosts(as_of=as_of)
+
+        with connection.cursor() as cursor:
+            children = self.rollup.load_graph(cursor)
+            targets = None
+            if template_ids is not None:
+                targets = self.rollup.with_descendants(children, template_ids)
+            totals, sub_line_costs = self.rollup.compute_costs(cursor, children, targets, as_of=as_of)
+
+            params = [as_of]
+            template_filter = ''
+            if targets is not None:
+                template_filter = 'AND bi.bom_template_id = ANY(%s)'
+                params.append(list(targets))
+            cursor.execute(f"""
+                SELECT bi.id, ph.price_per_unit_cop, ROUND(ph.price_per_unit_cop * bi.quantity, 2)
+                FROM {self.bom_item_table} AS bi
+                {self.price_as_of_join('ph', 'bi.input_provider_id')}
+                WHERE bi.input_provider_id IS NOT NULL {template_filter}
+            """, params)
+            for item_id, unit_price, line_cost in cursor.fetchall():
+                costs.unit_prices[item_id] = unit_price or Decimal('0')
+                costs.line_costs[item_id] = line_cost or Decimal('0')
+
+        costs.template_totals = {template_id: new for template_id, (_, _, new) in totals.items()}
+        costs.line_costs.update(sub_line_costs)
+        return costs
+
+    def recalculate(self, template_ids: Optional[Iterable[int]] = None) -> List[TemplateCostChange]:
+        """
+        Recalculate line costs and template totals with set-based UPDATEs.
+        The sub-assemblies of template_ids are refreshed from prices too, as
+        preview() does, and templates that use any refreshed template are
+        recalculated. Returns the old and new total for every template
+        touched, ordered by name.
+        """
+        template_ids = self._normalize_ids(template_ids)
+        now = timezone.now()
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                if template_ids is not None:
+                    children = self.rollup.load_graph(cursor)
+                    template_ids = sorted(self.rollup.with_descendants(children, template_ids))
+                self.update_line_costs(cursor, now, template_ids=template_ids)
+                return self.rollup.roll_up(cursor, now, template_ids)
+
+    def update_line_costs(self, cursor, now: datetime,
+                          template_ids: Optional[List[int]] = None,
+                          input_provider_ids: Optional[List[int]] = None) -> Dict[int, int]:
+        """
+        Recompute BOMItem.line_cost_cop of input lines from the selected
+        provider price (sub-assembly lines are handled by BOMRollup).
+        Restrict by template and/or input provider; returns the number of
+        lines updated per affected template id.
+        """
+        conditions = ['ip.id = bi.input_provider_id']
+        params = [now]
+        if template_ids is not None:
+            conditions.append('bi.bom_template_id = ANY(%s)')
+            params.append(template_ids)
+        if input_provider_ids is not None:
+            conditions.append('bi.input_provider_id = ANY(%s)')
+            params.append(input_provider_ids)
+
+        cursor.execute(f"""
+            WITH updated AS (
+                UPDATE {self.bom_item_table} AS bi
+                SET line_cost_cop = ROUND(ip.price_per_unit_cop * bi.quantity, 2),
+                    updated_at = %s
+                FROM {self.input_provider_table} AS ip
+                WHERE {' AND '.join(conditions)}
+                RETURNING bi.bom_template_id
+            )
+            SELECT bom_template_id, COUNT(*) FROM updated GROUP BY bom_template_id
+        """, params)
+        return dict(cursor.fetchall())
+
+    def update_template_totals(self, cursor, now: datetime,
+                               template_ids: Optional[List[int]] = None) -> List[TemplateCostChange]:
+        """
+        Recompute BOMTemplate.total_cost_cop as the sum of its line costs.
+        Returns the old and new total for every template touched, ordered by name.
+        """
+        # The "previous" CTE reads the pre-update snapshot, which lets
+        # the final SELECT report old and new totals in a single round trip.
+        sql = f"""
+            WITH previous AS (
+                SELECT id, total_cost_cop
+                FROM {self.bom_template_table}
+                {self._template_filter('id', template_ids)}
+            ),
+            totals AS (
+                SELECT previous.id AS bom_template_id,
+                       COALESCE(SUM(bi.line_cost_cop), 0) AS total_cost_cop
+                FROM previous
+                LEFT JOIN {self.bom_item_table} AS bi ON bi.bom_template_id = previous.id
+                GROUP BY previous.id
+            ),
+            updated AS (
+                UPDATE {self.bom_template_table} AS bt
+                SET total_cost_cop = totals.total_cost_cop,
+                    updated_at = %s
+                FROM totals
+                JOIN previous ON previous.id = totals.bom_template_id
+                WHERE bt.id = totals.bom_template_id
+                RETURNING bt.id, bt.name, previous.total_cost_cop AS old_cost,
+                          bt.total_cost_cop AS new_cost
+            )
+            SELECT id, name, old_cost, new_cost FROM updated ORDER BY name, id
+        """
+        params = [template_ids] if template_ids is not None else []
+        cursor.execute(sql, params + [now])
+        return [TemplateCostChange(*row) for row in cursor.fetchall()]
+
+    def update_end_products(self, cursor, now: datetime,
+                            template_ids: Optional[List[int]] = None) -> Set[int]:
+        """
+        Copy template totals into EndProduct.bom_cost_cop and total_cost_cop.
+        Returns the affected end product ids.
+        """
+        params = [now]
+        template_filter = ''
+        if template_ids is not None:
+            template_filter = 'AND bt.id = ANY(%s)'
+            params.append(template_ids)
+
+        cursor.execute(f"""
+            UPDATE {self.end_product_table} AS ep
+            SET bom_cost_cop = bt.total_cost_cop,
+                total_cost_cop = bt.total_cost_cop,
+                updated_at = %s
+            FROM {self.bom_template_table} AS bt
+            WHERE bt.id = ep.bom_template_id {template_filter}
+            RETURNING ep.id
+        """, params)
+        return {row[0] for row in cursor.fetchall()}
+
+    def update_budget_items(self, cursor, now: datetime,
+                            end_product_ids: Optional[List[int]] = None,
+                            budget_ids: Optional[List[int]] = None) -> Dict[int, int]:
+        """
+        Recompute ProductionBudgetItem unit and line costs from the product cost.
+        Returns the number of lines updated per affected production budget id.
+        """
+        conditions = ['ep.id = pbi.end_product_id']
+        params = [now]
+        if end_product_ids is not None:
+            conditions.append('ep.id = ANY(%s)')
+            params.append(end_product_ids)
+        if budget_ids is not None:
+            conditions.append('pbi.production_budget_id = ANY(%s)')
+            params.append(budget_ids)
+
+        cursor.execute(f"""
+            WITH updated AS (
+                UPDATE {self.budget_item_table} AS pbi
+                SET unit_cost_cop = ep.total_cost_cop,
+                    total_cost_cop = ep.total_cost_cop * pbi.planned_quantity,
+                    updated_at = %s
+                FROM {self.end_product_table} AS ep
+                WHERE {' AND '.join(conditions)}
+                RETURNING pbi.production_budget_id
+            )
+            SELECT production_budget_id, COUNT(*) FROM updated GROUP BY production_budget_id
+        """, params)
+        return dict(cursor.fetchall())
+
+    def update_budget_totals(self, cursor, now: datetime,
+                             budget_ids: Optional[List[int]] = None) -> int:
+        """
+        Recompute ProductionBudget.total_budget_cop as the sum of its lines.
+        Returns the number of budgets updated.
+        """
+        budget_filter = ''
+        params = []
+        if budget_ids is not None:
+            budget_filter = 'WHERE pb.id = ANY(%s)'
+            params.append(budget_ids)
+
+        cursor.execute(f"""
+            WITH totals AS (
+                SELECT pb.id AS production_budget_id,
+                       COALESCE(SUM(pbi.total_cost_cop), 0) AS total_budget_cop
+                FROM {self.budget_table} AS pb
+                LEFT JOIN {self.budget_item_table} AS pbi ON pbi.production_budget_id = pb.id
+                {budget_filter}
+                GROUP BY pb.id
+            )
+            UPDATE {self.budget_table} AS pb
+            SET total_budget_cop = totals.total_budget_cop,
+                updated_at = %s
+            FROM totals
+            WHERE pb.id = totals.production_budget_id
+        """, params + [now])
+        return cursor.rowcount
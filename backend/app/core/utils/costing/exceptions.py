@@ -0,0 +1,14 @@
+# backend/app/core/utils/costing/exceptions.py
+"""
+Custom exceptions for costing operations
+"""
+
+
+class CostingError(Exception):
+    """Base exception for costing operations"""
+    pass
+
+
+class BOMCycleError(CostingError):
+    """Exception raised when sub-assembly references form a cycle"""
+    pass
@@ -0,0 +1,58 @@
+# backend/app/core/utils/costing/history.py
+"""
+InputProvider price history
+Responsibility: Append a new effective range whenever an InputProvider
+price changes, so costs can be evaluated as of any past date.
+"""
+
+from datetime import datetime
+from typing import Iterable, Optional
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ...textile_models import InputProvider, InputProviderPrice
+
+
+def record_price_history(input_provider_ids: Iterable[int], effective_from: Optional[datetime] = None) -> int:
+    """
+    Close the open range of every given InputProvider whose price differs
+    from the history and open a new one at the current price. Rows are
+    never rewritten except for setting effective_to on the range being
+    closed. Returns the number of ranges opened.
+    """
+    input_provider_ids = [int(pk) for pk in input_provider_ids]
+    if not input_provider_ids:
+        return 0
+
+    now = timezone.now()
+    effective_from = effective_from or now
+    history_table = InputProviderPrice._meta.db_table
+    input_provider_table = InputProvider._meta.db_table
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Two statements: the new range may only be opened once the old
+            # one is closed, or the one-open-range constraint would fail.
+            cursor.execute(f"""
+                UPDATE {history_table} AS ph
+                SET effective_to = %s, updated_at = %s
+                FROM {input_provider_table} AS ip
+                WHERE ph.input_provider_id = ip.id
+                  AND ip.id = ANY(%s)
+                  AND ph.effective_to IS NULL
+                  AND ph.price_per_unit_cop <> ip.price_per_unit_cop
+            """, [effective_from, now, input_provider_ids])
+
+            cursor.execute(f"""
+                INSERT INTO {history_table}
+                    (input_provider_id, price_per_unit_cop, effective_from, effective_to, created_at, updated_at)
+                SELECT ip.id, ip.price_per_unit_cop, %s, NULL, %s, %s
+                FROM {input_provider_table} AS ip
+                WHERE ip.id = ANY(%s)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM {history_table} AS ph
+                      WHERE ph.input_provider_id = ip.id AND ph.effective_to IS NULL
+                  )
+            """, [effective_from, now, now, input_provider_ids])
+            return cursor.rowcount
@@ -0,0 +1,162 @@
+# backend/app/core/utils/costing/mrp.py
+"""
+Material requirements explosion
+Responsibility: Total quantity and cost of every input (and chosen provider)
+a production budget needs, computed in one aggregate query and cached per
+budget version.
+"""
+
+from dataclasses import dataclass, field, replace
+from decimal import Decimal
+from typing import List, Optional
+
+from django.db import connection
+
+from ...textile_models import (
+    Input,
+    Provider,
+    ProductionBudget,
+    ProductionBudgetSnapshotItem,
+    ProductionBudgetSnapshotLine,
+    Unit,
+)
+from .engine import BOMCostEngine
+from .report_cache import ReportCache
+from .snapshot import BudgetSnapshotBuilder
+
+
+@dataclass
+class ProviderRequirement:
+    """Quantity and cost of one input bought from one provider"""
+    input_provider_id: Optional[int]
+    provider_name: str
+    unit_price: Decimal
+    quantity: Decimal
+    cost: Decimal
+
+
+@dataclass
+class InputRequirement:
+    """Total quantity and cost of one input, split by provider"""
+    input_id: Optional[int]
+    input_name: str
+    input_type: str
+    unit: str
+    quantity: Decimal
+    cost: Decimal
+    providers: List[ProviderRequirement] = field(default_factory=list)
+
+
+@dataclass
+class MaterialRequirements:
+    """MRP explosion of a production budget"""
+    budget_id: int
+    version: str
+    from_snapshot: bool
+    inputs: List[InputRequirement] = field(default_factory=list)
+
+    @property
+    def total_cost(self) -> Decimal:
+        return sum((requirement.cost for requirement in self.inputs), Decimal('0'))
+
+
+class MaterialRequirementsPlanner:
+    """
+    Explode a production budget into input requirements.
+
+    Live budgets walk the sub-assembly graph with a recursive CTE and then
+    aggregate ProductionBudgetItem x BOMItem in a single GROUP BY with
+    GROUPING SETS, producing per-provider rows and per-input totals at once.
+    Frozen budgets aggregate their snapshot lines instead. Results go
+    through the versioned ReportCache.
+    """
+
+    def __init__(self, engine: BOMCostEngine = None):
+        self.engine = engine or BOMCostEngine()
+        self.report_cache = ReportCache(self.engine)
+
+    def requirements(self, production_budget: ProductionBudget) -> MaterialRequirements:
+        """Return the (possibly cached) material requirements of the budget"""
+        report = self.report_cache.get_or_build(
+            production_budget, 'material_requirements', lambda: self._explode(production_budget)
+        )
+        return replace(report.data, version=report.version)
+
+    def _explode(self, production_budget: ProductionBudget) -> MaterialRequirements:
+        snapshot = BudgetSnapshotBuilder.frozen_snapshot(production_budget)
+        if snapshot is not None:
+            return self._explode_snapshot(production_budget, snapshot)
+        return self._explode_live(production_budget)
+
+    def _explode_live(self, production_budget: ProductionBudget) -> MaterialRequirements:
+        engine = self.engine
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                WITH RECURSIVE budget_templates AS ({engine.budget_templates_cte()})
+                SELECT i.id, i.name, i.input_type, u.abbreviation,
+                       ip.id, pr.name, ip.price_per_unit_cop,
+                       SUM(bt.factor * bi.quantity), SUM(bt.factor * bi.line_cost_cop),
+                       GROUPING(ip.id)
+                FROM budget_templates AS bt
+                JOIN {engine.bom_item_table} AS bi
+                  ON bi.bom_template_id = bt.template_id AND bi.input_id IS NOT NULL
+                JOIN {engine.input_table} AS i ON i.id = bi.input_id
+                JOIN {Unit._meta.db_table} AS u ON u.id = i.unit_id
+                JOIN {engine.input_provider_table} AS ip ON ip.id = bi.input_provider_id
+                JOIN {Provider._meta.db_table} AS pr ON pr.id = ip.provider_id
+                GROUP BY GROUPING SETS (
+                    (i.id, i.name, i.input_type, u.abbreviation, ip.id, pr.name, ip.price_per_unit_cop),
+                    (i.id, i.name, i.input_type, u.abbreviation)
+                )
+                ORDER BY i.name, i.id, GROUPING(ip.id) DESC, pr.name, ip.id
+            """, [production_budget.pk])
+            rows = cursor.fetchall()
+
+        input_types = dict(Input.INPUT_TYPES)
+        return self._collect(production_budget.pk, False, rows,
+                             lambda input_type: input_types.get(input_type, input_type))
+
+    def _explode_snapshot(self, production_budget, snapshot) -> MaterialRequirements:
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT l.input_id, l.input_name, l.input_type, l.unit,
+                       l.input_provider_id, l.provider_name, l.unit_price_cop,
+                       SUM(l.quantity * l.multiplier * i.planned_quantity),
+                       SUM(l.line_cost_cop * l.multiplier * i.planned_quantity),
+                       GROUPING(l.input_provider_id)
+                FROM {ProductionBudgetSnapshotLine._meta.db_table} AS l
+                JOIN {ProductionBudgetSnapshotItem._meta.db_table} AS i ON i.id = l.item_id
+                WHERE l.snapshot_id = %s AND NOT l.is_sub_assembly
+                GROUP BY GROUPING SETS (
+                    (l.input_id, l.input_name, l.input_type, l.unit,
+                     l.input_provider_id, l.provider_name, l.unit_price_cop),
+                    (l.input_id, l.input_name, l.input_type, l.unit)
+                )
+                ORDER BY l.input_name, l.input_id, GROUPING(l.input_provider_id) DESC,
+                         l.provider_name, l.input_provider_id
+            """, [snapshot.pk])
+            rows = cursor.fetchall()
+
+        # Snapshot lines already store the input type label
+        return self._collect(production_budget.pk, True, rows, lambda input_type: input_type)
+
+    @staticmethod
+    def _collect(budget_id, from_snapshot, rows, type_label) -> MaterialRequirements:
+        """
+        Nest GROUPING SETS rows into inputs and providers. The ORDER BY puts
+        each input's total row right before its per-provider rows.
+        """
+        result = MaterialRequirements(budget_id, '', from_snapshot)
+        for (input_id, input_name, input_type, unit, input_provider_id, provider_name,
+             unit_price, quantity, cost, is_input_total) in rows:
+            quantity = quantity.quantize(Decimal('0.001'))
+            cost = cost.quantize(Decimal('0.01'))
+            if is_input_total:
+                result.inputs.append(InputRequirement(
+                    input_id, input_name, type_label(input_type), unit, quantity, cost,
+                ))
+            else:
+                result.inputs[-1].providers.append(ProviderRequirement(
+                    input_provider_id, provider_name, unit_price, quantity, cost,
+                ))
+        return result
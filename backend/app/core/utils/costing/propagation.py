@@ -0,0 +1,115 @@
+# backend/app/core/utils/costing/propagation.py
+"""
+Incremental cost propagation
+Responsibility: Push an InputProvider price change down to the BOM items,
+templates, end products, budget items and budgets that depend on it,
+touching only the affected rows.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .engine import BOMCostEngine
+
+
+@dataclass
+class PropagationResult:
+    """Number of rows recomputed at each level of the dependency chain"""
+    bom_templates: int = 0
+    end_products: int = 0
+    production_budgets: int = 0
+
+
+class PriceChangePropagator:
+    """
+    Propagate provider price changes through the costing dependency chain.
+
+    Each level is found from the previous one through the foreign key
+    indexes (BOMItem.input_provider, BOMItem.sub_template,
+    EndProduct.bom_template, ProductionBudgetItem.end_product), so the cost
+    of a propagation is proportional to the number of dependent rows, not
+    to the tenant size.
+    """
+
+    def __init__(self, engine: BOMCostEngine = None):
+        self.engine = engine or BOMCostEngine()
+
+    def propagate(self, input_provider_ids: Iterable[int]) -> PropagationResult:
+        """Recompute every cost that depends on the given InputProvider rows"""
+        input_provider_ids = [int(pk) for pk in input_provider_ids]
+        result = PropagationResult()
+        if not input_provider_ids:
+            return result
+
+        now = timezone.now()
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                template_ids = self.engine.update_line_costs(
+                    cursor, now, input_provider_ids=input_provider_ids
+                )
+                if not template_ids:
+                    return result
+
+                self._propagate_templates(cursor, now, list(template_ids), result)
+
+        return result
+
+    def propagate_templates(self, template_ids: Iterable[int]) -> PropagationResult:
+        """
+        Recompute the line costs of the given templates from current prices,
+        then every cost that depends on them. Used after bulk loads that
+        bypass the model signals.
+        """
+        template_ids = [int(pk) for pk in template_ids]
+        result = PropagationResult()
+        if not template_ids:
+            return result
+
+        now = timezone.now()
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                self.engine.update_line_costs(cursor, now, template_ids=template_ids)
+                self._propagate_templates(cursor, now, template_ids, result)
+
+        return result
+
+    def propagate_template_totals(self, template_ids: Iterable[int]) -> PropagationResult:
+        """
+        Propagate already corrected template totals to the sub-assembly
+        lines, templates, end products and budgets that depend on them,
+        without recomputing the templates' own line costs.
+        """
+        template_ids = [int(pk) for pk in template_ids]
+        result = PropagationResult()
+        if not template_ids:
+            return result
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                self._propagate_templates(cursor, timezone.now(), template_ids, result)
+
+        return result
+
+    def _propagate_templates(self, cursor, now, template_ids, result: PropagationResult):
+        # Templates using the affected ones as sub-assemblies change too
+        changes = self.engine.rollup.roll_up(cursor, now, template_ids)
+        template_ids = [change.id for change in changes]
+        result.bom_templates = len(template_ids)
+
+        product_ids = self.engine.update_end_products(cursor, now, template_ids)
+        result.end_products = len(product_ids)
+        if not product_ids:
+            return
+
+        budget_ids = self.engine.update_budget_items(
+            cursor, now, end_product_ids=list(product_ids)
+        )
+        if budget_ids:
+            result.production_budgets = self.engine.update_budget_totals(
+                cursor, now, list(budget_ids)
+            )
@@ -0,0 +1,160 @@
+# backend/app/core/utils/costing/report_cache.py
+"""
+Versioned budget report cache
+Responsibility: Cache computed production budget reports per tenant under a
+version that changes whenever the budget or a row it depends on changes.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from django.core.cache import cache
+from django.db import connection
+
+from ...textile_models import (
+    Provider,
+    ProductionBudget,
+    ProductionBudgetSnapshot,
+    ReportCacheState,
+    Unit,
+)
+from .engine import BOMCostEngine
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+@dataclass
+class CachedReport:
+    """A report payload and the version it was computed for"""
+    version: str
+    data: Any
+    hit: bool
+
+
+class ReportCache:
+    """
+    Tenant-scoped cache of budget reports.
+
+    Keys combine the tenant schema, budget id, report type and a version
+    made of two parts:
+
+    - a fingerprint of the budget's own rows: the budget, its items and
+      products, and the templates, BOM lines, providers, inputs and units
+      reachable through its sub-assemblies (counts and latest updated_at).
+      Model saves, bulk imports and the engine's set-based UPDATEs all
+      stamp updated_at, so a write only changes the version of the budgets
+      that depend on it;
+    - a tenant generation, bumped only by an explicit invalidate() for
+      writes that bypass updated_at (raw SQL, data fixes). It lives in
+      ReportCacheState, in Postgres, so the bump reaches every process.
+
+    Hit and miss counters are kept in the cache backend, so a cached read
+    never writes to the database.
+    """
+
+    def __init__(self, engine: BOMCostEngine = None):
+        self.engine = engine or BOMCostEngine()
+
+    @staticmethod
+    def _schema_name() -> str:
+        return getattr(connection, 'schema_name', 'public')
+
+    @classmethod
+    def _prefix(cls) -> str:
+        return f"report-cache:{cls._schema_name()}"
+
+    @classmethod
+    def _incr(cls, name: str) -> int:
+        key = f"{cls._prefix()}:{name}"
+        try:
+            return cache.incr(key)
+        except ValueError:
+            cache.add(key, 0, None)
+            return cache.incr(key)
+
+    @classmethod
+    def invalidate(cls) -> int:
+        """
+        Invalidate every cached report of the current tenant, in every
+        process. Only needed after writes that do not stamp updated_at.
+        """
+        table = ReportCacheState._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {table} (schema_name, generation) VALUES (%s, 1)
+                ON CONFLICT (schema_name) DO UPDATE SET generation = {table}.generation + 1
+                RETURNING generation
+            """, [cls._schema_name()])
+            return cursor.fetchone()[0]
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        """Hit and miss counters of the current tenant (per cache backend) and its generation"""
+        prefix = cls._prefix()
+        counters = cache.get_many([f"{prefix}:hits", f"{prefix}:misses"])
+        generation = (
+            ReportCacheState.objects.filter(schema_name=cls._schema_name())
+            .values_list('generation', flat=True).first()
+        )
+        return {
+            'hits': counters.get(f"{prefix}:hits", 0),
+            'misses': counters.get(f"{prefix}:misses", 0),
+            'generation': generation or 0,
+        }
+
+    def version(self, production_budget: ProductionBudget) -> str:
+        """Current version of everything the budget's reports read"""
+        engine = self.engine
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                WITH RECURSIVE budget_templates AS ({engine.budget_templates_cte()})
+                SELECT
+                    (SELECT updated_at FROM {engine.budget_table} WHERE id = %s),
+                    (SELECT id FROM {ProductionBudgetSnapshot._meta.db_table} WHERE production_budget_id = %s),
+                    (SELECT COUNT(*) || ':' || COALESCE(MAX(GREATEST(pbi.updated_at, ep.updated_at))::text, '')
+                     FROM {engine.budget_item_table} AS pbi
+                     JOIN {engine.end_product_table} AS ep ON ep.id = pbi.end_product_id
+                     WHERE pbi.production_budget_id = %s),
+                    (SELECT COUNT(*) || ':' || COALESCE(MAX(bt_row.updated_at)::text, '')
+                     FROM budget_templates AS bt
+                     JOIN {engine.bom_template_table} AS bt_row ON bt_row.id = bt.template_id),
+                    (SELECT COUNT(bi.id) || ':' || COALESCE(MAX(GREATEST(
+                                bi.updated_at, ip.updated_at, i.updated_at, pr.updated_at, u.updated_at
+                            ))::text, '')
+                     FROM budget_templates AS bt
+                     JOIN {engine.bom_item_table} AS bi ON bi.bom_template_id = bt.template_id
+                     LEFT JOIN {engine.input_provider_table} AS ip ON ip.id = bi.input_provider_id
+                     LEFT JOIN {engine.input_table} AS i ON i.id = bi.input_id
+                     LEFT JOIN {Provider._meta.db_table} AS pr ON pr.id = ip.provider_id
+                     LEFT JOIN {Unit._meta.db_table} AS u ON u.id = i.unit_id),
+                    (SELECT generation FROM {ReportCacheState._meta.db_table} WHERE schema_name = %s)
+            """, [production_budget.pk] * 4 + [self._schema_name()])
+            *parts, generation = cursor.fetchone()
+            fingerprint = '|'.join(str(value) for value in parts)
+
+        generation = generation or 0
+        digest = hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+        return f"{generation}-{digest}"
+
+    def get_or_build(self, production_budget: ProductionBudget, report_type: str,
+                     build: Callable[[], Any], as_of: Optional[datetime] = None,
+                     version: Optional[str] = None) -> CachedReport:
+        """
+        Return the cached report for the current version, building it on a
+        miss. Pass version when the caller already computed it.
+        """
+        version = version or self.version(production_budget)
+        variant = as_of.isoformat() if as_of is not None else 'current'
+        key = f"{self._prefix()}:{production_budget.pk}:{report_type}:{variant}:{version}"
+
+        data = cache.get(key)
+        if data is not None:
+            self._incr('hits')
+            return CachedReport(version, data, hit=True)
+
+        self._incr('misses')
+        data = build()
+        cache.set(key, data, CACHE_TIMEOUT)
+        return CachedReport(version, data, hit=False)
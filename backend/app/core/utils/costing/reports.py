@@ -0,0 +1,105 @@
+# backend/app/core/utils/costing/reports.py
+"""
+Budget report aggregates
+Responsibility: Compute production budget report figures in the database
+with exact Decimal arithmetic instead of accumulating rows in Python.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from django.db import connection
+
+from ...textile_models import (
+    Provider,
+    ProductionBudget,
+    ProductionBudgetSnapshot,
+    ProductionBudgetSnapshotItem,
+    ProductionBudgetSnapshotLine,
+)
+from .engine import BOMCostEngine
+
+
+@dataclass
+class ProviderCost:
+    """Cost of a production budget attributed to one provider"""
+    provider_name: str
+    total_cost: Decimal
+    materials: List[str] = field(default_factory=list)
+
+    def percentage(self, total_budget: Decimal) -> Decimal:
+        """Share of the budget total, in percent with one decimal"""
+        if total_budget <= 0:
+            return Decimal('0')
+        return (self.total_cost * 100 / total_budget).quantize(Decimal('0.1'))
+
+
+class BudgetReportAggregator:
+    """
+    Aggregate production budget reports with one grouped query each.
+
+    The budget's sub-assembly tree is walked with the engine's recursive
+    CTE, so every input line is weighted by the number of units the budget
+    needs of its template (planned quantity x sub-assembly quantities).
+    """
+
+    def __init__(self, engine: BOMCostEngine = None):
+        self.engine = engine or BOMCostEngine()
+
+    def provider_summary(self, production_budget: ProductionBudget,
+                         as_of: Optional[datetime] = None) -> List[ProviderCost]:
+        """
+        Cost and distinct material names per provider, most expensive first.
+        With as_of, line costs use the prices in effect at that moment.
+        """
+        engine = self.engine
+        params = [production_budget.pk]
+        if as_of is None:
+            line_cost = 'bi.line_cost_cop'
+            price_join = ''
+        else:
+            line_cost = 'COALESCE(ROUND(ph.price_per_unit_cop * bi.quantity, 2), 0)'
+            price_join = engine.price_as_of_join('ph', 'bi.input_provider_id')
+            params.append(as_of)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                WITH RECURSIVE budget_templates AS ({engine.budget_templates_cte()})
+                SELECT pr.name,
+                       SUM(bt.factor * {line_cost}) AS total_cost,
+                       ARRAY_AGG(DISTINCT i.name ORDER BY i.name)
+                FROM budget_templates AS bt
+                JOIN {engine.bom_item_table} AS bi
+                  ON bi.bom_template_id = bt.template_id AND bi.input_id IS NOT NULL
+                JOIN {engine.input_table} AS i ON i.id = bi.input_id
+                JOIN {engine.input_provider_table} AS ip ON ip.id = bi.input_provider_id
+                JOIN {Provider._meta.db_table} AS pr ON pr.id = ip.provider_id
+                {price_join}
+                GROUP BY pr.name
+                ORDER BY total_cost DESC, pr.name
+            """, params)
+            return self._provider_costs(cursor.fetchall())
+
+    def snapshot_provider_summary(self, snapshot: ProductionBudgetSnapshot) -> List[ProviderCost]:
+        """provider_summary read from the input lines of an approval snapshot"""
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT l.provider_name,
+                       SUM(l.line_cost_cop * l.multiplier * si.planned_quantity) AS total_cost,
+                       ARRAY_AGG(DISTINCT l.input_name ORDER BY l.input_name)
+                FROM {ProductionBudgetSnapshotLine._meta.db_table} AS l
+                JOIN {ProductionBudgetSnapshotItem._meta.db_table} AS si ON si.id = l.item_id
+                WHERE l.snapshot_id = %s AND NOT l.is_sub_assembly
+                GROUP BY l.provider_name
+                ORDER BY total_cost DESC, l.provider_name
+            """, [snapshot.pk])
+            return self._provider_costs(cursor.fetchall())
+
+    @staticmethod
+    def _provider_costs(rows) -> List[ProviderCost]:
+        return [
+            ProviderCost(provider_name, total_cost.quantize(Decimal('0.01')), list(materials))
+            for provider_name, total_cost, materials in rows
+        ]
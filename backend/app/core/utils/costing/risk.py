@@ -0,0 +1,183 @@
+# backend/app/core/utils/costing/risk.py
+"""
+Monte Carlo cost risk
+Responsibility: Estimate the distribution of a production budget's total
+cost under price uncertainty per input type, in memory.
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.db import connection
+
+from ...textile_models import ProductionBudget, Provider
+from .engine import BOMCostEngine
+from .exceptions import CostingError
+from .simulation import _to_money
+
+DISTRIBUTIONS = ('uniform', 'triangular', 'normal')
+
+# Draws are evaluated in batches to bound memory on large budgets
+SAMPLE_BATCH_SIZE = 2000
+
+
+@dataclass
+class PriceUncertainty:
+    """
+    Relative price uncertainty of every InputProvider of one input type, in
+    percent of the current price. uniform and triangular use
+    min_percent/max_percent (triangular also mode_percent); normal uses
+    std_percent around the current price.
+    """
+    distribution: str = 'uniform'
+    min_percent: Decimal = Decimal('0')
+    max_percent: Decimal = Decimal('0')
+    mode_percent: Decimal = Decimal('0')
+    std_percent: Decimal = Decimal('0')
+
+    def sample_factors(self, rng, size: int, columns: int) -> np.ndarray:
+        """Draw (size, columns) multiplicative price factors"""
+        low = float(self.min_percent) / 100
+        high = float(self.max_percent) / 100
+        if self.distribution == 'uniform':
+            changes = rng.uniform(low, high, (size, columns))
+        elif self.distribution == 'triangular':
+            if low == high:
+                changes = np.full((size, columns), low)
+            else:
+                changes = rng.triangular(low, float(self.mode_percent) / 100, high, (size, columns))
+        elif self.distribution == 'normal':
+            changes = rng.normal(0.0, float(self.std_percent) / 100, (size, columns))
+        else:
+            raise CostingError(f"Unknown price distribution '{self.distribution}'")
+        # A price can drop to zero but never below it
+        return np.maximum(1.0 + changes, 0.0)
+
+
+@dataclass
+class VarianceContributor:
+    """Share of the budget cost variance explained by one InputProvider"""
+    input_provider_id: int
+    input_name: str
+    provider_name: str
+    quantity: Decimal
+    variance_share: Decimal
+
+
+@dataclass
+class BudgetRiskResult:
+    """Cost percentiles and main variance drivers of a production budget"""
+    budget_id: int
+    samples: int
+    current_cost: Decimal
+    mean_cost: Decimal
+    percentiles: Dict[str, Decimal]
+    contributors: List[VarianceContributor] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+
+class BudgetRiskAnalyzer:
+    """
+    Monte Carlo analysis of a production budget's total cost.
+
+    The budget's BOM explosion is collapsed in SQL, over the templates the
+    budget reaches through its sub-assemblies, into a single vector of
+    total quantities per InputProvider, so each batch of samples is one
+    (samples x inputs) price matrix times that vector. Prices are drawn
+    independently per InputProvider.
+    """
+
+    def __init__(self, engine: BOMCostEngine = None):
+        self.engine = engine or BOMCostEngine()
+
+    def load_quantities(self, budget_id: int, as_of: Optional[datetime] = None) -> List[tuple]:
+        """
+        (input provider id, price, input type, input name, provider name,
+        total quantity) of every InputProvider the budget needs
+        """
+        engine = self.engine
+        price_column, price_join, params = 'ip.price_per_unit_cop', '', [budget_id]
+        if as_of is not None:
+            price_column = 'COALESCE(ph.price_per_unit_cop, 0)'
+            price_join = engine.price_as_of_join('ph', 'ip.id')
+            params.append(as_of)
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                WITH RECURSIVE budget_templates AS ({engine.budget_templates_cte()})
+                SELECT ip.id, {price_column}, i.input_type, i.name, pr.name,
+                       SUM(bt.factor * bi.quantity)
+                FROM budget_templates AS bt
+                JOIN {engine.bom_item_table} AS bi
+                  ON bi.bom_template_id = bt.template_id AND bi.input_provider_id IS NOT NULL
+                JOIN {engine.input_provider_table} AS ip ON ip.id = bi.input_provider_id
+                JOIN {engine.input_table} AS i ON i.id = ip.input_id
+                JOIN {Provider._meta.db_table} AS pr ON pr.id = ip.provider_id
+                {price_join}
+                GROUP BY ip.id, {price_column}, i.input_type, i.name, pr.name
+                ORDER BY ip.id
+            """, params)
+            return cursor.fetchall()
+
+    def analyze(self, budget_id: int, uncertainty: Dict[str, PriceUncertainty],
+                samples: int = 10000, seed: Optional[int] = None,
+                top: int = 10, as_of: Optional[datetime] = None) -> BudgetRiskResult:
+        """Return P50/P90/P99 of the budget total and its top variance contributors"""
+        started = time.perf_counter()
+        if not ProductionBudget.objects.filter(pk=budget_id).exists():
+            raise CostingError(f"Production budget {budget_id} does not exist")
+
+        # Total quantity of every InputProvider needed by the whole budget
+        rows = [row for row in self.load_quantities(budget_id, as_of) if row[5]]
+        quantities = np.array([float(row[5]) for row in rows], dtype=np.float64)
+        prices = np.array([float(row[1]) for row in rows], dtype=np.float64)
+        input_types = np.array([row[2] for row in rows], dtype=object)
+        weights = quantities * prices
+
+        rng = np.random.default_rng(seed)
+        totals = np.empty(samples)
+        sum_factors = np.zeros(len(rows))
+        sum_squares = np.zeros(len(rows))
+        for start in range(0, samples, SAMPLE_BATCH_SIZE):
+            size = min(SAMPLE_BATCH_SIZE, samples - start)
+            factors = np.ones((size, len(rows)))
+            for input_type, spec in uncertainty.items():
+                columns = np.flatnonzero(input_types == input_type)
+                if len(columns):
+                    factors[:, columns] = spec.sample_factors(rng, size, len(columns))
+            totals[start:start + size] = factors @ weights
+            sum_factors += factors.sum(axis=0)
+            sum_squares += (factors ** 2).sum(axis=0)
+
+        # Independent draws: the variance of the total is the sum of the
+        # per-input variances, each scaled by its squared cost weight.
+        factor_variance = sum_squares / samples - (sum_factors / samples) ** 2
+        contributions = np.maximum(factor_variance, 0.0) * weights ** 2
+        total_variance = contributions.sum()
+
+        contributors = []
+        if total_variance > 0:
+            ranked = [index for index in np.argsort(-contributions)[:top] if contributions[index] > 0]
+            for index in ranked:
+                input_provider_id, _, _, input_name, provider_name, _ = rows[index]
+                contributors.append(VarianceContributor(
+                    input_provider_id=input_provider_id,
+                    input_name=input_name,
+                    provider_name=provider_name,
+                    quantity=Decimal(str(round(float(quantities[index]), 3))),
+                    variance_share=_to_money(contributions[index] * 100 / total_variance),
+                ))
+
+        p50, p90, p99 = np.percentile(totals, [50, 90, 99]) if samples else (0.0, 0.0, 0.0)
+        return BudgetRiskResult(
+            budget_id=int(budget_id),
+            samples=samples,
+            current_cost=_to_money(weights.sum()),
+            mean_cost=_to_money(totals.mean() if samples else 0.0),
+            percentiles={'p50': _to_money(p50), 'p90': _to_money(p90), 'p99': _to_money(p99)},
+            contributors=contributors,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+        )
@@ -0,0 +1,217 @@
+# backend/app/core/utils/costing/rollup.py
+"""
+Multi-level BOM roll-up
+Responsibility: Cost BOM templates that contain sub-assemblies (other
+templates) in dependency order, computing each template exactly once.
+"""
+
+from collections import defaultdict, deque
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .exceptions import BOMCycleError
+
+CENT = Decimal('0.01')
+
+
+class BOMRollup:
+    """
+    Roll sub-assembly costs up the BOM graph.
+
+    The graph (parent template -> sub-assembly items) is loaded in one
+    query and ordered topologically, children first. Template costs are
+    memoized as they are computed, so every sub-assembly is costed once no
+    matter how many parents reference it, and the results are written back
+    with one bulk UPDATE per table.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def load_graph(self, cursor, template_ids: Optional[Iterable[int]] = None
+                   ) -> Dict[int, List[Tuple[int, int, Decimal]]]:
+        """
+        Return {parent template id: [(bom item id, sub template id, quantity), ...]},
+        for every template or only the parents in template_ids
+        """
+        template_filter, params = '', []
+        if template_ids is not None:
+            template_filter, params = 'AND bom_template_id = ANY(%s)', [list(template_ids)]
+        cursor.execute(f"""
+            SELECT id, bom_template_id, sub_template_id, quantity
+            FROM {self.engine.bom_item_table}
+            WHERE sub_template_id IS NOT NULL {template_filter}
+        """, params)
+        children = defaultdict(list)
+        for item_id, parent_id, child_id, quantity in cursor.fetchall():
+            children[parent_id].append((item_id, child_id, quantity))
+        return children
+
+    @staticmethod
+    def _parents(children) -> Dict[int, Set[int]]:
+        parents = defaultdict(set)
+        for parent_id, items in children.items():
+            for _, child_id, _ in items:
+                parents[child_id].add(parent_id)
+        return parents
+
+    def with_ancestors(self, children, template_ids: Iterable[int]) -> Set[int]:
+        """Return the given templates plus every template that uses them, at any depth"""
+        parents = self._parents(children)
+        result = set(template_ids)
+        pending = deque(result)
+        while pending:
+            for parent_id in parents.get(pending.popleft(), ()):
+                if parent_id not in result:
+                    result.add(parent_id)
+                    pending.append(parent_id)
+        return result
+
+    def with_descendants(self, children, template_ids: Iterable[int]) -> Set[int]:
+        """Return the given templates plus every sub-assembly they use, at any depth"""
+        result = set(template_ids)
+        pending = deque(result)
+        while pending:
+            for _, child_id, _ in children.get(pending.popleft(), ()):
+                if child_id not in result:
+                    result.add(child_id)
+                    pending.append(child_id)
+        return result
+
+    def topological_order(self, children, template_ids: Iterable[int]) -> List[int]:
+        """
+        Order templates so every sub-assembly comes before the templates
+        that use it. Sub-assemblies outside template_ids are treated as
+        already costed. Raises BOMCycleError if the graph has a cycle.
+        """
+        nodes = set(template_ids)
+        pending_children = {
+            node: len({child_id for _, child_id, _ in children.get(node, ()) if child_id in nodes})
+            for node in nodes
+        }
+        parents = self._parents(children)
+
+        ready = deque(sorted(node for node, count in pending_children.items() if count == 0))
+        order = []
+        while ready:
+            node = ready.popleft()
+            order.append(node)
+            for parent_id in parents.get(node, ()):
+                if parent_id in pending_children:
+                    pending_children[parent_id] -= 1
+                    if pending_children[parent_id] == 0:
+                        ready.append(parent_id)
+
+        if len(order) < len(nodes):
+            cyclic = sorted(node for node, count in pending_children.items() if count > 0)
+            raise BOMCycleError(f"Circular sub-assembly references between BOM templates {cyclic}")
+        return order
+
+    def dependency_order(self, cursor, template_ids: Iterable[int]) -> List[int]:
+        """Order template ids children-first, so they can be costed in chunks"""
+        return self.topological_order(self.load_graph(cursor), template_ids)
+
+    def compute_costs(self, cursor, children, targets: Optional[Set[int]] = None,
+                      from_prices: bool = False,
+                      as_of: Optional[datetime] = None) -> Tuple[Dict[int, Tuple[str, Decimal, Decimal]], Dict[int, Decimal]]:
+        """
+        Compute totals of the target templates (all when None) and their
+        sub-assembly line costs in memory.
+
+        Input lines are summed in SQL, either from their stored line cost,
+        with from_prices=True from the current provider prices, or with
+        as_of from the price in effect at that moment. Returns
+        ({template id: (name, old total, new total)}, {sub-assembly item id: line cost}),
+        with templates in name order.
+        """
+        params = []
+        price_join = ''
+        if as_of is not None:
+            line_expr = 'ROUND(ph.price_per_unit_cop * bi.quantity, 2)'
+            price_join = self.engine.price_as_of_join('ph', 'bi.input_provider_id')
+            params.append(as_of)
+        elif from_prices:
+            line_expr = 'ROUND(ip.price_per_unit_cop * bi.quantity, 2)'
+        else:
+            line_expr = 'bi.line_cost_cop'
+
+        # Sub-assemblies referenced by the targets are loaded too, so their
+        # stored totals can stand in for the ones we do not recompute.
+        template_filter = ''
+        if targets is not None:
+            needed = set(targets)
+            for template_id in targets:
+                needed.update(child_id for _, child_id, _ in children.get(template_id, ()))
+            template_filter = 'WHERE bt.id = ANY(%s)'
+            params.append(list(needed))
+
+        cursor.execute(f"""
+            SELECT bt.id, bt.name, bt.total_cost_cop,
+                   COALESCE(SUM({line_expr}) FILTER (WHERE bi.input_id IS NOT NULL), 0)
+            FROM {self.engine.bom_template_table} AS bt
+            LEFT JOIN {self.engine.bom_item_table} AS bi ON bi.bom_template_id = bt.id
+            LEFT JOIN {self.engine.input_provider_table} AS ip ON ip.id = bi.input_provider_id
+            {price_join}
+            {template_filter}
+            GROUP BY bt.id, bt.name, bt.total_cost_cop
+            ORDER BY bt.name, bt.id
+        """, params)
+        rows = cursor.fetchall()
+
+        names = {row[0]: row[1] for row in rows}
+        stored = {row[0]: row[2] for row in rows}
+        input_totals = {row[0]: row[3] for row in rows}
+        if targets is None:
+            targets = set(names)
+
+        memo = {}
+        line_costs = {}
+        for template_id in self.topological_order(children, targets):
+            total = input_totals.get(template_id, Decimal('0'))
+            for item_id, child_id, quantity in children.get(template_id, ()):
+                child_cost = memo[child_id] if child_id in memo else stored[child_id]
+                line_cost = (child_cost * quantity).quantize(CENT, rounding=ROUND_HALF_UP)
+                line_costs[item_id] = line_cost
+                total += line_cost
+            memo[template_id] = total
+
+        totals = {
+            template_id: (names[template_id], stored[template_id], memo[template_id])
+            for template_id in names if template_id in memo
+        }
+        return totals, line_costs
+
+    def roll_up(self, cursor, now: datetime, template_ids: Optional[List[int]] = None,
+                include_ancestors: bool = True):
+        """
+        Recompute sub-assembly line costs and template totals, assuming input
+        line costs are already current. With include_ancestors (the default)
+        every template that uses one of template_ids is recomputed as well.
+        Returns the TemplateCostChange list for every template touched.
+        """
+        children = self.load_graph(cursor)
+        if not children:
+            # Flat BOMs only: totals are a plain sum of input lines
+            return self.engine.update_template_totals(cursor, now, template_ids)
+
+        if template_ids is None:
+            targets = None
+        elif include_ancestors:
+            targets = self.with_ancestors(children, template_ids)
+        else:
+            targets = set(template_ids)
+
+        totals, line_costs = self.compute_costs(cursor, children, targets)
+
+        if line_costs:
+            cursor.execute(f"""
+                UPDATE {self.engine.bom_item_table} AS bi
+                SET line_cost_cop = costs.line_cost_cop,
+                    updated_at = %s
+                FROM unnest(%s::bigint[], %s::numeric[]) AS costs(id, line_cost_cop)
+                WHERE bi.id = costs.id
+            """, [now, list(line_costs), list(line_costs.values())])
+
+        touched = None if template_ids is None else list(totals)
+        return self.engine.update_template_totals(cursor, now, touched)
@@ -0,0 +1,321 @@
+# backend/app/core/utils/costing/simulation.py
+"""
+What-if price scenarios
+Responsibility: Estimate the effect of provider price changes on every end
+product and open production budget in memory, without writing to the database.
+"""
+
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.db import connection
+
+from .engine import BOMCostEngine
+
+CENT = Decimal('0.01')
+
+# Budgets in these states can still be affected by a price negotiation
+OPEN_BUDGET_STATUSES = ('draft', 'approved', 'in_progress')
+
+
+def _to_money(value: float) -> Decimal:
+    return Decimal(str(float(value))).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+@dataclass
+class PriceScenario:
+    """
+    Percentage price changes to apply, keyed by Input.input_type, Provider id
+    or InputProvider id. When several rules match the same InputProvider
+    their factors compound (fabric +12% and provider +5% gives +17.6%).
+    """
+    input_types: Dict[str, Decimal] = field(default_factory=dict)
+    providers: Dict[int, Decimal] = field(default_factory=dict)
+    input_providers: Dict[int, Decimal] = field(default_factory=dict)
+
+
+@dataclass
+class CostImpact:
+    """Current and simulated cost of a single product or budget"""
+    id: int
+    name: str
+    current_cost: Decimal
+    simulated_cost: Decimal
+
+    @property
+    def difference(self) -> Decimal:
+        return self.simulated_cost - self.current_cost
+
+    @property
+    def percent_change(self) -> Optional[Decimal]:
+        if not self.current_cost:
+            return None
+        return (self.difference * 100 / self.current_cost).quantize(CENT)
+
+
+@dataclass
+class ScenarioResult:
+    """Per-product and per-budget impact of a price scenario"""
+    end_products: List[CostImpact]
+    production_budgets: List[CostImpact]
+    elapsed_ms: float
+
+
+class SparseMatrix:
+    """
+    Matrix stored as (row, column, value) triplets. Products only touch the
+    stored entries, so memory grows with the BOM lines instead of with
+    rows x columns; repeated (row, column) pairs add up.
+    """
+
+    def __init__(self, rows: np.ndarray, columns: np.ndarray, values: np.ndarray, shape):
+        self.rows = rows
+        self.columns = columns
+        self.values = values
+        self.shape = shape
+
+    def dot(self, vector: np.ndarray) -> np.ndarray:
+        """matrix @ vector"""
+        return np.bincount(self.rows, weights=self.values * vector[self.columns], minlength=self.shape[0])
+
+    def transpose_dot(self, vector: np.ndarray) -> np.ndarray:
+        """vector @ matrix"""
+        return np.bincount(self.columns, weights=self.values * vector[self.rows], minlength=self.shape[1])
+
+    def row(self, index: int) -> np.ndarray:
+        """One row as a dense vector"""
+        selected = self.rows == index
+        return np.bincount(self.columns[selected], weights=self.values[selected], minlength=self.shape[1])
+
+
+class CostStructure:
+    """
+    Product x input-provider quantity structure of a tenant.
+
+    Sub-assemblies are flattened when the structure is loaded, so the cost
+    of every product for any price vector is a single sparse
+    matrix-vector product, and budget costs are a second one over the
+    product costs.
+    """
+
+    def __init__(self, input_provider_ids, prices, provider_ids, input_types,
+                 product_ids, product_names, quantities,
+                 budget_ids, budget_names, planned_quantities):
+        self.input_provider_ids = input_provider_ids
+        self.prices = prices
+        self.provider_ids = provider_ids
+        self.input_types = input_types
+        self.product_ids = product_ids
+        self.product_names = product_names
+        self.quantities = quantities
+        self.budget_ids = budget_ids
+        self.budget_names = budget_names
+        self.planned_quantities = planned_quantities
+        self._column = {pk: index for index, pk in enumerate(input_provider_ids.tolist())}
+
+    def price_factors(self, scenario: PriceScenario) -> np.ndarray:
+        """Multiplicative price factor for every input provider column"""
+        factors = np.ones(len(self.input_provider_ids))
+        for input_type, percent in scenario.input_types.items():
+            factors[self.input_types == input_type] *= 1 + float(percent) / 100
+        for provider_id, percent in scenario.providers.items():
+            factors[self.provider_ids == int(provider_id)] *= 1 + float(percent) / 100
+        for input_provider_id, percent in scenario.input_providers.items():
+            column = self._column.get(int(input_provider_id))
+            if column is not None:
+                factors[column] *= 1 + float(percent) / 100
+        return factors
+
+    def product_costs(self, prices: np.ndarray) -> np.ndarray:
+        return self.quantities.dot(prices)
+
+    def budget_costs(self, product_costs: np.ndarray) -> np.ndarray:
+        return self.planned_quantities.dot(product_costs)
+
+    def budget_quantities(self, budget_index: int) -> np.ndarray:
+        """Total quantity of every input provider one budget needs"""
+        return self.quantities.transpose_dot(self.planned_quantities.row(budget_index))
+
+
+class PriceScenarioSimulator:
+    """
+    Apply price scenarios to the tenant's cost structure.
+
+    load() reads the BOM structure once with a handful of queries; run()
+    can then be called for as many scenarios as needed and only does
+    array arithmetic. Nothing is ever written back.
+    """
+
+    def __init__(self, engine: BOMCostEngine = None):
+        self.engine = engine or BOMCostEngine()
+        self.structure = None
+
+    def load(self, budget_ids: Optional[List[int]] = None, as_of: Optional[datetime] = None) -> CostStructure:
+        """
+        Read prices, BOM lines, products and budgets into arrays. Budgets are
+        the open ones, with every end product, unless budget_ids selects
+        specific budgets, which only brings their products. Only templates
+        reachable from those products are read. Prices are the current ones
+        unless as_of selects the prices in effect then.
+        """
+        engine = self.engine
+        price_column, price_join, price_params = 'ip.price_per_unit_cop', '', []
+        if as_of is not None:
+            price_column = 'COALESCE(ph.price_per_unit_cop, 0)'
+            price_join = engine.price_as_of_join('ph', 'ip.id')
+            price_params = [as_of]
+        if budget_ids is None:
+            budget_filter, budget_params = 'pb.status = ANY(%s)', [list(OPEN_BUDGET_STATUSES)]
+            product_filter, product_params = 'TRUE', []
+        else:
+            budget_filter, budget_params = 'pb.id = ANY(%s)', [[int(pk) for pk in budget_ids]]
+            product_filter = f"""ep.id IN (
+                SELECT end_product_id FROM {engine.budget_item_table}
+                WHERE production_budget_id = ANY(%s)
+            )"""
+            product_params = budget_params
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT ep.id, ep.name, ep.bom_template_id
+                FROM {engine.end_product_table} AS ep
+                WHERE {product_filter}
+                ORDER BY ep.name, ep.id
+            """, product_params)
+            product_rows = cursor.fetchall()
+
+            # UNION stops at templates already reached, so a shared
+            # sub-assembly is listed once
+            cursor.execute(f"""
+                WITH RECURSIVE reachable AS (
+                    SELECT DISTINCT ep.bom_template_id AS template_id
+                    FROM {engine.end_product_table} AS ep
+                    WHERE {product_filter}
+                  UNION
+                    SELECT bi.sub_template_id
+                    FROM reachable AS r
+                    JOIN {engine.bom_item_table} AS bi ON bi.bom_template_id = r.template_id
+                    WHERE bi.sub_template_id IS NOT NULL
+                )
+                SELECT template_id FROM reachable
+            """, product_params)
+            template_ids = [row[0] for row in cursor.fetchall()]
+
+            cursor.execute(f"""
+                SELECT ip.id, {price_column}, ip.provider_id, i.input_type
+                FROM {engine.input_provider_table} AS ip
+                JOIN {engine.input_table} AS i ON i.id = ip.input_id
+                {price_join}
+                WHERE ip.id IN (
+                    SELECT input_provider_id FROM {engine.bom_item_table}
+                    WHERE input_provider_id IS NOT NULL AND bom_template_id = ANY(%s)
+                )
+                ORDER BY ip.id
+            """, price_params + [template_ids])
+            price_rows = cursor.fetchall()
+
+            cursor.execute(f"""
+                SELECT bom_template_id, input_provider_id, quantity
+                FROM {engine.bom_item_table}
+                WHERE input_provider_id IS NOT NULL AND bom_template_id = ANY(%s)
+            """, [template_ids])
+            line_rows = cursor.fetchall()
+
+            children = engine.rollup.load_graph(cursor, template_ids)
+
+            cursor.execute(f"""
+                SELECT pb.id, pb.name, pbi.end_product_id, pbi.planned_quantity
+                FROM {engine.budget_table} AS pb
+                LEFT JOIN {engine.budget_item_table} AS pbi ON pbi.production_budget_id = pb.id
+                WHERE {budget_filter}
+                ORDER BY pb.name, pb.id
+            """, budget_params)
+            budget_rows = cursor.fetchall()
+
+        input_provider_ids = np.array([row[0] for row in price_rows], dtype=np.int64)
+        prices = np.array([float(row[1]) for row in price_rows], dtype=np.float64)
+        provider_ids = np.array([row[2] for row in price_rows], dtype=np.int64)
+        input_types = np.array([row[3] for row in price_rows], dtype=object)
+        column = {pk: index for index, pk in enumerate(input_provider_ids.tolist())}
+
+        direct = defaultdict(lambda: ([], []))
+        for template_id, input_provider_id, quantity in line_rows:
+            columns, values = direct[template_id]
+            columns.append(column[input_provider_id])
+            values.append(float(quantity))
+
+        # Flattened (columns, quantities) of every template: its direct
+        # lines plus its sub-assemblies' entries, children first
+        flattened = {}
+        for template_id in engine.rollup.topological_order(children, template_ids):
+            columns, values = direct.get(template_id, ([], []))
+            columns = [np.array(columns, dtype=np.int64)]
+            values = [np.array(values, dtype=np.float64)]
+            for _, child_id, quantity in children.get(template_id, ()):
+                child_columns, child_values = flattened[child_id]
+                columns.append(child_columns)
+                values.append(float(quantity) * child_values)
+            columns, inverse = np.unique(np.concatenate(columns), return_inverse=True)
+            flattened[template_id] = (columns, np.bincount(inverse, weights=np.concatenate(values),
+                                                           minlength=len(columns)))
+
+        product_ids = np.array([row[0] for row in product_rows], dtype=np.int64)
+        product_names = [row[1] for row in product_rows]
+        entries = [flattened[row[2]] for row in product_rows]
+        quantities = SparseMatrix(
+            np.repeat(np.arange(len(entries), dtype=np.int64), [len(columns) for columns, _ in entries]),
+            np.concatenate([columns for columns, _ in entries] or [np.zeros(0, dtype=np.int64)]),
+            np.concatenate([values for _, values in entries] or [np.zeros(0)]),
+            (len(product_ids), len(input_provider_ids)),
+        )
+
+        budget_index = {}
+        budget_names = []
+        for budget_id, name, _, _ in budget_rows:
+            if budget_id not in budget_index:
+                budget_index[budget_id] = len(budget_index)
+                budget_names.append(name)
+        product_column = {pk: index for index, pk in enumerate(product_ids.tolist())}
+        planned_rows = [row for row in budget_rows if row[2] is not None]
+        planned_quantities = SparseMatrix(
+            np.array([budget_index[row[0]] for row in planned_rows], dtype=np.int64),
+            np.array([product_column[row[2]] for row in planned_rows], dtype=np.int64),
+            np.array([float(row[3]) for row in planned_rows], dtype=np.float64),
+            (len(budget_index), len(product_ids)),
+        )
+
+        self.structure = CostStructure(
+            input_provider_ids, prices, provider_ids, input_types,
+            product_ids, product_names, quantities,
+            np.array(list(budget_index), dtype=np.int64), budget_names, planned_quantities,
+        )
+        return self.structure
+
+    def run(self, scenario: PriceScenario) -> ScenarioResult:
+        """Return current and simulated costs for every product and open budget"""
+        started = time.perf_counter()
+        structure = self.structure or self.load()
+
+        current_products = structure.product_costs(structure.prices)
+        simulated_products = structure.product_costs(structure.prices * structure.price_factors(scenario))
+        current_budgets = structure.budget_costs(current_products)
+        simulated_budgets = structure.budget_costs(simulated_products)
+
+        end_products = [
+            CostImpact(int(pk), name, _to_money(current), _to_money(simulated))
+            for pk, name, current, simulated in zip(
+                structure.product_ids, structure.product_names, current_products, simulated_products
+            )
+        ]
+        production_budgets = [
+            CostImpact(int(pk), name, _to_money(current), _to_money(simulated))
+            for pk, name, current, simulated in zip(
+                structure.budget_ids, structure.budget_names, current_budgets, simulated_budgets
+            )
+        ]
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        return ScenarioResult(end_products, production_budgets, elapsed_ms)
@@ -0,0 +1,227 @@
+# backend/app/core/utils/costing/sourcing.py
+"""
+Provider re-sourcing
+Responsibility: Find the cheapest (or preferred within a tolerance)
+InputProvider for every input used in BOMs, preview the savings and
+re-point BOM items to it in bulk.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .engine import BOMCostEngine
+from .propagation import PriceChangePropagator
+
+
+@dataclass
+class LineReSourcing:
+    """A BOM item that would move to a cheaper InputProvider"""
+    bom_item_id: int
+    bom_template_id: int
+    input_id: int
+    current_input_provider_id: int
+    new_input_provider_id: int
+    current_line_cost: Decimal
+    new_line_cost: Decimal
+
+    @property
+    def savings(self) -> Decimal:
+        return self.current_line_cost - self.new_line_cost
+
+
+@dataclass
+class SourcingSavings:
+    """Savings of a single BOM template or production budget"""
+    id: int
+    name: str
+    current_cost: Decimal
+    savings: Decimal
+
+
+@dataclass
+class SourcingPlan:
+    """Line changes and their effect on templates and budgets"""
+    lines: List[LineReSourcing] = field(default_factory=list)
+    templates: List[SourcingSavings] = field(default_factory=list)
+    production_budgets: List[SourcingSavings] = field(default_factory=list)
+
+    @property
+    def total_line_savings(self) -> Decimal:
+        return sum((line.savings for line in self.lines), Decimal('0'))
+
+
+@dataclass
+class SourcingResult:
+    """Rows rewritten when a sourcing plan is applied"""
+    bom_items: int = 0
+    bom_templates: int = 0
+    end_products: int = 0
+    production_budgets: int = 0
+
+
+class ProviderSourcingOptimizer:
+    """
+    Re-source BOM items to the best InputProvider of their input.
+
+    The best provider of every input is chosen in one grouped query: the
+    cheapest price, or, with preferred_tolerance_percent, a preferred
+    provider whose price is within that percentage of the cheapest one.
+    Items only move when the new price is strictly lower than the price
+    they pin today.
+    """
+
+    def __init__(self, engine: BOMCostEngine = None):
+        self.engine = engine or BOMCostEngine()
+
+    def _candidates_sql(self, preferred_tolerance_percent: Optional[Decimal],
+                        template_ids: Optional[List[int]]) -> Tuple[str, list]:
+        """CTE selecting (bom item, best input provider) pairs that lower the line cost"""
+        engine = self.engine
+        params = []
+        if preferred_tolerance_percent is None:
+            candidate_filter = ''
+            ranking = 'price_per_unit_cop, id'
+        else:
+            candidate_filter = 'WHERE price_per_unit_cop <= cheapest * (1 + %s / 100.0)'
+            params.append(preferred_tolerance_percent)
+            ranking = 'is_preferred DESC, price_per_unit_cop, id'
+
+        template_filter = ''
+        if template_ids is not None:
+            template_filter = 'AND bi.bom_template_id = ANY(%s)'
+
+        sql = f"""
+            WITH priced AS (
+                SELECT id, input_id, price_per_unit_cop, is_preferred,
+                       MIN(price_per_unit_cop) OVER (PARTITION BY input_id) AS cheapest
+                FROM {engine.input_provider_table}
+                WHERE input_id IN (
+                    SELECT input_id FROM {engine.bom_item_table} WHERE input_id IS NOT NULL
+                )
+            ),
+            best AS (
+                SELECT DISTINCT ON (input_id) input_id, id, price_per_unit_cop
+                FROM priced
+                {candidate_filter}
+                ORDER BY input_id, {ranking}
+            ),
+            candidates AS (
+                SELECT bi.id AS bom_item_id, bi.bom_template_id, bi.input_id,
+                       bi.input_provider_id AS current_input_provider_id,
+                       best.id AS new_input_provider_id,
+                       bi.line_cost_cop AS current_line_cost,
+                       ROUND(best.price_per_unit_cop * bi.quantity, 2) AS new_line_cost
+                FROM {engine.bom_item_table} AS bi
+                JOIN {engine.input_provider_table} AS current ON current.id = bi.input_provider_id
+                JOIN best ON best.input_id = bi.input_id
+                WHERE best.id <> bi.input_provider_id
+                  AND best.price_per_unit_cop < current.price_per_unit_cop
+                  {template_filter}
+            )
+        """
+        if template_ids is not None:
+            params.append(template_ids)
+        return sql, params
+
+    def preview(self, preferred_tolerance_percent: Optional[Decimal] = None,
+                template_ids: Optional[Iterable[int]] = None) -> SourcingPlan:
+        """Return the line changes and the savings per template and production budget"""
+        template_ids = self.engine._normalize_ids(template_ids)
+        candidates_sql, params = self._candidates_sql(preferred_tolerance_percent, template_ids)
+
+        with connection.cursor() as cursor:
+            cursor.execute(candidates_sql + """
+                SELECT bom_item_id, bom_template_id, input_id, current_input_provider_id,
+                       new_input_provider_id, current_line_cost, new_line_cost
+                FROM candidates
+                ORDER BY bom_template_id, bom_item_id
+            """, params)
+            lines = [LineReSourcing(*row) for row in cursor.fetchall()]
+            if not lines:
+                return SourcingPlan()
+
+            # Savings flow up to every template using a re-sourced one
+            direct = defaultdict(Decimal)
+            for line in lines:
+                direct[line.bom_template_id] += line.savings
+            children = self.engine.rollup.load_graph(cursor)
+            affected = self.engine.rollup.with_ancestors(children, direct)
+            savings = {}
+            for template_id in self.engine.rollup.topological_order(children, affected):
+                total = direct.get(template_id, Decimal('0'))
+                for _, child_id, quantity in children.get(template_id, ()):
+                    total += savings.get(child_id, Decimal('0')) * quantity
+                savings[template_id] = total
+
+            templates = self._template_savings(cursor, savings)
+            budgets = self._budget_savings(cursor, savings)
+
+        return SourcingPlan(lines=lines, templates=templates, production_budgets=budgets)
+
+    def _template_savings(self, cursor, savings: Dict[int, Decimal]) -> List[SourcingSavings]:
+        cursor.execute(f"""
+            SELECT id, name, total_cost_cop
+            FROM {self.engine.bom_template_table}
+            WHERE id = ANY(%s)
+            ORDER BY name, id
+        """, [list(savings)])
+        return [
+            SourcingSavings(pk, name, total, savings[pk].quantize(Decimal('0.01')))
+            for pk, name, total in cursor.fetchall()
+        ]
+
+    def _budget_savings(self, cursor, savings: Dict[int, Decimal]) -> List[SourcingSavings]:
+        cursor.execute(f"""
+            SELECT pb.id, pb.name, pb.total_budget_cop, ep.bom_template_id, pbi.planned_quantity
+            FROM {self.engine.budget_item_table} AS pbi
+            JOIN {self.engine.budget_table} AS pb ON pb.id = pbi.production_budget_id
+            JOIN {self.engine.end_product_table} AS ep ON ep.id = pbi.end_product_id
+            WHERE ep.bom_template_id = ANY(%s)
+            ORDER BY pb.name, pb.id
+        """, [list(savings)])
+        budgets = {}
+        for pk, name, total, template_id, planned_quantity in cursor.fetchall():
+            budget = budgets.setdefault(pk, SourcingSavings(pk, name, total, Decimal('0')))
+            budget.savings += savings[template_id] * planned_quantity
+        for budget in budgets.values():
+            budget.savings = budget.savings.quantize(Decimal('0.01'))
+        return list(budgets.values())
+
+    def apply(self, preferred_tolerance_percent: Optional[Decimal] = None,
+              template_ids: Optional[Iterable[int]] = None) -> SourcingResult:
+        """
+        Re-point every candidate BOM item in one UPDATE, then propagate the
+        affected templates to products and budgets with PriceChangePropagator.
+        """
+        template_ids = self.engine._normalize_ids(template_ids)
+        candidates_sql, params = self._candidates_sql(preferred_tolerance_percent, template_ids)
+        result = SourcingResult()
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(candidates_sql + f"""
+                    UPDATE {self.engine.bom_item_table} AS bi
+                    SET input_provider_id = candidates.new_input_provider_id,
+                        line_cost_cop = candidates.new_line_cost,
+                        updated_at = %s
+                    FROM candidates
+                    WHERE bi.id = candidates.bom_item_id
+                    RETURNING bi.bom_template_id
+                """, params + [timezone.now()])
+                rows = cursor.fetchall()
+            result.bom_items = len(rows)
+
+            # The re-pointed lines already carry their new cost
+            propagation = PriceChangePropagator(self.engine).propagate_template_totals(
+                {row[0] for row in rows}
+            )
+            result.bom_templates = propagation.bom_templates
+            result.end_products = propagation.end_products
+            result.production_budgets = propagation.production_budgets
+
+        return result
@@ -6,8 +6,20 @@ Responsibility: Centralized CSV operations for all textile models
 
 from .base import AbstractCSVImporter, AbstractCSVExporter
 from .exceptions import CSVImportError, CSVExportError, CSVValidationError
-from .importers import ProviderCSVImporter
+from .importers import (
+    BOMItemCSVImporter,
+    BOMTemplateCSVImporter,
+    CSV_IMPORTERS,
+    EndProductCSVImporter,
+    InputCSVImporter,
+    InputProviderCSVImporter,
+    ProviderCSVImporter,
+)
+from .lookups import NameLookup
+from .rejects import RejectedRows, open_rejected_rows, store_rejected_rows
 from .exporters import ProviderCSVExporter
+from .reports import BudgetReportCSVExporter
+from .streaming import streaming_csv_response
 
 __all__ = [
     'AbstractCSVImporter',
@@ -16,5 +28,17 @@ __all__ = [
     'CSVExportError',
     'CSVValidationError',
     'ProviderCSVImporter',
+    'InputCSVImporter',
+    'InputProviderCSVImporter',
+    'BOMTemplateCSVImporter',
+    'BOMItemCSVImporter',
+    'EndProductCSVImporter',
+    'CSV_IMPORTERS',
+    'NameLookup',
+    'RejectedRows',
+    'store_rejected_rows',
+    'open_rejected_rows',
     'ProviderCSVExporter',
+    'BudgetReportCSVExporter',
+    'streaming_csv_response',
 ]
\ No newline at end of file
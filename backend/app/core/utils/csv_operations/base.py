@@ -3,26 +3,111 @@
 Abstract base classes for CSV import/export operations
 """
 
+import codecs
+import copy
 import csv
+import hashlib
 import io
+import itertools
+import logging
+import multiprocessing
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional, Union, Iterator
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple, Union, Iterable, Iterator
 from django.db import models, transaction
+from django.utils import timezone
 from django.core.exceptions import ValidationError
 from .exceptions import CSVImportError, CSVExportError, CSVValidationError
+from .rejects import RejectedRows, classify_error
+
+logger = logging.getLogger(__name__)
+
+
+# Importer used by the validation worker processes, set by _init_worker
+_worker_importer = None
+
+@dataclass
+class ColumnPlan:
+    """Header of one file resolved to (model field, column index) pairs"""
+    columns: Tuple[Tuple[str, int], ...] = ()
+    unknown: List[str] = field(default_factory=list)
+
+
+# Merge index values for keys that do not match exactly one existing record
+_MATCHED_IN_FILE = 0
+_AMBIGUOUS = -1
+
+
+def _init_worker(importer):
+    global _worker_importer
+    _worker_importer = importer
+
+
+def _prepare_chunk(entries):
+    """Map and validate a chunk of (line_number, row) pairs in a worker process"""
+    prepared = []
+    for line_number, row in entries:
+        line_number, validated_data, error = _worker_importer.prepare_row(line_number, row)
+        if error is not None and not isinstance(error, (CSVValidationError, ValidationError)):
+            # Arbitrary exceptions may not pickle; only their message is reported
+            error = Exception(str(error))
+        prepared.append((line_number, validated_data, error))
+    return prepared
 
 
 class AbstractCSVImporter(ABC):
     """
     Abstract base class for CSV import operations
+    
+    Valid rows are persisted in batches of batch_size with a single
+    bulk_create per batch. When a batch fails it is retried row by row, so
+    only the offending lines are reported as errors.
+    
+    In merge mode rows matching an existing record on duplicate_key_fields
+    update it instead: the changed fields are diffed in memory and written
+    with one bulk_update per batch. Empty cells keep the current value.
     """
     
-    def __init__(self, model_class: models.Model, batch_size: int = 100):
+    # Persist batches with bulk_create; disable for models whose save()
+    # has side effects the import relies on
+    use_bulk_create = True
+    
+    # Model fields identifying a duplicate; compared case-insensitively
+    # against the table and the rows accepted earlier in the same file
+    duplicate_key_fields: List[str] = ['name']
+    
+    # Files are decoded and parsed incrementally in chunks of this many
+    # bytes; the dialect is sniffed from the first sniff_size characters
+    read_chunk_size = 64 * 1024
+    sniff_size = 1024
+    
+    # Rows sent to a validation worker per task when workers > 1
+    parallel_chunk_size = 2000
+    
+    # Rows between two calls of progress_callback, if one is set
+    progress_interval = 1000
+    
+    # Error messages returned inline; every rejected row still goes to the
+    # rejected rows file
+    max_inline_errors = 100
+    
+    def __init__(self, model_class: models.Model, batch_size: int = 100, workers: int = 1):
         self.model_class = model_class
         self.batch_size = batch_size
-        self.errors = []
+        self.workers = workers
+        self.rejects = RejectedRows(self.max_inline_errors)
+        self.errors = self.rejects.messages
+        self.processed_count = 0
         self.imported_count = 0
+        self.updated_count = 0
+        self.unchanged_count = 0
         self.skipped_count = 0
+        self.duplicate_index = None
+        self.merge_index = None
+        self.column_plan = ColumnPlan()
+        self.progress_callback = None
         
     @abstractmethod
     def get_field_mapping(self) -> Dict[str, str]:
@@ -57,143 +142,515 @@ class AbstractCSVImporter(ABC):
             # Default to excel dialect
             return csv.excel
     
-    def read_csv(self, file_content: Union[str, bytes, io.StringIO]) -> Iterator[Dict[str, str]]:
+    def iter_text_chunks(self, file_content) -> Iterator[str]:
         """
-        Read CSV content and yield rows as dictionaries
+        Yield the content as decoded text chunks. Accepts str, bytes,
+        Django uploaded files (read through chunks()) and text or binary
+        file objects; bytes are decoded incrementally as UTF-8 (BOM removed).
         """
-        if isinstance(file_content, bytes):
-            file_content = file_content.decode('utf-8')
+        if isinstance(file_content, (str, bytes)):
+            chunks = [file_content]
+        elif hasattr(file_content, 'chunks'):
+            chunks = file_content.chunks(self.read_chunk_size)
+        else:
+            chunks = iter(lambda: file_content.read(self.read_chunk_size), file_content.read(0))
         
-        if isinstance(file_content, str):
-            file_content = io.StringIO(file_content)
+        decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        for chunk in chunks:
+            text = decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                yield text
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+    
+    @staticmethod
+    def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Re-split text chunks into lines (newline kept) for csv.reader,
+        which carries quoted fields across lines itself
+        """
+        pending = ''
+        for chunk in chunks:
+            lines = (pending + chunk).split('\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line + '\n'
+        if pending:
+            yield pending
+    
+    def read_rows(self, file_content: Union[str, bytes, io.IOBase]) -> Iterator[List[str]]:
+        """
+        Read CSV content and yield rows as lists of strings, header first,
+        streaming so only the current chunk is held in memory. Blank lines
+        are dropped.
+        """
+        chunks = self.iter_text_chunks(file_content)
         
         # Read sample to detect dialect
-        sample = file_content.read(1024)
-        file_content.seek(0)
+        head = []
+        sample = ''
+        for chunk in chunks:
+            head.append(chunk)
+            sample += chunk
+            if len(sample) >= self.sniff_size:
+                break
         
-        dialect = self.get_csv_dialect(sample)
-        reader = csv.DictReader(file_content, dialect=dialect)
+        dialect = self.get_csv_dialect(sample[:self.sniff_size])
+        reader = csv.reader(self.iter_lines(itertools.chain(head, chunks)), dialect=dialect)
         
         for row in reader:
-            yield row
+            if row:
+                yield row
     
-    def map_row_data(self, row: Dict[str, str]) -> Dict[str, Any]:
+    def compile_column_plan(self, header: List[str]) -> ColumnPlan:
         """
-        Map CSV row data to model fields based on field mapping
+        Resolve the header once per file: every column is matched
+        (case-insensitively) against the field mapping aliases. Raises
+        CSVImportError when two columns map to the same field or none is
+        recognized; other unknown columns are reported and ignored.
+        """
+        aliases = {alias.casefold(): field for alias, field in self.get_field_mapping().items()}
+        positions = {}
+        unknown = []
+        ambiguous = []
+        
+        for index, column in enumerate(header):
+            column = column.strip()
+            field = aliases.get(column.casefold())
+            if field is None:
+                if column:
+                    unknown.append(column)
+            elif field in positions:
+                ambiguous.append(f"'{positions[field][1]}' and '{column}' both map to {field}")
+            else:
+                positions[field] = (index, column)
+        
+        if ambiguous:
+            raise CSVImportError(f"Ambiguous columns: {'; '.join(ambiguous)}", line_number=1)
+        if header and not positions:
+            raise CSVImportError(
+                f"No recognized columns in header: {', '.join(unknown)}",
+                line_number=1
+            )
+        return ColumnPlan(
+            columns=tuple((field, index) for field, (index, _) in positions.items()),
+            unknown=unknown,
+        )
+    
+    def map_row_data(self, row: List[str]) -> Dict[str, Any]:
+        """
+        Map a CSV row to model fields through the compiled column plan
         """
-        field_mapping = self.get_field_mapping()
         mapped_data = {}
+        width = len(row)
         
-        for csv_field, model_field in field_mapping.items():
-            if csv_field in row:
-                value = row[csv_field].strip() if row[csv_field] else None
+        for model_field, index in self.column_plan.columns:
+            if index < width:
+                value = row[index].strip()
                 if value:  # Only include non-empty values
                     mapped_data[model_field] = value
         
         return mapped_data
     
-    def check_duplicates(self, validated_data: Dict[str, Any]) -> Optional[models.Model]:
+    @staticmethod
+    def duplicate_key(values) -> bytes:
         """
-        Check if record already exists. Override in subclasses for custom logic.
-        Default implementation checks by 'name' field if it exists.
+        Normalized, fixed-size key of a record: the casefolded values
+        hashed to 16 bytes, so the index stays small whatever the length
+        of the names
         """
-        if 'name' in validated_data:
-            try:
-                return self.model_class.objects.get(name=validated_data['name'])
-            except self.model_class.DoesNotExist:
-                pass
-        return None
+        normalized = '\x1f'.join(str(value or '').strip().casefold() for value in values)
+        return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).digest()
+    
+    def has_duplicate_key(self) -> bool:
+        model_fields = set()
+        for field in self.model_class._meta.concrete_fields:
+            model_fields.update((field.name, field.attname))
+        return bool(self.duplicate_key_fields) and set(self.duplicate_key_fields) <= model_fields
+    
+    def record_key(self, validated_data: Dict[str, Any]) -> bytes:
+        return self.duplicate_key(validated_data.get(field) for field in self.duplicate_key_fields)
+    
+    def load_duplicate_index(self) -> Optional[set]:
+        """
+        Preload the keys of existing records with a single query. Returns
+        None when the model has no duplicate key fields.
+        """
+        if not self.has_duplicate_key():
+            return None
+        rows = self.model_class.objects.values_list(*self.duplicate_key_fields).iterator(chunk_size=5000)
+        return {self.duplicate_key(row) for row in rows}
     
-    def import_csv(self, file_content: Union[str, bytes, io.StringIO], 
+    def load_merge_index(self) -> Dict[bytes, int]:
+        """
+        Preload key -> primary key of existing records with a single query;
+        keys shared by several records are marked ambiguous
+        """
+        if not self.has_duplicate_key():
+            raise CSVImportError(f"{self.model_class.__name__} has no natural key to merge on")
+        index = {}
+        rows = self.model_class.objects.values_list('pk', *self.duplicate_key_fields).iterator(chunk_size=5000)
+        for pk, *values in rows:
+            key = self.duplicate_key(values)
+            index[key] = _AMBIGUOUS if key in index else pk
+        return index
+    
+    def check_duplicates(self, validated_data: Dict[str, Any]) -> bool:
+        """
+        Whether the row duplicates an existing record or a row accepted
+        earlier in the file. Accepted rows are added to the index.
+        """
+        if self.duplicate_index is None:
+            return False
+        key = self.record_key(validated_data)
+        if key in self.duplicate_index:
+            return True
+        self.duplicate_index.add(key)
+        return False
+    
+    def match_existing(self, validated_data: Dict[str, Any]) -> Optional[int]:
+        """
+        Merge mode: primary key of the existing record the row updates, or
+        None for a new record. Rows whose key already appeared earlier in
+        the file are skipped (the first one wins).
+        """
+        key = self.record_key(validated_data)
+        match = self.merge_index.get(key)
+        if match == _AMBIGUOUS:
+            raise CSVValidationError("Row matches more than one existing record")
+        self.merge_index[key] = _MATCHED_IN_FILE
+        if match == _MATCHED_IN_FILE:
+            return _MATCHED_IN_FILE
+        return match
+    
+    def prepare_import(self):
+        """
+        Hook run once before the rows are read, e.g. to preload foreign key
+        lookup maps. Runs before the validation workers are forked, so
+        whatever it loads is available to validate_row.
+        """
+        pass
+    
+    def on_batch_saved(self, instances: List[models.Model]):
+        """Hook run with every group of instances just inserted (primary keys set)"""
+        pass
+    
+    def on_batch_updated(self, instances: List[models.Model], fields: List[str]):
+        """Hook run with every group of instances just updated in merge mode"""
+        pass
+    
+    def finish_import(self):
+        """
+        Hook run once after the last batch when anything was imported, for
+        set-based work that would otherwise run per row (cost recalculation)
+        """
+        pass
+    
+    def progress(self) -> Dict[str, int]:
+        """Counters of the running import"""
+        return {
+            'processed_count': self.processed_count,
+            'imported_count': self.imported_count,
+            'updated_count': self.updated_count,
+            'unchanged_count': self.unchanged_count,
+            'skipped_count': self.skipped_count,
+            'error_count': self.rejects.count,
+        }
+    
+    def report_progress(self):
+        if self.progress_callback is not None:
+            self.progress_callback(self.progress())
+    
+    def reject(self, line_number: int, row: Optional[List[str]], error: Exception,
+               message: Optional[str] = None):
+        """Record a rejected row: inline message, summary and rejected rows file"""
+        error_type, field = classify_error(error)
+        self.rejects.add(line_number, str(error) if message is None else message, row,
+                         error_type=error_type, field=field)
+    
+    def prepare_row(self, line_number: int, row: List[str]) -> tuple:
+        """
+        Map and validate one parsed row. Returns (line_number, validated_data,
+        error); validated_data is None for empty rows. Must not touch the
+        database: with workers > 1 it runs in the worker processes.
+        """
+        try:
+            mapped_data = self.map_row_data(row)
+            if not mapped_data:
+                return line_number, None, None
+            return line_number, self.validate_row(mapped_data, line_number), None
+        except Exception as e:
+            return line_number, None, e
+    
+    def prepared_rows(self, rows: Iterator[tuple]) -> Iterator[tuple]:
+        """
+        Run prepare_row over (line_number, row) pairs, in file order, and
+        yield (line_number, row, validated_data, error). With workers > 1
+        the rows are sharded in chunks across a forked process pool; at most
+        two chunks per worker are in flight, so memory stays bounded, and
+        results are consumed in submission order.
+        """
+        if self.workers <= 1:
+            for line_number, row in rows:
+                yield (line_number, row) + self.prepare_row(line_number, row)[1:]
+            return
+        
+        # The workers only need the validation rules, not the import state
+        worker_importer = copy.copy(self)
+        worker_importer.duplicate_index = None
+        worker_importer.merge_index = None
+        worker_importer.rejects = worker_importer.errors = None
+        
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 mp_context=multiprocessing.get_context('fork'),
+                                 initializer=_init_worker,
+                                 initargs=(worker_importer,)) as executor:
+            while True:
+                chunk = list(itertools.islice(rows, self.parallel_chunk_size))
+                if chunk:
+                    pending.append((chunk, executor.submit(_prepare_chunk, chunk)))
+                if pending and (not chunk or len(pending) >= self.workers * 2):
+                    # Raw rows stay in this process for the rejected rows file
+                    chunk_rows, future = pending.popleft()
+                    for (_, row), (line_number, validated_data, error) in zip(chunk_rows, future.result()):
+                        yield line_number, row, validated_data, error
+                if not chunk and not pending:
+                    return
+    
+    def import_csv(self, file_content: Union[str, bytes, io.IOBase], 
                    validate_only: bool = False, 
                    skip_duplicates: bool = True,
-                   continue_on_error: bool = True) -> Dict[str, Any]:
+                   continue_on_error: bool = True,
+                   merge: bool = False) -> Dict[str, Any]:
         """
-        Import data from CSV content
+        Import data from CSV content: a string, bytes, an uploaded file or
+        an open file, consumed as a stream. With merge, rows matching an
+        existing record update it (skip_duplicates is then ignored).
+        
+        Only the first max_inline_errors messages are returned; the result
+        summarizes all errors by type and field, and self.rejects holds
+        every rejected row for store_rejected_rows.
         """
-        self.errors = []
+        self.rejects = RejectedRows(self.max_inline_errors)
+        self.errors = self.rejects.messages
+        self.processed_count = 0
         self.imported_count = 0
+        self.updated_count = 0
+        self.unchanged_count = 0
         self.skipped_count = 0
+        self.merge_index = self.load_merge_index() if merge else None
+        self.duplicate_index = self.load_duplicate_index() if skip_duplicates and not merge else None
+        self.prepare_import()
         
         instances_to_create = []
+        pending_updates = []
         line_number = 1  # Start from 1 (header is line 0)
         
         try:
-            for row in self.read_csv(file_content):
-                line_number += 1
+            rows = self.read_rows(file_content)
+            header = next(rows, [])
+            self.column_plan = self.compile_column_plan(header)
+            self.rejects.start(header)
+            rows = enumerate(rows, start=line_number + 1)
+            for line_number, row, validated_data, error in self.prepared_rows(rows):
+                self.processed_count += 1
+                if self.processed_count % self.progress_interval == 0:
+                    self.report_progress()
                 
                 try:
-                    # Map CSV fields to model fields
-                    mapped_data = self.map_row_data(row)
+                    # Mapping and validation errors surface here, in file order
+                    if error is not None:
+                        raise error
                     
-                    if not mapped_data:
+                    if validated_data is None:
                         self.skipped_count += 1
                         continue
                     
-                    # Validate row data
-                    validated_data = self.validate_row(mapped_data, line_number)
-                    
-                    # Check for duplicates
-                    if skip_duplicates:
-                        existing = self.check_duplicates(validated_data)
-                        if existing:
+                    if merge:
+                        match = self.match_existing(validated_data)
+                        if match == _MATCHED_IN_FILE:
                             self.skipped_count += 1
                             continue
+                        if match is not None:
+                            pending_updates.append((line_number, match, validated_data, row))
+                            if len(pending_updates) >= self.batch_size:
+                                self._batch_update(pending_updates, validate_only, continue_on_error)
+                                pending_updates = []
+                            continue
                     
-                    if not validate_only:
-                        # Create instance
-                        instance = self.create_instance(validated_data)
-                        instances_to_create.append(instance)
-                        
-                        # Batch create when batch size is reached
-                        if len(instances_to_create) >= self.batch_size:
-                            self._batch_create(instances_to_create)
-                            instances_to_create = []
+                    # Check for duplicates
+                    elif skip_duplicates and self.check_duplicates(validated_data):
+                        self.skipped_count += 1
+                        continue
+                    
+                    if validate_only:
+                        self.imported_count += 1
+                        continue
                     
-                    self.imported_count += 1
+                    # Create instance; imported_count grows once it is saved
+                    instance = self.create_instance(validated_data)
+                    instances_to_create.append((line_number, instance, row))
                     
+                    # Batch create when batch size is reached
+                    if len(instances_to_create) >= self.batch_size:
+                        self._batch_create(instances_to_create, continue_on_error)
+                        instances_to_create = []
+                    
+                except CSVImportError:
+                    raise
+                
                 except (CSVValidationError, ValidationError) as e:
-                    error_msg = f"Line {line_number}: {str(e)}"
-                    self.errors.append(error_msg)
+                    self.reject(line_number, row, e)
                     
                     if not continue_on_error:
                         raise CSVImportError(f"Import failed at line {line_number}: {str(e)}", 
                                            line_number=line_number, errors=self.errors)
                 
                 except Exception as e:
-                    error_msg = f"Line {line_number}: Unexpected error - {str(e)}"
-                    self.errors.append(error_msg)
+                    self.reject(line_number, row, e, f"Unexpected error - {str(e)}")
                     
                     if not continue_on_error:
-                        raise CSVImportError(error_msg, line_number=line_number, errors=self.errors)
+                        raise CSVImportError(f"Line {line_number}: Unexpected error - {str(e)}",
+                                             line_number=line_number, errors=self.errors)
             
-            # Create remaining instances
+            # Create and update remaining instances
             if not validate_only and instances_to_create:
-                self._batch_create(instances_to_create)
+                self._batch_create(instances_to_create, continue_on_error)
+            if pending_updates:
+                self._batch_update(pending_updates, validate_only, continue_on_error)
                 
         except CSVImportError:
             raise
         except Exception as e:
             raise CSVImportError(f"Failed to process CSV: {str(e)}", errors=self.errors)
+        finally:
+            # Batches already saved still need their derived data
+            if not validate_only and (self.imported_count or self.updated_count):
+                self.finish_import()
         
+        self.report_progress()
         return {
+            'processed_count': self.processed_count,
             'imported_count': self.imported_count,
+            'updated_count': self.updated_count,
+            'unchanged_count': self.unchanged_count,
             'skipped_count': self.skipped_count,
-            'error_count': len(self.errors),
+            'error_count': self.rejects.count,
             'errors': self.errors,
-            'validate_only': validate_only
+            'errors_truncated': self.rejects.truncated,
+            'error_summary': self.rejects.summary_list(),
+            'rejected_rows': self.rejects.has_rows,
+            'validate_only': validate_only,
+            'merge': merge,
+            'unknown_columns': self.column_plan.unknown,
         }
     
-    def _batch_create(self, instances: List[models.Model]):
+    def bulk_insert(self, instances: List[models.Model]):
+        """
+        Insert a batch with one INSERT. Without ON CONFLICT, PostgreSQL
+        returns the new primary keys, which on_batch_saved relies on; rows
+        that already exist are skipped by the duplicate index or updated by
+        merge, and a unique violation fails the batch into the row by row
+        fallback, which reports the offending line.
+        """
+        self.model_class.objects.bulk_create(instances)
+    
+    def _batch_create(self, entries: List[tuple], continue_on_error: bool = True):
+        """
+        Persist (line_number, instance, row) entries with one bulk INSERT. If the
+        batch fails, retry it row by row (each row in its own savepoint) so
+        the failing lines are reported and the rest are still saved.
+        """
+        if self.use_bulk_create:
+            instances = [instance for _, instance, _ in entries]
+            try:
+                with transaction.atomic():
+                    self.bulk_insert(instances)
+            except Exception as e:
+                logger.warning(f"CSV import batch of lines {entries[0][0]}-{entries[-1][0]} failed, "
+                               f"retrying row by row: {str(e)}")
+            else:
+                self.imported_count += len(entries)
+                self.on_batch_saved(instances)
+                return
+        
+        for line_number, instance, row in entries:
+            try:
+                with transaction.atomic():
+                    if self.use_bulk_create:
+                        self.bulk_insert([instance])
+                    else:
+                        instance.save()
+            except Exception as e:
+                self.reject(line_number, row, e, str(e))
+                
+                if not continue_on_error:
+                    raise CSVImportError(f"Failed to save batch: Line {line_number}: {str(e)}",
+                                         line_number=line_number, errors=self.errors)
+            else:
+                self.imported_count += 1
+                self.on_batch_saved([instance])
+
+
+    def _batch_update(self, entries: List[tuple], validate_only: bool = False,
+                      continue_on_error: bool = True):
         """
-        Create instances in batch using database transaction
+        Merge (line_number, pk, validated_data, row) entries into their records:
+        load them with one query, keep only the fields whose value changed
+        and write them with one bulk_update (row by row in savepoints if
+        the batch fails). With validate_only nothing is written.
         """
+        records = self.model_class.objects.in_bulk([pk for _, pk, _, _ in entries])
+        now = timezone.now()
+        changed = []
+        for line_number, pk, validated_data, row in entries:
+            instance = records.get(pk)
+            if instance is None:
+                self.rejects.add(line_number, "Record was deleted during the import", row,
+                                 error_type='database')
+                continue
+            fields = [field for field, value in validated_data.items() if getattr(instance, field) != value]
+            if not fields:
+                self.unchanged_count += 1
+                continue
+            for field in fields:
+                setattr(instance, field, validated_data[field])
+            # bulk_update does not apply auto_now
+            instance.updated_at = now
+            changed.append((line_number, instance, fields + ['updated_at'], row))
+        
+        if validate_only or not changed:
+            self.updated_count += len(changed)
+            return
+        
+        instances = [instance for _, instance, _, _ in changed]
+        fields = sorted({field for _, _, instance_fields, _ in changed for field in instance_fields})
         try:
             with transaction.atomic():
-                for instance in instances:
-                    instance.save()
+                self.model_class.objects.bulk_update(instances, fields)
         except Exception as e:
-            raise CSVImportError(f"Failed to save batch: {str(e)}")
+            logger.warning(f"CSV import update batch of lines {changed[0][0]}-{changed[-1][0]} failed, "
+                           f"retrying row by row: {str(e)}")
+        else:
+            self.updated_count += len(instances)
+            self.on_batch_updated(instances, fields)
+            return
+        
+        for line_number, instance, instance_fields, row in changed:
+            try:
+                with transaction.atomic():
+                    self.model_class.objects.bulk_update([instance], instance_fields)
+            except Exception as e:
+                self.reject(line_number, row, e, str(e))
+                
+                if not continue_on_error:
+                    raise CSVImportError(f"Failed to update batch: Line {line_number}: {str(e)}",
+                                         line_number=line_number, errors=self.errors)
+            else:
+                self.updated_count += 1
+                self.on_batch_updated([instance], instance_fields)
 
 
 class AbstractCSVExporter(ABC):
@@ -201,8 +658,13 @@ class AbstractCSVExporter(ABC):
     Abstract base class for CSV export operations
     """
     
+    # Rows fetched per database round trip and rows per streamed chunk
+    chunk_size = 2000
+    rows_per_chunk = 500
+    
     def __init__(self, model_class: models.Model):
         self.model_class = model_class
+        self.exported_count = 0
     
     @abstractmethod
     def get_export_fields(self) -> List[str]:
@@ -231,12 +693,10 @@ class AbstractCSVExporter(ABC):
         
         return queryset.order_by('id')
     
-    def format_field_value(self, instance: models.Model, field_name: str) -> str:
+    def format_value(self, field_name: str, value: Any) -> str:
         """
-        Format field value for CSV export. Override for custom formatting.
+        Format a raw field value for CSV export. Override for custom formatting.
         """
-        value = getattr(instance, field_name, '')
-        
         if value is None:
             return ''
         
@@ -246,45 +706,80 @@ class AbstractCSVExporter(ABC):
         
         return str(value)
     
-    def export_csv(self, output_file=None, **filters) -> Union[str, None]:
+    def format_field_value(self, instance: models.Model, field_name: str) -> str:
         """
-        Export data to CSV format
-        Returns CSV content as string if output_file is None, otherwise writes to file
+        Format a field of a model instance for CSV export
+        """
+        return self.format_value(field_name, getattr(instance, field_name, ''))
+    
+    def iter_rows(self, **filters) -> Iterator[List[str]]:
+        """
+        Formatted rows reading only the export fields with values_list()
+        through a chunked (server-side) iterator. The queryset is built
+        eagerly so invalid filters fail before anything is streamed.
+        """
+        export_fields = self.get_export_fields()
+        queryset = self.get_queryset(**filters).values_list(*export_fields)
+        return (
+            [self.format_value(field_name, value) for field_name, value in zip(export_fields, values)]
+            for values in queryset.iterator(chunk_size=self.chunk_size)
+        )
+    
+    def stream_csv(self, **filters) -> Iterator[bytes]:
+        """
+        CSV as UTF-8 encoded chunks of rows_per_chunk rows, so memory stays
+        flat regardless of the number of records
         """
         try:
-            output = io.StringIO()
-            
-            export_fields = self.get_export_fields()
             field_headers = self.get_field_headers()
-            
-            # Create CSV writer
-            writer = csv.writer(output)
-            
-            # Write headers
-            headers = [field_headers.get(field, field) for field in export_fields]
-            writer.writerow(headers)
-            
-            # Write data rows
-            queryset = self.get_queryset(**filters)
-            for instance in queryset:
-                row = []
-                for field_name in export_fields:
-                    value = self.format_field_value(instance, field_name)
-                    row.append(value)
+            headers = [field_headers.get(field, field) for field in self.get_export_fields()]
+            rows = self.iter_rows(**filters)
+        except Exception as e:
+            raise CSVExportError(f"Failed to export CSV: {str(e)}")
+        return self._encode_rows(headers, rows)
+    
+    def _encode_rows(self, headers: List[str], rows: Iterator[List[str]]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(headers)
+        self.exported_count = 0
+        pending = 1
+        
+        try:
+            for row in rows:
                 writer.writerow(row)
-            
-            csv_content = output.getvalue()
-            output.close()
-            
-            if output_file:
-                with open(output_file, 'w', newline='', encoding='utf-8') as f:
-                    f.write(csv_content)
-                return None
-            
-            return csv_content
-            
+                self.exported_count += 1
+                pending += 1
+                if pending >= self.rows_per_chunk:
+                    yield buffer.getvalue().encode('utf-8')
+                    buffer.seek(0)
+                    buffer.truncate()
+                    pending = 0
         except Exception as e:
             raise CSVExportError(f"Failed to export CSV: {str(e)}")
+        
+        if pending:
+            yield buffer.getvalue().encode('utf-8')
+    
+    def export_csv(self, output_file=None, **filters) -> Union[str, int]:
+        """
+        Export data to CSV format
+        Returns CSV content as string if output_file is None, otherwise writes
+        the file incrementally and returns the number of records written
+        """
+        if output_file is None:
+            return b''.join(self.stream_csv(**filters)).decode('utf-8')
+        
+        try:
+            with open(output_file, 'wb') as f:
+                for chunk in self.stream_csv(**filters):
+                    f.write(chunk)
+        except CSVExportError:
+            raise
+        except Exception as e:
+            raise CSVExportError(f"Failed to export CSV: {str(e)}")
+        
+        return self.exported_count
     
     def generate_template(self) -> str:
         """
@@ -3,7 +3,7 @@
 CSV Exporter implementations for textile models
 """
 
-from typing import Dict, List
+from typing import Any, Dict, List
 from django.db import models
 from ...textile_models import Provider
 from .base import AbstractCSVExporter
@@ -47,12 +47,10 @@ class ProviderCSVExporter(AbstractCSVExporter):
             'updated_at': 'Última Actualización'
         }
     
-    def format_field_value(self, instance: Provider, field_name: str) -> str:
+    def format_value(self, field_name: str, value: Any) -> str:
         """
         Format Provider field values for CSV export
         """
-        value = getattr(instance, field_name, '')
-        
         if value is None:
             return ''
         
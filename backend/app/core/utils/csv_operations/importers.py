@@ -4,21 +4,118 @@ CSV Importer implementations for textile models
 """
 
 import re
+from decimal import Decimal, InvalidOperation
 from typing import Dict, Any, Optional
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
-from ...textile_models import Provider
+from django.db import connection, transaction
+from django.utils import timezone
+from ...textile_models import (
+    BOMItem,
+    BOMTemplate,
+    EndProduct,
+    Input,
+    InputProvider,
+    Provider,
+    Unit,
+)
+from ..costing import BOMCostEngine, PriceChangePropagator, record_price_history
 from .base import AbstractCSVImporter
 from .exceptions import CSVValidationError
+from .lookups import NameLookup, normalize_name
+
+
+TRUE_VALUES = {'1', 'true', 'yes', 'si', 'sí', 'x'}
+FALSE_VALUES = {'0', 'false', 'no'}
+
+
+def parse_decimal(value: str, field: str, line_number: int, max_digits: int,
+                  decimal_places: int, minimum: Decimal) -> Decimal:
+    """
+    Parse a decimal written as 1234.5, 1234,5, $1,234.50, 1.234,50 or
+    13.500 and check it fits the model field. With both separators the last
+    one is the decimal point, and a repeated one groups thousands. A lone
+    separator followed by exactly three digits groups thousands only for
+    fields with fewer than three decimal places (COP prices): for quantities
+    1.250 is one and a quarter. Values with more decimals than the field
+    holds are rejected, not rounded.
+    """
+    cleaned = value.replace('$', '').replace(' ', '')
+    separators = [char for char in cleaned if char in ',.']
+    integer, decimals = cleaned, ''
+    if separators:
+        position = cleaned.rfind(separators[-1])
+        thousands_only = len(set(separators)) == 1 and (
+            len(separators) > 1
+            or (decimal_places < 3 and len(cleaned) - position - 1 == 3
+                and cleaned[:position].lstrip('-') not in ('', '0'))
+        )
+        if not thousands_only:
+            integer, decimals = cleaned[:position], cleaned[position + 1:]
+        thousands = separators[0] if thousands_only or separators[0] != separators[-1] else None
+        if thousands:
+            groups = integer.lstrip('-').split(thousands)
+            if not 1 <= len(groups[0]) <= 3 or any(len(group) != 3 for group in groups[1:]):
+                raise CSVValidationError(f"Invalid number: {value}", field=field, line_number=line_number)
+            integer = integer.replace(thousands, '')
+    try:
+        number = Decimal(f"{integer}.{decimals}" if decimals else integer)
+    except InvalidOperation:
+        raise CSVValidationError(f"Invalid number: {value}", field=field, line_number=line_number)
+    if not number.is_finite() or number < minimum:
+        raise CSVValidationError(f"Value must be at least {minimum}, got {value}", field=field, line_number=line_number)
+    try:
+        quantized = number.quantize(Decimal(1).scaleb(-decimal_places))
+    except InvalidOperation:
+        raise CSVValidationError(f"Value too large: {value}", field=field, line_number=line_number)
+    if quantized != number:
+        raise CSVValidationError(
+            f"Too many decimal places (max {decimal_places}): {value}", field=field, line_number=line_number
+        )
+    if len(quantized.as_tuple().digits) > max_digits:
+        raise CSVValidationError(f"Value too large: {value}", field=field, line_number=line_number)
+    return quantized
+
+
+def parse_bool(value: Optional[str], field: str, line_number: int) -> bool:
+    """Parse si/no, true/false, 1/0 and x flags; empty means False"""
+    if not value:
+        return False
+    normalized = value.strip().casefold()
+    if normalized in TRUE_VALUES:
+        return True
+    if normalized in FALSE_VALUES:
+        return False
+    raise CSVValidationError(f"Invalid boolean value: {value}", field=field, line_number=line_number)
+
+
+def clean_text(row_data: Dict[str, Any], field: str, max_length: int, label: str,
+               line_number: int, required: bool = False) -> Optional[str]:
+    """Stripped text of a field, checked against the model max length"""
+    value = (row_data.get(field) or '').strip()
+    if not value:
+        if required:
+            raise CSVValidationError(f"{label} is required", field=field, line_number=line_number)
+        return None
+    if max_length and len(value) > max_length:
+        raise CSVValidationError(
+            f"{label} too long (max {max_length} characters, got {len(value)})",
+            field=field,
+            line_number=line_number
+        )
+    return value
 
 
 class ProviderCSVImporter(AbstractCSVImporter):
     """
     CSV Importer for Provider model
+    
+    Duplicates are matched case-insensitively by name, against existing
+    providers and earlier rows of the same file.
     """
     
-    def __init__(self, batch_size: int = 100):
-        super().__init__(Provider, batch_size)
+    def __init__(self, batch_size: int = 100, workers: int = 1):
+        super().__init__(Provider, batch_size, workers)
     
     def get_field_mapping(self) -> Dict[str, str]:
         """
@@ -147,12 +244,422 @@ class ProviderCSVImporter(AbstractCSVImporter):
             return Provider(**validated_data)
         except Exception as e:
             raise CSVValidationError(f"Failed to create provider: {str(e)}")
+
+
+class InputCSVImporter(AbstractCSVImporter):
+    """
+    CSV Importer for Input model
     
-    def check_duplicates(self, validated_data: Dict[str, Any]) -> Optional[Provider]:
-        """
-        Check for existing providers with the same name
-        """
+    Units are resolved by abbreviation and input types by code or Spanish
+    label, from maps loaded once per import.
+    """
+    
+    def __init__(self, batch_size: int = 100, workers: int = 1):
+        super().__init__(Input, batch_size, workers)
+        self.units = None
+        self.input_types = {}
+    
+    def get_field_mapping(self) -> Dict[str, str]:
+        return {
+            'name': 'name',
+            'nombre': 'name',
+            'insumo': 'name',
+            'input': 'name',
+            
+            'input_type': 'input_type',
+            'type': 'input_type',
+            'tipo': 'input_type',
+            'tipo_insumo': 'input_type',
+            
+            'unit': 'unit',
+            'unidad': 'unit',
+            'unit_abbreviation': 'unit',
+            'abreviatura': 'unit',
+        }
+    
+    def prepare_import(self):
+        self.units = NameLookup.load('Unit', Unit.objects.all(), field='abbreviation')
+        self.input_types = {}
+        for code, label in Input.INPUT_TYPES:
+            self.input_types[normalize_name(code)] = code
+            self.input_types[normalize_name(label)] = code
+    
+    def validate_row(self, row_data: Dict[str, Any], line_number: int) -> Dict[str, Any]:
+        validated_data = {
+            'name': clean_text(row_data, 'name', 200, 'Input name', line_number, required=True),
+            'unit_id': self.units.resolve(row_data.get('unit'), 'unit', line_number),
+        }
+        
+        input_type = row_data.get('input_type')
+        if not input_type:
+            raise CSVValidationError("Input type is required", field='input_type', line_number=line_number)
         try:
-            return Provider.objects.get(name__iexact=validated_data['name'])
-        except Provider.DoesNotExist:
-            return None
\ No newline at end of file
+            validated_data['input_type'] = self.input_types[normalize_name(input_type)]
+        except KeyError:
+            raise CSVValidationError(
+                f"Invalid input type: {input_type}",
+                field='input_type',
+                line_number=line_number
+            )
+        
+        return validated_data
+    
+    def create_instance(self, validated_data: Dict[str, Any]) -> Input:
+        return Input(**validated_data)
+
+
+class InputProviderCSVImporter(AbstractCSVImporter):
+    """
+    CSV Importer for InputProvider price rows
+    
+    Inputs and providers are resolved by name from maps loaded once per
+    import. A duplicate is an existing (input, provider) pair. The price
+    history of inserted and repriced rows is recorded per batch, as the
+    post_save signal would; repriced rows are propagated to BOM, product
+    and budget costs once, when the import ends.
+    """
+    
+    duplicate_key_fields = ['input_id', 'provider_id']
+    
+    def __init__(self, batch_size: int = 100, workers: int = 1):
+        super().__init__(InputProvider, batch_size, workers)
+        self.inputs = None
+        self.providers = None
+        self.repriced_ids = set()
+    
+    def get_field_mapping(self) -> Dict[str, str]:
+        return {
+            'input': 'input',
+            'insumo': 'input',
+            'input_name': 'input',
+            
+            'provider': 'provider',
+            'proveedor': 'provider',
+            'provider_name': 'provider',
+            
+            'price': 'price_per_unit_cop',
+            'precio': 'price_per_unit_cop',
+            'precio_unitario': 'price_per_unit_cop',
+            'price_per_unit_cop': 'price_per_unit_cop',
+            
+            'is_preferred': 'is_preferred',
+            'preferred': 'is_preferred',
+            'preferido': 'is_preferred',
+            
+            'notes': 'notes',
+            'notas': 'notes',
+        }
+    
+    def prepare_import(self):
+        self.inputs = NameLookup.load('Input', Input.objects.all())
+        self.providers = NameLookup.load('Provider', Provider.objects.all())
+        self.repriced_ids = set()
+    
+    def validate_row(self, row_data: Dict[str, Any], line_number: int) -> Dict[str, Any]:
+        price = row_data.get('price_per_unit_cop')
+        if not price:
+            raise CSVValidationError("Price is required", field='price_per_unit_cop', line_number=line_number)
+        
+        validated_data = {
+            'input_id': self.inputs.resolve(row_data.get('input'), 'input', line_number),
+            'provider_id': self.providers.resolve(row_data.get('provider'), 'provider', line_number),
+            'price_per_unit_cop': parse_decimal(
+                price, 'price_per_unit_cop', line_number,
+                max_digits=12, decimal_places=2, minimum=Decimal('0.01')
+            ),
+        }
+        # An empty cell keeps the current flag on merge (and the model default on insert)
+        if row_data.get('is_preferred'):
+            validated_data['is_preferred'] = parse_bool(row_data['is_preferred'], 'is_preferred', line_number)
+        notes = clean_text(row_data, 'notes', 1000, 'Notes', line_number)
+        if notes:
+            validated_data['notes'] = notes
+        return validated_data
+    
+    def create_instance(self, validated_data: Dict[str, Any]) -> InputProvider:
+        return InputProvider(**validated_data)
+    
+    def on_batch_saved(self, instances):
+        record_price_history(instance.pk for instance in instances)
+    
+    def on_batch_updated(self, instances, fields):
+        if 'price_per_unit_cop' in fields:
+            # Unchanged prices open no history range and propagate to the same costs
+            record_price_history(instance.pk for instance in instances)
+            self.repriced_ids.update(instance.pk for instance in instances)
+    
+    def finish_import(self):
+        if self.repriced_ids:
+            PriceChangePropagator().propagate(self.repriced_ids)
+
+
+class BOMTemplateCSVImporter(AbstractCSVImporter):
+    """
+    CSV Importer for BOMTemplate model (the BOM lines are imported with
+    BOMItemCSVImporter)
+    """
+    
+    def __init__(self, batch_size: int = 100, workers: int = 1):
+        super().__init__(BOMTemplate, batch_size, workers)
+    
+    def get_field_mapping(self) -> Dict[str, str]:
+        return {
+            'name': 'name',
+            'nombre': 'name',
+            'plantilla': 'name',
+            'template': 'name',
+            
+            'description': 'description',
+            'descripcion': 'description',
+        }
+    
+    def validate_row(self, row_data: Dict[str, Any], line_number: int) -> Dict[str, Any]:
+        validated_data = {
+            'name': clean_text(row_data, 'name', 200, 'Template name', line_number, required=True),
+        }
+        description = clean_text(row_data, 'description', 1000, 'Description', line_number)
+        if description:
+            validated_data['description'] = description
+        return validated_data
+    
+    def create_instance(self, validated_data: Dict[str, Any]) -> BOMTemplate:
+        return BOMTemplate(**validated_data)
+
+
+class BOMItemCSVImporter(AbstractCSVImporter):
+    """
+    CSV Importer for BOMItem lines
+    
+    Each row names its template and either an input (with an optional
+    provider; the preferred or only provider otherwise) or a sub-assembly
+    template. Names resolve through maps loaded once per import. Line costs
+    and every dependent cost are recomputed with one set-based propagation
+    over the touched templates when the import ends.
+    """
+    
+    duplicate_key_fields = ['bom_template_id', 'input_id', 'sub_template_id']
+    
+    def __init__(self, batch_size: int = 100, workers: int = 1):
+        super().__init__(BOMItem, batch_size, workers)
+        self.templates = None
+        self.inputs = None
+        self.providers = None
+        self.input_providers = {}
+        self.default_input_providers = {}
+        self.sub_assemblies = {}
+        self.template_ids = set()
+    
+    def get_field_mapping(self) -> Dict[str, str]:
+        return {
+            'bom_template': 'bom_template',
+            'template': 'bom_template',
+            'plantilla': 'bom_template',
+            
+            'input': 'input',
+            'insumo': 'input',
+            
+            'provider': 'provider',
+            'proveedor': 'provider',
+            
+            'sub_template': 'sub_template',
+            'subensamble': 'sub_template',
+            'sub_assembly': 'sub_template',
+            
+            'quantity': 'quantity',
+            'cantidad': 'quantity',
+        }
+    
+    def prepare_import(self):
+        self.templates = NameLookup.load('BOM template', BOMTemplate.objects.all())
+        self.inputs = NameLookup.load('Input', Input.objects.all())
+        self.providers = NameLookup.load('Provider', Provider.objects.all())
+        self.template_ids = set()
+        
+        # (input, provider) -> input provider, and the provider used when a row names none
+        self.input_providers = {}
+        providers_per_input = {}
+        preferred = {}
+        rows = InputProvider.objects.values_list('pk', 'input_id', 'provider_id', 'is_preferred')
+        for pk, input_id, provider_id, is_preferred in rows.iterator(chunk_size=5000):
+            self.input_providers[(input_id, provider_id)] = pk
+            providers_per_input.setdefault(input_id, []).append(pk)
+            if is_preferred:
+                preferred.setdefault(input_id, pk)
+        self.default_input_providers = {
+            input_id: preferred.get(input_id, pks[0] if len(pks) == 1 else None)
+            for input_id, pks in providers_per_input.items()
+        }
+        
+        # Sub-assembly edges, to reject rows that would make the BOM graph cyclic
+        self.sub_assemblies = {}
+        edges = BOMItem.objects.filter(sub_template__isnull=False).values_list('bom_template_id', 'sub_template_id')
+        for parent_id, child_id in edges.iterator(chunk_size=5000):
+            self.sub_assemblies.setdefault(parent_id, set()).add(child_id)
+    
+    def validate_row(self, row_data: Dict[str, Any], line_number: int) -> Dict[str, Any]:
+        quantity = row_data.get('quantity')
+        if not quantity:
+            raise CSVValidationError("Quantity is required", field='quantity', line_number=line_number)
+        
+        validated_data = {
+            'bom_template_id': self.templates.resolve(row_data.get('bom_template'), 'bom_template', line_number),
+            'quantity': parse_decimal(
+                quantity, 'quantity', line_number,
+                max_digits=10, decimal_places=3, minimum=Decimal('0.001')
+            ),
+        }
+        
+        if bool(row_data.get('input')) == bool(row_data.get('sub_template')):
+            raise CSVValidationError(
+                "Each line needs either an input or a sub-assembly template, not both",
+                field='input',
+                line_number=line_number
+            )
+        
+        if row_data.get('sub_template'):
+            sub_template_id = self.templates.resolve(row_data['sub_template'], 'sub_template', line_number)
+            if sub_template_id == validated_data['bom_template_id']:
+                raise CSVValidationError(
+                    "A BOM template cannot contain itself",
+                    field='sub_template',
+                    line_number=line_number
+                )
+            validated_data['sub_template_id'] = sub_template_id
+            return validated_data
+        
+        input_id = self.inputs.resolve(row_data['input'], 'input', line_number)
+        if row_data.get('provider'):
+            provider_id = self.providers.resolve(row_data['provider'], 'provider', line_number)
+            input_provider_id = self.input_providers.get((input_id, provider_id))
+            if input_provider_id is None:
+                raise CSVValidationError(
+                    f"Provider '{row_data['provider']}' has no price for input '{row_data['input']}'",
+                    field='provider',
+                    line_number=line_number
+                )
+        else:
+            input_provider_id = self.default_input_providers.get(input_id)
+            if input_provider_id is None:
+                raise CSVValidationError(
+                    f"Input '{row_data['input']}' has no preferred provider; name one in the provider column",
+                    field='provider',
+                    line_number=line_number
+                )
+        validated_data['input_id'] = input_id
+        validated_data['input_provider_id'] = input_provider_id
+        return validated_data
+    
+    def create_instance(self, validated_data: Dict[str, Any]) -> BOMItem:
+        # Runs in the importing process, in file order, so earlier rows count
+        sub_template_id = validated_data.get('sub_template_id')
+        if sub_template_id:
+            parent_id = validated_data['bom_template_id']
+            if self._reaches(sub_template_id, parent_id):
+                raise CSVValidationError(
+                    "The sub-assembly would create a circular reference between BOM templates",
+                    field='sub_template'
+                )
+            self.sub_assemblies.setdefault(parent_id, set()).add(sub_template_id)
+        return BOMItem(**validated_data)
+    
+    def _reaches(self, start_id: int, target_id: int) -> bool:
+        pending = [start_id]
+        visited = set()
+        while pending:
+            template_id = pending.pop()
+            if template_id == target_id:
+                return True
+            if template_id not in visited:
+                visited.add(template_id)
+                pending.extend(self.sub_assemblies.get(template_id, ()))
+        return False
+    
+    def on_batch_saved(self, instances):
+        self.template_ids.update(instance.bom_template_id for instance in instances)
+    
+    def on_batch_updated(self, instances, fields):
+        self.template_ids.update(instance.bom_template_id for instance in instances)
+    
+    def finish_import(self):
+        PriceChangePropagator().propagate_templates(self.template_ids)
+
+
+class EndProductCSVImporter(AbstractCSVImporter):
+    """
+    CSV Importer for EndProduct model
+    
+    BOM templates are resolved by name from a map loaded once per import;
+    product costs are copied from the templates with one set-based UPDATE
+    when the import ends.
+    """
+    
+    def __init__(self, batch_size: int = 100, workers: int = 1):
+        super().__init__(EndProduct, batch_size, workers)
+        self.templates = None
+        self.template_ids = set()
+    
+    def get_field_mapping(self) -> Dict[str, str]:
+        return {
+            'name': 'name',
+            'nombre': 'name',
+            'producto': 'name',
+            'product': 'name',
+            
+            'description': 'description',
+            'descripcion': 'description',
+            
+            'bom_template': 'bom_template',
+            'template': 'bom_template',
+            'plantilla': 'bom_template',
+            
+            'produced_quantity': 'produced_quantity',
+            'cantidad_producida': 'produced_quantity',
+        }
+    
+    def prepare_import(self):
+        self.templates = NameLookup.load('BOM template', BOMTemplate.objects.all())
+        self.template_ids = set()
+    
+    def validate_row(self, row_data: Dict[str, Any], line_number: int) -> Dict[str, Any]:
+        validated_data = {
+            'name': clean_text(row_data, 'name', 200, 'Product name', line_number, required=True),
+            'bom_template_id': self.templates.resolve(row_data.get('bom_template'), 'bom_template', line_number),
+        }
+        description = clean_text(row_data, 'description', 1000, 'Description', line_number)
+        if description:
+            validated_data['description'] = description
+        
+        produced_quantity = row_data.get('produced_quantity')
+        if produced_quantity:
+            if not produced_quantity.isdigit():
+                raise CSVValidationError(
+                    f"Produced quantity must be a whole number, got {produced_quantity}",
+                    field='produced_quantity',
+                    line_number=line_number
+                )
+            validated_data['produced_quantity'] = int(produced_quantity)
+        return validated_data
+    
+    def create_instance(self, validated_data: Dict[str, Any]) -> EndProduct:
+        return EndProduct(**validated_data)
+    
+    def on_batch_saved(self, instances):
+        self.template_ids.update(instance.bom_template_id for instance in instances)
+    
+    def on_batch_updated(self, instances, fields):
+        self.template_ids.update(instance.bom_template_id for instance in instances)
+    
+    def finish_import(self):
+        with transaction.atomic(), connection.cursor() as cursor:
+            BOMCostEngine().update_end_products(cursor, timezone.now(), list(self.template_ids))
+
+
+# Importers by the name the import_csv command and background jobs use
+CSV_IMPORTERS = {
+    'providers': ProviderCSVImporter,
+    'inputs': InputCSVImporter,
+    'input-providers': InputProviderCSVImporter,
+    'bom-templates': BOMTemplateCSVImporter,
+    'bom-items': BOMItemCSVImporter,
+    'end-products': EndProductCSVImporter,
+}
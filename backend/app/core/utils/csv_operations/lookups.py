@@ -0,0 +1,60 @@
+# backend/app/core/utils/csv_operations/lookups.py
+"""
+Foreign key lookup maps for CSV imports
+Responsibility: Resolve names and codes in CSV rows to primary keys from
+maps loaded with one query per import, instead of one query per row.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.db import models
+
+from .exceptions import CSVValidationError
+
+
+def normalize_name(value: Any) -> str:
+    """Case- and whitespace-insensitive form of a name"""
+    return ' '.join(str(value).split()).casefold()
+
+
+class NameLookup:
+    """
+    Map of normalized names to primary keys, loaded with a single query.
+
+    Names that more than one row shares are kept as ambiguous, so a CSV row
+    naming them is rejected instead of silently linked to either record.
+    """
+
+    def __init__(self, label: str, pairs: Iterable[Tuple[int, Any]]):
+        self.label = label
+        self.ids: Dict[str, int] = {}
+        self.ambiguous = set()
+        for pk, name in pairs:
+            self.add(name, pk)
+
+    @classmethod
+    def load(cls, label: str, queryset: models.QuerySet, field: str = 'name') -> 'NameLookup':
+        return cls(label, queryset.values_list('pk', field).iterator(chunk_size=5000))
+
+    def add(self, name: Any, pk: int):
+        key = normalize_name(name)
+        if key in self.ids and self.ids[key] != pk:
+            self.ambiguous.add(key)
+        else:
+            self.ids[key] = pk
+
+    def resolve(self, name: Optional[str], field: str, line_number: int) -> int:
+        """Primary key of the named record; raises CSVValidationError if unknown or ambiguous"""
+        if not name:
+            raise CSVValidationError(f"{self.label} is required", field=field, line_number=line_number)
+        key = normalize_name(name)
+        if key in self.ambiguous:
+            raise CSVValidationError(
+                f"{self.label} '{name}' is ambiguous: more than one record has that name",
+                field=field,
+                line_number=line_number
+            )
+        try:
+            return self.ids[key]
+        except KeyError:
+            raise CSVValidationError(f"{self.label} '{name}' not found", field=field, line_number=line_number)
@@ -0,0 +1,167 @@
+# backend/app/core/utils/csv_operations/rejects.py
+"""
+Rejected rows of a CSV import
+Responsibility: Keep the errors of one import bounded in memory: the first
+messages inline, counts by error type and field, and every rejected row
+(original columns plus an error column) spooled to a temporary CSV file
+that can be stored and downloaded once the import is done.
+"""
+
+import csv
+import io
+import re
+import tempfile
+import uuid
+from collections import Counter
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import DatabaseError
+from django.utils import timezone
+
+from ..private_files import private_storage
+from .exceptions import CSVValidationError
+
+# Stored rejected rows files can be downloaded for this long
+REJECTED_ROWS_TTL = timedelta(hours=24)
+
+ERROR_COLUMN = 'error'
+
+_TOKEN_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+def classify_error(error: Exception) -> Tuple[str, Optional[str]]:
+    """(error type, field) of an exception raised while importing a row"""
+    if isinstance(error, CSVValidationError):
+        return 'validation', error.field
+    if isinstance(error, ValidationError):
+        fields = list(getattr(error, 'error_dict', {}))
+        return 'validation', fields[0] if fields else None
+    if isinstance(error, DatabaseError):
+        return 'database', None
+    return 'unexpected', None
+
+
+class RejectedRows:
+    """
+    Errors of one import. Only the first max_inline messages are kept in
+    memory; the rows themselves go to a temporary file on disk, created
+    with the first rejection, so imports without errors never open one.
+    """
+
+    def __init__(self, max_inline: int = 100):
+        self.max_inline = max_inline
+        self.messages: List[str] = []
+        self.count = 0
+        self.summary = Counter()
+        self.header: List[str] = []
+        self.file = None
+        self.stream = None
+        self.writer = None
+
+    def start(self, header: List[str]):
+        """Header of the imported file, repeated in the rejected rows file"""
+        self.header = list(header)
+
+    def add(self, line_number: int, message: str, row: Optional[List[str]] = None,
+            error_type: str = 'validation', field: Optional[str] = None):
+        self.count += 1
+        self.summary[(error_type, field)] += 1
+        if len(self.messages) < self.max_inline:
+            self.messages.append(f"Line {line_number}: {message}")
+        if row is None:
+            return
+        if self.writer is None:
+            self.file = tempfile.TemporaryFile()
+            self.stream = io.TextIOWrapper(self.file, encoding='utf-8', newline='')
+            self.writer = csv.writer(self.stream)
+            self.writer.writerow(self.header + [ERROR_COLUMN])
+        padding = [''] * (len(self.header) - len(row))
+        self.writer.writerow(list(row) + padding + [message])
+
+    @property
+    def truncated(self) -> bool:
+        return self.count > len(self.messages)
+
+    @property
+    def has_rows(self) -> bool:
+        return self.writer is not None
+
+    def summary_list(self) -> List[Dict[str, Any]]:
+        """Error counts by type and field, most frequent first"""
+        return [
+            {'error_type': error_type, 'field': field, 'count': count}
+            for (error_type, field), count in self.summary.most_common()
+        ]
+
+    def rewind(self):
+        """Flush the rejected rows file and move to its start"""
+        self.stream.flush()
+        self.file.seek(0)
+
+    def copy_to(self, destination):
+        """Write the rejected rows file to an open binary file"""
+        if not self.has_rows:
+            return
+        self.rewind()
+        for chunk in iter(lambda: self.file.read(64 * 1024), b''):
+            destination.write(chunk)
+
+    def close(self):
+        if self.stream is not None:
+            # Closing the wrapper closes (and deletes) the temporary file
+            self.stream.close()
+            self.file = self.stream = self.writer = None
+
+
+def _rejected_rows_dir(schema_name: str) -> str:
+    return f'csv_imports/{schema_name}/rejected'
+
+
+def store_rejected_rows(rejects: RejectedRows, schema_name: str) -> Optional[str]:
+    """
+    Save the rejected rows file to private storage (never served under
+    MEDIA_URL) and return its download token, or None if no row was
+    rejected. Files older than REJECTED_ROWS_TTL are pruned on the way.
+    """
+    if not rejects.has_rows:
+        return None
+    directory = _rejected_rows_dir(schema_name)
+    prune_rejected_rows(directory)
+    token = uuid.uuid4().hex
+    rejects.rewind()
+    private_storage().save(f'{directory}/{token}.csv', File(rejects.file))
+    rejects.close()
+    return token
+
+
+def open_rejected_rows(schema_name: str, token: str):
+    """Open a stored rejected rows file; None if the token is unknown or expired"""
+    if not _TOKEN_RE.match(token or ''):
+        return None
+    storage = private_storage()
+    path = f'{_rejected_rows_dir(schema_name)}/{token}.csv'
+    try:
+        expired = storage.get_modified_time(path) < timezone.now() - REJECTED_ROWS_TTL
+    except OSError:
+        return None
+    if expired:
+        storage.delete(path)
+        return None
+    return storage.open(path, 'rb')
+
+
+def prune_rejected_rows(directory: str):
+    storage = private_storage()
+    if not storage.exists(directory):
+        return
+    cutoff = timezone.now() - REJECTED_ROWS_TTL
+    for name in storage.listdir(directory)[1]:
+        path = f'{directory}/{name}'
+        try:
+            if storage.get_modified_time(path) < cutoff:
+                storage.delete(path)
+        except OSError:
+            continue
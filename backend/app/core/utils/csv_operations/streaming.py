@@ -0,0 +1,46 @@
+# backend/app/core/utils/csv_operations/streaming.py
+"""
+Streaming responses for CSV exports
+Responsibility: Serve chunked CSV generators so they are sent as they are
+produced under ASGI too. Django 4.2 consumes a sync iterator under ASGI
+with sync_to_async(list), building the whole body before sending it; an
+async iterator that fetches one chunk at a time keeps memory constant.
+"""
+
+from typing import AsyncIterator, Iterator
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+_DONE = object()
+
+
+async def iterate_in_sync_thread(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Yield the chunks of a sync iterator, each one produced in the request's
+    sync thread, so database cursors it holds keep using the same connection
+    """
+    fetch = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await fetch(chunks, _DONE)
+            if chunk is _DONE:
+                return
+            yield chunk
+    finally:
+        # Release server-side cursors when the client disconnects early
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=True)()
+
+
+def streaming_csv_response(request, chunks: Iterator[bytes], content_type: str = 'text/csv',
+                           filename: str = None) -> StreamingHttpResponse:
+    """StreamingHttpResponse over chunks, with an async iterator under ASGI"""
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        chunks = iterate_in_sync_thread(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,16 @@
+# backend/app/core/utils/jobs/__init__.py
+"""
+Background Jobs Module
+Responsibility: Enqueue, claim and run tenant-scoped background jobs
+"""
+
+from .handlers import JOB_HANDLERS
+from .queue import claim_next_job, enqueue_job, fail_stale_jobs, run_job
+
+__all__ = [
+    'JOB_HANDLERS',
+    'claim_next_job',
+    'enqueue_job',
+    'fail_stale_jobs',
+    'run_job',
+]
@@ -0,0 +1,165 @@
+# backend/app/core/utils/jobs/handlers.py
+"""
+Background job handlers
+Responsibility: Chunked, progress-reporting implementations of the
+long-running operations that can be queued as background jobs.
+
+Each handler receives the BackgroundJob (already running inside its
+tenant schema) and returns a JSON-serializable result summary.
+"""
+
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ...textile_models import BOMTemplate, ProductionBudget
+from ..costing import BOMCostEngine
+from ..csv_operations import CSV_IMPORTERS, store_rejected_rows
+from ..private_files import private_storage
+
+CHUNK_SIZE = 500
+
+
+def _chunks(ids, size=CHUNK_SIZE):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def recalculate_bom_costs(job):
+    """
+    Recalculate BOM line costs and template totals, CHUNK_SIZE templates at
+    a time, in sub-assembly dependency order
+    """
+    engine = BOMCostEngine()
+    template_ids = job.params.get('template_ids')
+    if template_ids is None:
+        template_ids = BOMTemplate.objects.order_by('pk').values_list('pk', flat=True)
+    else:
+        # Selected templates also refresh the templates that use them
+        with connection.cursor() as cursor:
+            template_ids = engine.rollup.with_ancestors(engine.rollup.load_graph(cursor), template_ids)
+
+    # Sub-assemblies first, so each chunk can rely on the totals of earlier ones
+    with connection.cursor() as cursor:
+        template_ids = engine.rollup.dependency_order(cursor, template_ids)
+
+    job.report_progress(0, total_steps=len(template_ids))
+
+    updated_count = 0
+    total_cost_change = Decimal('0')
+    for chunk in _chunks(template_ids):
+        now = timezone.now()
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                line_counts = engine.update_line_costs(cursor, now, template_ids=chunk)
+                changes = engine.rollup.roll_up(cursor, now, chunk, include_ancestors=False)
+
+        updated_count += len(changes)
+        total_cost_change += sum((change.difference for change in changes), Decimal('0'))
+        job.report_progress(
+            updated_count,
+            rows_touched=len(changes) + sum(line_counts.values()),
+        )
+
+    return {
+        'updated_count': updated_count,
+        'total_cost_change': str(total_cost_change),
+    }
+
+
+def recalculate_budget_costs(job):
+    """Recalculate budget line costs and budget totals, CHUNK_SIZE budgets at a time"""
+    engine = BOMCostEngine()
+    budget_ids = job.params.get('budget_ids')
+    if budget_ids is None:
+        budgets = ProductionBudget.objects.order_by('pk')
+        if job.params.get('status'):
+            budgets = budgets.filter(status=job.params['status'])
+        budget_ids = list(budgets.values_list('pk', flat=True))
+
+    job.report_progress(0, total_steps=len(budget_ids))
+
+    updated_count = 0
+    for chunk in _chunks(budget_ids):
+        now = timezone.now()
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                line_counts = engine.update_budget_items(cursor, now, budget_ids=chunk)
+                budgets_updated = engine.update_budget_totals(cursor, now, chunk)
+
+        updated_count += budgets_updated
+        job.report_progress(
+            updated_count,
+            rows_touched=budgets_updated + sum(line_counts.values()),
+        )
+
+    return {'updated_count': updated_count}
+
+
+def _count_rows(path):
+    """Data rows of a stored CSV file, counted by line (quoted newlines overcount)"""
+    lines = 0
+    last = b'\n'
+    with private_storage().open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            lines += chunk.count(b'\n')
+            last = chunk[-1:]
+    if last != b'\n':
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def import_csv(job):
+    """
+    Import a CSV file stored by the import_csv endpoint, committing batch by
+    batch and saving the row counters in job.result as the import runs. The
+    rejected rows file, if any, is stored and its token returned in
+    rejected_rows_file. The upload itself is removed by
+    discard_csv_upload once the job ends, whatever the outcome.
+    """
+    params = job.params
+    path = params['path']
+    importer = CSV_IMPORTERS[params['importer']]()
+
+    def save_progress(counters):
+        job.completed_steps = counters['processed_count']
+        job.rows_touched = counters['imported_count']
+        job.result = counters
+        job.save(update_fields=['completed_steps', 'rows_touched', 'result', 'updated_at'])
+
+    importer.progress_callback = save_progress
+
+    try:
+        job.report_progress(0, total_steps=_count_rows(path))
+        with private_storage().open(path, 'rb') as file:
+            result = importer.import_csv(
+                file,
+                validate_only=params.get('validate_only', False),
+                skip_duplicates=params.get('skip_duplicates', True),
+                continue_on_error=params.get('continue_on_error', True),
+                merge=params.get('merge', False),
+            )
+        result['rejected_rows_file'] = store_rejected_rows(importer.rejects, job.schema_name)
+        return result
+    finally:
+        importer.rejects.close()
+
+
+def discard_csv_upload(job):
+    """Delete the upload of an import_csv job"""
+    path = job.params.get('path')
+    if path:
+        private_storage().delete(path)
+
+
+JOB_HANDLERS = {
+    'recalculate_bom_costs': recalculate_bom_costs,
+    'recalculate_budget_costs': recalculate_budget_costs,
+    'import_csv': import_csv,
+}
+
+# Called once a job has ended (completed or failed) to release its files
+JOB_CLEANUP = {
+    'import_csv': discard_csv_upload,
+}
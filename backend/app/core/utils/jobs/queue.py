@@ -0,0 +1,113 @@
+# backend/app/core/utils/jobs/queue.py
+"""
+Database-backed job queue
+Responsibility: Create jobs for the current tenant, hand them out to
+workers with SKIP LOCKED and run them inside the tenant's schema.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from ...job_models import BackgroundJob
+from .handlers import JOB_CLEANUP, JOB_HANDLERS
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_job(job_type: str, params: Optional[Dict[str, Any]] = None) -> BackgroundJob:
+    """Queue a job to run in the schema of the current connection"""
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job type: {job_type}")
+
+    return BackgroundJob.objects.create(
+        job_type=job_type,
+        schema_name=getattr(connection, 'schema_name', get_public_schema_name()),
+        params=params or {},
+    )
+
+
+def fail_stale_jobs() -> List[BackgroundJob]:
+    """
+    Mark failed the running jobs that have not reported progress for
+    BACKGROUND_JOB_STALE_AFTER seconds (their worker crashed or was
+    killed), and release their files. They are not requeued: a job may
+    have committed part of its work.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.BACKGROUND_JOB_STALE_AFTER)
+    with transaction.atomic():
+        stale = list(
+            BackgroundJob.objects.select_for_update(skip_locked=True)
+            .filter(status='running', updated_at__lt=cutoff)
+        )
+        for job in stale:
+            logger.error(f"Background job {job.pk} ({job.job_type}) stopped reporting progress; marking it failed")
+            job.status = 'failed'
+            job.error = 'El worker dejó de reportar progreso; el trabajo se marcó como fallido.'
+            job.finished_at = now
+            job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+
+    for job in stale:
+        cleanup_job(job)
+    return stale
+
+
+def claim_next_job() -> Optional[BackgroundJob]:
+    """
+    Mark the oldest queued job as running and return it, after failing
+    stale running jobs. SKIP LOCKED lets several workers poll the same
+    table safely.
+    """
+    fail_stale_jobs()
+
+    with transaction.atomic():
+        job = (
+            BackgroundJob.objects.select_for_update(skip_locked=True)
+            .filter(status='queued')
+            .order_by('created_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at', 'updated_at'])
+
+    return job
+
+
+def run_job(job: BackgroundJob) -> BackgroundJob:
+    """Execute a claimed job inside its tenant schema and record the outcome"""
+    handler = JOB_HANDLERS[job.job_type]
+
+    try:
+        with schema_context(job.schema_name):
+            job.result = handler(job) or {}
+        job.status = 'completed'
+    except Exception as e:
+        logger.error(f"Background job {job.pk} ({job.job_type}) failed: {str(e)}", exc_info=True)
+        job.status = 'failed'
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'finished_at', 'updated_at'])
+    cleanup_job(job)
+    return job
+
+
+def cleanup_job(job: BackgroundJob):
+    """Release the files of an ended job; cleanup errors never fail the job"""
+    cleanup = JOB_CLEANUP.get(job.job_type)
+    if cleanup is None:
+        return
+    try:
+        cleanup(job)
+    except Exception as e:
+        logger.warning(f"Cleanup of background job {job.pk} ({job.job_type}) failed: {str(e)}")
@@ -0,0 +1,15 @@
+# backend/app/core/utils/private_files.py
+"""
+Private file storage
+Responsibility: Store files that must only be reached through tenant-scoped
+views (CSV uploads waiting for a job, rejected rows files), outside
+MEDIA_ROOT so the web server never serves them under MEDIA_URL.
+"""
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+
+def private_storage() -> FileSystemStorage:
+    """Storage rooted at PRIVATE_FILES_ROOT, shared by the web and worker processes"""
+    return FileSystemStorage(location=settings.PRIVATE_FILES_ROOT, base_url=None)
@@ -4,14 +4,44 @@ Core views for the baseline application and Textile Production Planning System.
 Includes existing health/info endpoints and new textile ViewSets.
 """
 
+from decimal import Decimal
+
+from django.db import connection, transaction
 from django.utils import timezone
 from django.http import HttpResponse
+from django_tenants.utils import get_public_schema_name
 from rest_framework import viewsets, status
 from rest_framework.decorators import api_view, action
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
 from core.utils.error_handling import ErrorResponseBuilder
-from .utils.csv_operations import ProviderCSVImporter, ProviderCSVExporter, CSVImportError, CSVExportError
+from .conditional import ConditionalGetMixin, etag_matches, make_etag, not_modified
+from .csv_imports import CSVImportMixin
+from .utils.csv_operations import (
+    BOMItemCSVImporter,
+    BOMTemplateCSVImporter,
+    BudgetReportCSVExporter,
+    EndProductCSVImporter,
+    InputCSVImporter,
+    InputProviderCSVImporter,
+    ProviderCSVImporter,
+    ProviderCSVExporter,
+    CSVExportError,
+    streaming_csv_response,
+)
+from .utils.costing import (
+    BOMCostEngine,
+    BudgetReportAggregator,
+    BudgetSnapshotBuilder,
+    BudgetRiskAnalyzer,
+    MaterialRequirementsPlanner,
+    PriceScenario,
+    PriceScenarioSimulator,
+    PriceUncertainty,
+    ProviderSourcingOptimizer,
+    ReportCache,
+    apply_template_cost_delta,
+)
+from .utils.jobs import enqueue_job
 
 from .textile_models import (
     Unit,
@@ -24,6 +54,7 @@ from .textile_models import (
     ProductionBudget,
     ProductionBudgetItem,
 )
+from .job_models import BackgroundJob
 from .serializers import (
     UnitSerializer,
     ProviderSerializer,
@@ -36,6 +67,12 @@ from .serializers import (
     ProductionBudgetSerializer,
     ProductionBudgetDetailSerializer,
     ProductionBudgetItemSerializer,
+    BackgroundJobSerializer,
+    PriceScenarioSerializer,
+    BudgetRiskRequestSerializer,
+    SourcingOptimizationSerializer,
+    AsOfQuerySerializer,
+    CostPreviewQuerySerializer,
 )
 
 
@@ -64,77 +101,37 @@ def api_info(request):
     }, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+def report_cache_stats(request):
+    """
+    Hit/miss counters of the budget report cache for the current tenant.
+    """
+    stats = ReportCache.stats()
+    lookups = stats['hits'] + stats['misses']
+    return Response({
+        'success': True,
+        **stats,
+        'hit_ratio': round(stats['hits'] / lookups, 4) if lookups else 0.0,
+        'timestamp': timezone.now().isoformat(),
+    })
+
+
 # Textile ViewSets
-class UnitViewSet(viewsets.ModelViewSet):
+class UnitViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for Unit model"""
     queryset = Unit.objects.all()
     serializer_class = UnitSerializer
 
 
-class ProviderViewSet(viewsets.ModelViewSet):
+class ProviderViewSet(CSVImportMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for Provider model"""
     queryset = Provider.objects.all()
     serializer_class = ProviderSerializer
+    csv_importer_class = ProviderCSVImporter
     
     def get_queryset(self):
         return Provider.objects.all()
     
-    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
-    def import_csv(self, request):
-        """
-        Import providers from CSV file
-        """
-        try:
-            # Get uploaded file
-            if 'file' not in request.FILES:
-                return Response(
-                    {'error': 'No file provided'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            file = request.FILES['file']
-            
-            # Validate file type
-            if not file.name.endswith('.csv'):
-                return Response(
-                    {'error': 'File must be a CSV file'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Get import options
-            validate_only = request.data.get('validate_only', 'false').lower() == 'true'
-            skip_duplicates = request.data.get('skip_duplicates', 'true').lower() == 'true'
-            continue_on_error = request.data.get('continue_on_error', 'true').lower() == 'true'
-            
-            # Read file content
-            file_content = file.read().decode('utf-8')
-            
-            # Import CSV
-            importer = ProviderCSVImporter()
-            result = importer.import_csv(
-                file_content=file_content,
-                validate_only=validate_only,
-                skip_duplicates=skip_duplicates,
-                continue_on_error=continue_on_error
-            )
-            
-            return Response(result, status=status.HTTP_200_OK)
-            
-        except CSVImportError as e:
-            return Response(
-                {
-                    'error': str(e),
-                    'line_number': getattr(e, 'line_number', None),
-                    'errors': getattr(e, 'errors', [])
-                }, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        except Exception as e:
-            return Response(
-                {'error': f'Import failed: {str(e)}'}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-    
     @action(detail=False, methods=['get'])
     def export_csv(self, request):
         """
@@ -158,15 +155,9 @@ class ProviderViewSet(viewsets.ModelViewSet):
             if request.query_params.get('has_email'):
                 filters['has_email'] = request.query_params.get('has_email').lower() == 'true'
             
-            # Export CSV
+            # Stream the CSV as it is read from the database
             exporter = ProviderCSVExporter()
-            csv_content = exporter.export_csv(**filters)
-            
-            # Create response
-            response = HttpResponse(csv_content, content_type='text/csv')
-            response['Content-Disposition'] = 'attachment; filename="proveedores.csv"'
-            
-            return response
+            return streaming_csv_response(request, exporter.stream_csv(**filters), filename='proveedores.csv')
             
         except CSVExportError as e:
             return Response(
@@ -201,10 +192,11 @@ class ProviderViewSet(viewsets.ModelViewSet):
             )
 
 
-class InputViewSet(viewsets.ModelViewSet):
+class InputViewSet(CSVImportMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for Input model"""
     queryset = Input.objects.select_related('unit').all()
     serializer_class = InputSerializer
+    csv_importer_class = InputCSVImporter
     
     def get_queryset(self):
         queryset = Input.objects.select_related('unit').all()
@@ -214,10 +206,11 @@ class InputViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class InputProviderViewSet(viewsets.ModelViewSet):
+class InputProviderViewSet(CSVImportMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for InputProvider model"""
     queryset = InputProvider.objects.select_related('input', 'provider', 'input__unit').all()
     serializer_class = InputProviderSerializer
+    csv_importer_class = InputProviderCSVImporter
     
     def get_queryset(self):
         queryset = InputProvider.objects.select_related('input', 'provider', 'input__unit').all()
@@ -240,9 +233,11 @@ class InputProviderViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class BOMTemplateViewSet(viewsets.ModelViewSet):
+class BOMTemplateViewSet(CSVImportMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for BOMTemplate model with cost recalculation"""
     queryset = BOMTemplate.objects.all()
+    etag_related = ('bom_items',)
+    csv_importer_class = BOMTemplateCSVImporter
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -255,12 +250,9 @@ class BOMTemplateViewSet(viewsets.ModelViewSet):
         try:
             bom_template = self.get_object()
             
-            # Recalculate BOM item costs first
-            for item in bom_template.bom_items.all():
-                item.recalculate_cost()
-            
-            # Then recalculate BOM total
-            new_cost = bom_template.recalculate_cost()
+            # Recalculate BOM item costs and BOM total in the database
+            changes = BOMCostEngine().recalculate(template_ids=[bom_template.pk])
+            new_cost = next(change.new_cost for change in changes if change.id == bom_template.pk)
             
             response_data = {
                 'success': True,
@@ -280,23 +272,50 @@ class BOMTemplateViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'])
     def recalculate_all_costs(self, request):
-        """Recalculate costs for all BOM templates"""
+        """Queue a background job that recalculates costs for all BOM templates"""
         try:
-            updated_count = 0
+            job = enqueue_job('recalculate_bom_costs')
             
-            for bom_template in BOMTemplate.objects.all():
-                # Recalculate BOM item costs first
-                for item in bom_template.bom_items.all():
-                    item.recalculate_cost()
-                
-                # Then recalculate BOM total
-                bom_template.recalculate_cost()
-                updated_count += 1
+            response_data = {
+                'success': True,
+                'message': 'Recálculo de costos de plantillas BOM en cola.',
+                'job_id': job.pk,
+                'status': job.status,
+                'timestamp': timezone.now().isoformat(),
+            }
+            
+            return Response(response_data, status=status.HTTP_202_ACCEPTED)
+            
+        except Exception as e:
+            return ErrorResponseBuilder.exception_error(
+                e,
+                context="recalcular todos los costos de plantillas BOM",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    @action(detail=False, methods=['get'])
+    def cost_preview(self, request):
+        """Template totals from current prices, or from the prices in effect at ?as_of="""
+        serializer = CostPreviewQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            changes = BOMCostEngine().preview(**serializer.validated_data)
             
             response_data = {
                 'success': True,
-                'message': f'Costos de {updated_count} plantillas BOM recalculados exitosamente.',
-                'updated_count': updated_count,
+                'message': f'{len(changes)} plantillas BOM evaluadas.',
+                'as_of': serializer.validated_data['as_of'],
+                'bom_templates': [
+                    {
+                        'id': change.id,
+                        'name': change.name,
+                        'stored_cost_cop': str(change.old_cost),
+                        'computed_cost_cop': str(change.new_cost),
+                        'difference_cop': str(change.difference),
+                    }
+                    for change in changes
+                ],
                 'timestamp': timezone.now().isoformat(),
             }
             
@@ -305,21 +324,106 @@ class BOMTemplateViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return ErrorResponseBuilder.exception_error(
                 e,
-                context="recalcular todos los costos de plantillas BOM",
+                context="previsualizar costos de plantillas BOM",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    @action(detail=False, methods=['get'])
+    def sourcing_preview(self, request):
+        """Preview savings of moving BOM items to the cheapest (or preferred) provider"""
+        serializer = SourcingOptimizationSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            plan = ProviderSourcingOptimizer().preview(**serializer.validated_data)
+            
+            response_data = {
+                'success': True,
+                'message': f'{len(plan.lines)} items BOM pueden cambiar a un proveedor más económico.',
+                'total_line_savings_cop': str(plan.total_line_savings),
+                'lines': [
+                    {
+                        'bom_item_id': line.bom_item_id,
+                        'bom_template_id': line.bom_template_id,
+                        'input_id': line.input_id,
+                        'current_input_provider_id': line.current_input_provider_id,
+                        'new_input_provider_id': line.new_input_provider_id,
+                        'current_line_cost_cop': str(line.current_line_cost),
+                        'new_line_cost_cop': str(line.new_line_cost),
+                        'savings_cop': str(line.savings),
+                    }
+                    for line in plan.lines
+                ],
+                'bom_templates': [
+                    {
+                        'id': template.id,
+                        'name': template.name,
+                        'current_cost_cop': str(template.current_cost),
+                        'savings_cop': str(template.savings),
+                    }
+                    for template in plan.templates
+                ],
+                'production_budgets': [
+                    {
+                        'id': budget.id,
+                        'name': budget.name,
+                        'current_cost_cop': str(budget.current_cost),
+                        'savings_cop': str(budget.savings),
+                    }
+                    for budget in plan.production_budgets
+                ],
+                'timestamp': timezone.now().isoformat(),
+            }
+            
+            return Response(response_data, status=status.HTTP_200_OK)
+            
+        except Exception as e:
+            return ErrorResponseBuilder.exception_error(
+                e,
+                context="previsualizar optimización de proveedores",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    @action(detail=False, methods=['post'])
+    def apply_sourcing(self, request):
+        """Re-point BOM items to the best provider and recompute costs in one pass"""
+        serializer = SourcingOptimizationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            result = ProviderSourcingOptimizer().apply(**serializer.validated_data)
+            
+            response_data = {
+                'success': True,
+                'message': f'{result.bom_items} items BOM cambiados a un proveedor más económico.',
+                'bom_items': result.bom_items,
+                'bom_templates': result.bom_templates,
+                'end_products': result.end_products,
+                'production_budgets': result.production_budgets,
+                'timestamp': timezone.now().isoformat(),
+            }
+            
+            return Response(response_data, status=status.HTTP_200_OK)
+            
+        except Exception as e:
+            return ErrorResponseBuilder.exception_error(
+                e,
+                context="aplicar optimización de proveedores",
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
 
-class BOMItemViewSet(viewsets.ModelViewSet):
+class BOMItemViewSet(CSVImportMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for BOMItem model"""
     queryset = BOMItem.objects.select_related(
-        'bom_template', 'input', 'input_provider', 'input_provider__provider'
+        'bom_template', 'input', 'input_provider', 'input_provider__provider', 'sub_template'
     ).all()
     serializer_class = BOMItemSerializer
+    csv_importer_class = BOMItemCSVImporter
     
     def get_queryset(self):
         queryset = BOMItem.objects.select_related(
-            'bom_template', 'input', 'input_provider', 'input_provider__provider'
+            'bom_template', 'input', 'input_provider', 'input_provider__provider', 'sub_template'
         ).all()
         
         # Filter by BOM template
@@ -330,32 +434,53 @@ class BOMItemViewSet(viewsets.ModelViewSet):
         return queryset
     
     def perform_create(self, serializer):
-        """Automatically recalculate line cost and BOM total after creating BOM item"""
-        bom_item = serializer.save()
-        bom_item.recalculate_cost()
-        # Also recalculate the BOM template total
-        bom_item.bom_template.recalculate_cost()
+        """Save BOM item with its line cost and add it to the BOM total"""
+        data = serializer.validated_data
+        line_cost = BOMItem.compute_line_cost(
+            data['quantity'],
+            input_provider=data.get('input_provider'),
+            sub_template=data.get('sub_template'),
+        )
+        
+        with transaction.atomic():
+            bom_item = serializer.save(line_cost_cop=line_cost)
+            # Apply the new line cost as a delta instead of re-summing the BOM
+            apply_template_cost_delta(bom_item.bom_template_id, line_cost)
     
     def perform_update(self, serializer):
-        """Automatically recalculate line cost and BOM total after updating BOM item"""
-        bom_item = serializer.save()
-        bom_item.recalculate_cost()
-        # Also recalculate the BOM template total
-        bom_item.bom_template.recalculate_cost()
+        """Save BOM item with its new line cost and apply the difference to the BOM total"""
+        instance = serializer.instance
+        data = serializer.validated_data
+        old_template_id = instance.bom_template_id
+        old_line_cost = instance.line_cost_cop
+        line_cost = BOMItem.compute_line_cost(
+            data.get('quantity', instance.quantity),
+            input_provider=data.get('input_provider', instance.input_provider),
+            sub_template=data.get('sub_template', instance.sub_template),
+        )
+        
+        with transaction.atomic():
+            bom_item = serializer.save(line_cost_cop=line_cost)
+            if bom_item.bom_template_id == old_template_id:
+                apply_template_cost_delta(old_template_id, line_cost - old_line_cost)
+            else:
+                # Item moved to another BOM: take it out of the old total
+                apply_template_cost_delta(old_template_id, -old_line_cost)
+                apply_template_cost_delta(bom_item.bom_template_id, line_cost)
     
     def perform_destroy(self, instance):
-        """Recalculate BOM total after deleting BOM item"""
-        bom_template = instance.bom_template
-        super().perform_destroy(instance)
-        # Recalculate the BOM template total after item deletion
-        bom_template.recalculate_cost()
+        """Delete BOM item and subtract its line cost from the BOM total"""
+        with transaction.atomic():
+            super().perform_destroy(instance)
+            apply_template_cost_delta(instance.bom_template_id, -instance.line_cost_cop)
 
 
-class EndProductViewSet(viewsets.ModelViewSet):
+class EndProductViewSet(CSVImportMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for EndProduct model with cost recalculation"""
     queryset = EndProduct.objects.select_related('bom_template').all()
     
     serializer_class = EndProductSerializer
+    csv_importer_class = EndProductCSVImporter
     
 
     def perform_create(self, serializer):
@@ -373,9 +498,10 @@ class EndProductViewSet(viewsets.ModelViewSet):
 
 
 
-class ProductionBudgetViewSet(viewsets.ModelViewSet):
+class ProductionBudgetViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for ProductionBudget model with cost recalculation"""
     queryset = ProductionBudget.objects.all()
+    etag_related = ('budget_items',)
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -423,23 +549,65 @@ class ProductionBudgetViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'])
     def recalculate_all_costs(self, request):
-        """Recalculate costs for all production budgets"""
+        """Queue a background job that recalculates costs for all production budgets"""
         try:
-            updated_count = 0
+            job = enqueue_job('recalculate_budget_costs')
             
-            for budget in ProductionBudget.objects.all():
-                # Recalculate budget item costs first
-                for item in budget.budget_items.all():
-                    item.recalculate_cost()
-                
-                # Then recalculate budget total
-                budget.recalculate_budget()
-                updated_count += 1
+            response_data = {
+                'success': True,
+                'message': 'Recálculo de presupuestos de producción en cola.',
+                'job_id': job.pk,
+                'status': job.status,
+                'timestamp': timezone.now().isoformat(),
+            }
+            
+            return Response(response_data, status=status.HTTP_202_ACCEPTED)
+            
+        except Exception as e:
+            return ErrorResponseBuilder.exception_error(
+                e,
+                context="recalcular todos los presupuestos de producción",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    @action(detail=True, methods=['post'])
+    def cost_risk_analysis(self, request, pk=None):
+        """Monte Carlo P50/P90/P99 of the budget total under price uncertainty"""
+        production_budget = self.get_object()
+        serializer = BudgetRiskRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            uncertainty = {
+                input_type: PriceUncertainty(**spec)
+                for input_type, spec in serializer.validated_data['uncertainty'].items()
+            }
+            result = BudgetRiskAnalyzer().analyze(
+                production_budget.pk,
+                uncertainty,
+                samples=serializer.validated_data['samples'],
+                seed=serializer.validated_data['seed'],
+                as_of=serializer.validated_data['as_of'],
+            )
             
             response_data = {
                 'success': True,
-                'message': f'Presupuestos de {updated_count} presupuestos de producción recalculados exitosamente.',
-                'updated_count': updated_count,
+                'message': f'Análisis de riesgo de "{production_budget.name}" completado.',
+                'samples': result.samples,
+                'current_cost_cop': str(result.current_cost),
+                'mean_cost_cop': str(result.mean_cost),
+                'percentiles': {name: str(value) for name, value in result.percentiles.items()},
+                'top_variance_contributors': [
+                    {
+                        'input_provider_id': contributor.input_provider_id,
+                        'input_name': contributor.input_name,
+                        'provider_name': contributor.provider_name,
+                        'quantity': str(contributor.quantity),
+                        'variance_share_percent': str(contributor.variance_share),
+                    }
+                    for contributor in result.contributors
+                ],
+                'elapsed_ms': result.elapsed_ms,
                 'timestamp': timezone.now().isoformat(),
             }
             
@@ -448,41 +616,195 @@ class ProductionBudgetViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return ErrorResponseBuilder.exception_error(
                 e,
-                context="recalcular todos los presupuestos de producción",
+                context="analizar riesgo de costos del presupuesto",
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    def cost_breakdown_report(self, request, pk=None):
-        """Generate cost breakdown report for production budget"""
+    @action(detail=True, methods=['get'])
+    def material_requirements(self, request, pk=None):
+        """Total quantity and cost per input and provider needed by the budget"""
+        production_budget = self.get_object()
+        
         try:
-            production_budget = self.get_object()
+            result = MaterialRequirementsPlanner().requirements(production_budget)
             
-            # Get budget items with related data
-            budget_items = ProductionBudgetItem.objects.select_related(
-                'end_product', 'end_product__bom_template'
-            ).filter(production_budget=production_budget)
-            
-            # Build report data
-            report_data = {
-                "budget": {
-                    "name": production_budget.name,
-                    "status": production_budget.get_status_display(),
-                    "total_budget_cop": str(production_budget.total_budget_cop)
-                },
-                "items": []
+            response_data = {
+                'success': True,
+                'message': f'Requerimientos de materiales de "{production_budget.name}" calculados.',
+                'production_budget_id': production_budget.pk,
+                'version': result.version,
+                'from_snapshot': result.from_snapshot,
+                'total_cost_cop': str(result.total_cost),
+                'inputs': [
+                    {
+                        'input_id': requirement.input_id,
+                        'input_name': requirement.input_name,
+                        'input_type': requirement.input_type,
+                        'unit': requirement.unit,
+                        'quantity': str(requirement.quantity),
+                        'cost_cop': str(requirement.cost),
+                        'providers': [
+                            {
+                                'input_provider_id': provider.input_provider_id,
+                                'provider_name': provider.provider_name,
+                                'unit_price_cop': str(provider.unit_price),
+                                'quantity': str(provider.quantity),
+                                'cost_cop': str(provider.cost),
+                            }
+                            for provider in requirement.providers
+                        ],
+                    }
+                    for requirement in result.inputs
+                ],
+                'timestamp': timezone.now().isoformat(),
             }
             
-            for item in budget_items:
-                item_data = {
-                    "product_name": item.end_product.name,
+            return Response(response_data, status=status.HTTP_200_OK)
+            
+        except Exception as e:
+            return ErrorResponseBuilder.exception_error(
+                e,
+                context="calcular requerimientos de materiales del presupuesto",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    def _parse_as_of(self, request):
+        """Validated ?as_of= query parameter, or None for current costs"""
+        serializer = AsOfQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['as_of']
+    
+    def _costs_as_of(self, production_budget, as_of):
+        """Historical costs of the budget's BOM templates, or None for current costs"""
+        if as_of is None:
+            return None
+        template_ids = production_budget.budget_items.values_list('end_product__bom_template_id', flat=True)
+        return BOMCostEngine().costs_as_of(as_of, template_ids)
+    
+    def _budget_header(self, production_budget, budget_items, costs):
+        """Budget total and as_of for report headers, historical when costs are given"""
+        if costs is None:
+            return {"total_budget_cop": str(production_budget.total_budget_cop)}
+        total = sum(
+            (costs.template_total(item.end_product.bom_template_id) * item.planned_quantity for item in budget_items),
+            Decimal('0')
+        )
+        return {"total_budget_cop": str(total), "as_of": costs.as_of.isoformat()}
+    
+    def _report_snapshot(self, production_budget, as_of):
+        """Frozen snapshot to report from; historical (as_of) reports always use live data"""
+        if as_of is not None:
+            return None
+        return BudgetSnapshotBuilder.frozen_snapshot(production_budget)
+    
+    def _snapshot_budget_header(self, production_budget, snapshot):
+        return {
+            "name": production_budget.name,
+            "status": production_budget.get_status_display(),
+            "total_budget_cop": str(snapshot.total_budget_cop),
+            "snapshot_at": snapshot.created_at.isoformat(),
+        }
+    
+    def _snapshot_cost_breakdown(self, production_budget, snapshot):
+        """Cost breakdown read from the approval snapshot"""
+        return {
+            "budget": self._snapshot_budget_header(production_budget, snapshot),
+            "items": [
+                {
+                    "product_name": item.product_name,
                     "planned_quantity": item.planned_quantity,
                     "unit_cost_cop": str(item.unit_cost_cop),
                     "total_cost_cop": str(item.total_cost_cop),
-                    "bom_cost_cop": str(item.end_product.bom_cost_cop)
+                    "bom_cost_cop": str(item.bom_cost_cop)
                 }
-                report_data["items"].append(item_data)
+                for item in snapshot.items.all()
+            ]
+        }
+    
+    def _snapshot_provider_summary(self, production_budget, snapshot):
+        """Provider summary aggregated from the input lines of the approval snapshot"""
+        providers = BudgetReportAggregator().snapshot_provider_summary(snapshot)
+        return {
+            "budget": self._snapshot_budget_header(production_budget, snapshot),
+            "providers": self._provider_summary_rows(providers, snapshot.total_budget_cop)
+        }
+    
+    def _provider_summary_rows(self, providers, total_budget):
+        """Serialize ProviderCost rows, keeping the report's percentage format"""
+        return [
+            {
+                "provider_name": provider.provider_name,
+                "total_cost": str(provider.total_cost),
+                "percentage": float(provider.percentage(total_budget)),
+                "materials": provider.materials
+            }
+            for provider in providers
+        ]
+    
+    def _snapshot_detailed_line_items(self, production_budget, snapshot):
+        """Detailed line items read from the approval snapshot"""
+        lines_by_item = {}
+        for line in snapshot.lines.filter(depth=0):
+            lines_by_item.setdefault(line.item_id, []).append(line)
+        
+        products = []
+        for item in snapshot.items.all():
+            bom_items = []
+            bom_total = 0
+            for line in lines_by_item.get(item.pk, []):
+                total_for_quantity = float(line.line_cost_cop) * item.planned_quantity
+                bom_total += total_for_quantity
+                bom_items.append({
+                    "input_name": line.input_name,
+                    "input_type": line.input_type,
+                    "quantity": str(line.quantity),
+                    "unit": line.unit,
+                    "provider_name": line.provider_name,
+                    "unit_price_cop": str(line.unit_price_cop),
+                    "line_cost_cop": str(line.line_cost_cop),
+                    "total_for_quantity": f"{total_for_quantity:.2f}"
+                })
             
-            return Response(report_data, status=status.HTTP_200_OK)
+            unit_cost = bom_total / item.planned_quantity if item.planned_quantity > 0 else 0
+            products.append({
+                "product_name": item.product_name,
+                "planned_quantity": item.planned_quantity,
+                "bom_items": bom_items,
+                "totals": {
+                    "bom_total": f"{bom_total:.2f}",
+                    "product_total": f"{bom_total:.2f}",
+                    "unit_cost": f"{unit_cost:.2f}"
+                }
+            })
+        
+        return {
+            "budget": self._snapshot_budget_header(production_budget, snapshot),
+            "products": products
+        }
+    
+    def _report_response(self, request, production_budget, report_type, build, as_of):
+        """
+        Serve a cached report with an ETag derived from the report version;
+        a matching If-None-Match gets a 304 before the report is built.
+        """
+        report_cache = ReportCache()
+        version = report_cache.version(production_budget)
+        etag = make_etag(production_budget.pk, report_type, as_of.isoformat() if as_of else 'current', version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        report = report_cache.get_or_build(production_budget, report_type, build, as_of=as_of, version=version)
+        return Response(report.data, status=status.HTTP_200_OK, headers={'ETag': etag})
+    
+    def cost_breakdown_report(self, request, pk=None):
+        """Generate cost breakdown report for production budget"""
+        as_of = self._parse_as_of(request)
+        try:
+            production_budget = self.get_object()
+            return self._report_response(
+                request, production_budget, 'cost_breakdown',
+                lambda: self._build_cost_breakdown(production_budget, as_of), as_of
+            )
             
         except Exception as e:
             return ErrorResponseBuilder.exception_error(
@@ -491,65 +813,57 @@ class ProductionBudgetViewSet(viewsets.ModelViewSet):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def _build_cost_breakdown(self, production_budget, as_of):
+        """Cost breakdown report data, read from the snapshot for frozen budgets"""
+        snapshot = self._report_snapshot(production_budget, as_of)
+        if snapshot is not None:
+            return self._snapshot_cost_breakdown(production_budget, snapshot)
+        costs = self._costs_as_of(production_budget, as_of)
+        
+        # Get budget items with related data
+        budget_items = ProductionBudgetItem.objects.select_related(
+            'end_product', 'end_product__bom_template'
+        ).filter(production_budget=production_budget)
+        
+        # Build report data
+        report_data = {
+            "budget": {
+                "name": production_budget.name,
+                "status": production_budget.get_status_display(),
+                **self._budget_header(production_budget, budget_items, costs)
+            },
+            "items": []
+        }
+        
+        for item in budget_items:
+            if costs is None:
+                unit_cost = item.unit_cost_cop
+                total_cost = item.total_cost_cop
+                bom_cost = item.end_product.bom_cost_cop
+            else:
+                unit_cost = bom_cost = costs.template_total(item.end_product.bom_template_id)
+                total_cost = unit_cost * item.planned_quantity
+            
+            item_data = {
+                "product_name": item.end_product.name,
+                "planned_quantity": item.planned_quantity,
+                "unit_cost_cop": str(unit_cost),
+                "total_cost_cop": str(total_cost),
+                "bom_cost_cop": str(bom_cost)
+            }
+            report_data["items"].append(item_data)
+        
+        return report_data
+    
     def provider_summary_report(self, request, pk=None):
         """Generate provider summary report for production budget"""
+        as_of = self._parse_as_of(request)
         try:
             production_budget = self.get_object()
-            
-            # Get budget items with full relationship chain
-            budget_items = ProductionBudgetItem.objects.select_related(
-                'end_product', 'end_product__bom_template'
-            ).prefetch_related(
-                'end_product__bom_template__bom_items__input_provider__provider'
-            ).filter(production_budget=production_budget)
-            
-            # Collect provider data
-            provider_costs = {}
-            total_budget = float(production_budget.total_budget_cop)
-            
-            for item in budget_items:
-                end_product = item.end_product
-                if end_product.bom_template:
-                    bom_items = end_product.bom_template.bom_items.all()
-                    for bom_item in bom_items:
-                        provider = bom_item.input_provider.provider
-                        provider_key = provider.name
-                        
-                        if provider_key not in provider_costs:
-                            provider_costs[provider_key] = {
-                                "provider_name": provider.name,
-                                "total_cost": 0,
-                                "materials": set()
-                            }
-                        
-                        # Calculate cost for this provider in this budget
-                        line_cost = float(bom_item.line_cost_cop) * item.planned_quantity
-                        provider_costs[provider_key]["total_cost"] += line_cost
-                        provider_costs[provider_key]["materials"].add(bom_item.input.name)
-            
-            # Build report data
-            providers_list = []
-            for provider_data in provider_costs.values():
-                percentage = (provider_data["total_cost"] / total_budget * 100) if total_budget > 0 else 0
-                providers_list.append({
-                    "provider_name": provider_data["provider_name"],
-                    "total_cost": f"{provider_data['total_cost']:.2f}",
-                    "percentage": round(percentage, 1),
-                    "materials": list(provider_data["materials"])
-                })
-            
-            # Sort by total cost descending
-            providers_list.sort(key=lambda x: float(x["total_cost"]), reverse=True)
-            
-            report_data = {
-                "budget": {
-                    "name": production_budget.name,
-                    "total_budget_cop": str(production_budget.total_budget_cop)
-                },
-                "providers": providers_list
-            }
-            
-            return Response(report_data, status=status.HTTP_200_OK)
+            return self._report_response(
+                request, production_budget, 'provider_summary',
+                lambda: self._build_provider_summary(production_budget, as_of), as_of
+            )
             
         except Exception as e:
             return ErrorResponseBuilder.exception_error(
@@ -558,110 +872,170 @@ class ProductionBudgetViewSet(viewsets.ModelViewSet):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def _build_provider_summary(self, production_budget, as_of):
+        """Provider summary report data, read from the snapshot for frozen budgets"""
+        snapshot = self._report_snapshot(production_budget, as_of)
+        if snapshot is not None:
+            return self._snapshot_provider_summary(production_budget, snapshot)
+        costs = self._costs_as_of(production_budget, as_of)
+        
+        # One grouped query over the exploded BOM lines of the budget
+        budget_items = ProductionBudgetItem.objects.select_related(
+            'end_product'
+        ).filter(production_budget=production_budget)
+        budget_header = self._budget_header(production_budget, budget_items, costs)
+        providers = BudgetReportAggregator().provider_summary(production_budget, as_of=as_of)
+        providers_list = self._provider_summary_rows(providers, Decimal(budget_header["total_budget_cop"]))
+        
+        report_data = {
+            "budget": {
+                "name": production_budget.name,
+                **budget_header
+            },
+            "providers": providers_list
+        }
+        
+        return report_data
+    
     def detailed_line_items_report(self, request, pk=None):
         """Generate detailed line items cost report for production budget"""
+        as_of = self._parse_as_of(request)
         try:
             production_budget = self.get_object()
+            return self._report_response(
+                request, production_budget, 'detailed_line_items',
+                lambda: self._build_detailed_line_items(production_budget, as_of), as_of
+            )
             
-            # Get budget items with full relationship chain
-            budget_items = ProductionBudgetItem.objects.select_related(
-                'end_product', 'end_product__bom_template'
-            ).prefetch_related(
-                'end_product__bom_template__bom_items__input',
-                'end_product__bom_template__bom_items__input__unit',
-                'end_product__bom_template__bom_items__input_provider__provider'
-            ).filter(production_budget=production_budget)
-            
-            # Build detailed report data
-            report_data = {
-                "budget": {
-                    "name": production_budget.name,
-                    "total_budget_cop": str(production_budget.total_budget_cop)
-                },
-                "products": []
-            }
+        except Exception as e:
+            return ErrorResponseBuilder.exception_error(
+                e,
+                context="generar reporte detallado de líneas de costo",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    def _build_detailed_line_items(self, production_budget, as_of):
+        """Detailed line items report data, read from the snapshot for frozen budgets"""
+        snapshot = self._report_snapshot(production_budget, as_of)
+        if snapshot is not None:
+            return self._snapshot_detailed_line_items(production_budget, snapshot)
+        costs = self._costs_as_of(production_budget, as_of)
+        
+        # Get budget items with full relationship chain
+        budget_items = ProductionBudgetItem.objects.select_related(
+            'end_product', 'end_product__bom_template'
+        ).prefetch_related(
+            'end_product__bom_template__bom_items__input',
+            'end_product__bom_template__bom_items__input__unit',
+            'end_product__bom_template__bom_items__input_provider__provider',
+            'end_product__bom_template__bom_items__sub_template'
+        ).filter(production_budget=production_budget)
+        
+        # Build detailed report data
+        report_data = {
+            "budget": {
+                "name": production_budget.name,
+                **self._budget_header(production_budget, budget_items, costs)
+            },
+            "products": []
+        }
+        
+        for item in budget_items:
+            end_product = item.end_product
             
-            for item in budget_items:
-                end_product = item.end_product
-                
-                # BOM items detail
-                bom_items = []
-                bom_total = 0
-                
-                if end_product.bom_template:
-                    for bom_item in end_product.bom_template.bom_items.all():
-                        total_for_quantity = float(bom_item.line_cost_cop) * item.planned_quantity
-                        bom_total += total_for_quantity
-                        
+            # BOM items detail
+            bom_items = []
+            bom_total = 0
+            
+            if end_product.bom_template:
+                for bom_item in end_product.bom_template.bom_items.all():
+                    if costs is None:
+                        line_cost = bom_item.line_cost_cop
+                        unit_price = (
+                            bom_item.sub_template.total_cost_cop if bom_item.is_sub_assembly
+                            else bom_item.input_provider.price_per_unit_cop
+                        )
+                    else:
+                        line_cost = costs.line_cost(bom_item)
+                        unit_price = costs.unit_price(bom_item)
+                    total_for_quantity = float(line_cost) * item.planned_quantity
+                    bom_total += total_for_quantity
+                    
+                    if bom_item.is_sub_assembly:
                         bom_items.append({
-                            "input_name": bom_item.input.name,
-                            "input_type": bom_item.input.get_input_type_display(),
+                            "input_name": bom_item.sub_template.name,
+                            "input_type": "Subensamble",
                             "quantity": str(bom_item.quantity),
-                            "unit": bom_item.input.unit.abbreviation,
-                            "provider_name": bom_item.input_provider.provider.name,
-                            "unit_price_cop": str(bom_item.input_provider.price_per_unit_cop),
-                            "line_cost_cop": str(bom_item.line_cost_cop),
+                            "unit": "un",
+                            "provider_name": "",
+                            "unit_price_cop": str(unit_price),
+                            "line_cost_cop": str(line_cost),
                             "total_for_quantity": f"{total_for_quantity:.2f}"
                         })
-                
-                # Product totals
-                product_total = bom_total
-                unit_cost = product_total / item.planned_quantity if item.planned_quantity > 0 else 0
-                
-                product_data = {
-                    "product_name": end_product.name,
-                    "planned_quantity": item.planned_quantity,
-                    "bom_items": bom_items,
-                    "totals": {
-                        "bom_total": f"{bom_total:.2f}",
-                        "product_total": f"{product_total:.2f}",
-                        "unit_cost": f"{unit_cost:.2f}"
-                    }
-                }
-                
-                report_data["products"].append(product_data)
+                        continue
+                    
+                    bom_items.append({
+                        "input_name": bom_item.input.name,
+                        "input_type": bom_item.input.get_input_type_display(),
+                        "quantity": str(bom_item.quantity),
+                        "unit": bom_item.input.unit.abbreviation,
+                        "provider_name": bom_item.input_provider.provider.name,
+                        "unit_price_cop": str(unit_price),
+                        "line_cost_cop": str(line_cost),
+                        "total_for_quantity": f"{total_for_quantity:.2f}"
+                    })
             
-            return Response(report_data, status=status.HTTP_200_OK)
+            # Product totals
+            product_total = bom_total
+            unit_cost = product_total / item.planned_quantity if item.planned_quantity > 0 else 0
             
-        except Exception as e:
-            return ErrorResponseBuilder.exception_error(
-                e,
-                context="generar reporte detallado de líneas de costo",
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            product_data = {
+                "product_name": end_product.name,
+                "planned_quantity": item.planned_quantity,
+                "bom_items": bom_items,
+                "totals": {
+                    "bom_total": f"{bom_total:.2f}",
+                    "product_total": f"{product_total:.2f}",
+                    "unit_cost": f"{unit_cost:.2f}"
+                }
+            }
+            
+            report_data["products"].append(product_data)
+        
+        return report_data
     
     def export_report(self, request, pk=None):
-        """Export reports in CSV format"""
+        """
+        Stream a report as CSV (type=cost_breakdown|provider_summary|
+        detailed_line_items), gzip-compressed with compression=gzip
+        """
+        format_type = request.query_params.get('format', 'csv')
+        report_type = request.query_params.get('type', 'cost_breakdown')
+        compressed = request.query_params.get('compression') == 'gzip'
+        
+        if format_type != 'csv':
+            return Response(
+                {"error": "Formato no soportado. Use format=csv"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if report_type not in BudgetReportCSVExporter.HEADERS:
+            return Response(
+                {"error": "Tipo de reporte no válido"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        as_of = self._parse_as_of(request)
+        
         try:
-            format_type = request.query_params.get('format', 'json')
-            report_type = request.query_params.get('type', 'desglose_costos')
-            
-            if format_type == 'csv':
-                # For now, return CSV-ready data structure
-                # In a full implementation, this would generate actual CSV files
-                if report_type == 'cost_breakdown':
-                    response = self.cost_breakdown_report(request, pk)
-                elif report_type == 'provider_summary':
-                    response = self.provider_summary_report(request, pk)
-                elif report_type == 'detailed_line_items':
-                    response = self.detailed_line_items_report(request, pk)
-                else:
-                    return Response(
-                        {"error": "Tipo de reporte no válido"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
-                # Add CSV format indicator to response
-                data = response.data
-                data['format'] = 'csv'
-                return Response(data, status=status.HTTP_200_OK)
+            production_budget = self.get_object()
+            exporter = BudgetReportCSVExporter(production_budget, report_type, as_of=as_of)
+            
+            return streaming_csv_response(
+                request,
+                exporter.stream(compressed=compressed),
+                content_type='application/gzip' if compressed else 'text/csv; charset=utf-8',
+                filename=exporter.filename(compressed)
+            )
             
-            else:
-                return Response(
-                    {"error": "Formato no soportado. Use format=csv"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-                
         except Exception as e:
             return ErrorResponseBuilder.exception_error(
                 e,
@@ -670,7 +1044,7 @@ class ProductionBudgetViewSet(viewsets.ModelViewSet):
             )
 
 
-class ProductionBudgetItemViewSet(viewsets.ModelViewSet):
+class ProductionBudgetItemViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for ProductionBudgetItem model"""
     queryset = ProductionBudgetItem.objects.select_related(
         'production_budget', 'end_product'
@@ -697,4 +1071,57 @@ class ProductionBudgetItemViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         """Automatically recalculate cost after updating budget item"""
         budget_item = serializer.save()
-        budget_item.recalculate_cost()
\ No newline at end of file
+        budget_item.recalculate_cost()
+
+
+class BackgroundJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for polling the status of background jobs of the current tenant"""
+    serializer_class = BackgroundJobSerializer
+    
+    def get_queryset(self):
+        return BackgroundJob.objects.filter(
+            schema_name=getattr(connection, 'schema_name', get_public_schema_name())
+        )
+
+
+class PriceScenarioViewSet(viewsets.ViewSet):
+    """What-if simulation of provider price changes; never writes to the database"""
+    
+    def _impact_data(self, impact):
+        return {
+            'id': impact.id,
+            'name': impact.name,
+            'current_cost_cop': str(impact.current_cost),
+            'simulated_cost_cop': str(impact.simulated_cost),
+            'difference_cop': str(impact.difference),
+            'percent_change': str(impact.percent_change) if impact.percent_change is not None else None,
+        }
+    
+    def simulate(self, request):
+        """Apply percent price changes by input type, provider or input provider"""
+        serializer = PriceScenarioSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            scenario_data = dict(serializer.validated_data)
+            simulator = PriceScenarioSimulator()
+            simulator.load(as_of=scenario_data.pop('as_of'))
+            result = simulator.run(PriceScenario(**scenario_data))
+            
+            response_data = {
+                'success': True,
+                'message': 'Simulación de precios completada.',
+                'end_products': [self._impact_data(impact) for impact in result.end_products],
+                'production_budgets': [self._impact_data(impact) for impact in result.production_budgets],
+                'elapsed_ms': result.elapsed_ms,
+                'timestamp': timezone.now().isoformat(),
+            }
+            
+            return Response(response_data, status=status.HTTP_200_OK)
+            
+        except Exception as e:
+            return ErrorResponseBuilder.exception_error(
+                e,
+                context="simular escenario de precios",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )